@@ -0,0 +1,255 @@
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import numpy as np
+import logging
+import sys
+
+def ssvepTable(frequencies, n_frames, refresh_rate, phases=None, waveform="sine"):
+    """
+    Luminancia de cada objetivo en cada cuadro para estimulación SSVEP por muestreo de la señal en el refresco de
+    la pantalla (sampled sinusoidal stimulation): L(i) = (1 + sin(2*pi*f*i/refresh_rate + fase))/2.
+    Con waveform="square" la luminancia es 1 en la mitad positiva del ciclo y 0 en la otra.
+
+    Params:
+    - frequencies (list): frecuencia en Hz de cada objetivo.
+    - n_frames (int): cantidad de cuadros del trial.
+    - refresh_rate (float): frecuencia de refresco de la pantalla en Hz.
+    - phases (list): fase inicial de cada objetivo en radianes. Default: 0 para todos.
+    - waveform (str): "sine" o "square".
+
+    Returns:
+    - Array de forma (objetivos, cuadros) con valores entre 0 y 1.
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64)[:, np.newaxis]
+    phases = np.zeros_like(frequencies) if phases is None else np.asarray(phases, dtype=np.float64)[:, np.newaxis]
+    angle = 2*np.pi*frequencies*np.arange(n_frames)/refresh_rate + phases
+    if waveform == "sine":
+        return (1 + np.sin(angle))/2
+    if waveform == "square":
+        return (np.sin(angle) >= 0).astype(np.float64)
+    raise ValueError(f"Forma de onda '{waveform}' no soportada, usar 'sine' o 'square'")
+
+def mSequence(order=6, taps=(6, 5), seed=1):
+    """
+    Secuencia de máxima longitud (m-secuencia) de 2**order - 1 bits, generada con un registro de desplazamiento
+    con realimentación lineal (LFSR) de Fibonacci.
+
+    Params:
+    - order (int): longitud del registro.
+    - taps (tuple): posiciones (desde 1) de los bits realimentados. Deben corresponder a un polinomio primitivo,
+    p.ej. (6, 5) para order=6 (63 bits) o (7, 6) para order=7 (127 bits).
+    - seed (int): estado inicial del registro, distinto de 0.
+
+    Returns:
+    - Array de 0 y 1 de tipo uint8.
+    """
+    state = seed & ((1 << order) - 1)
+    if state == 0:
+        raise ValueError("El estado inicial del registro no puede ser 0")
+    code = np.empty(2**order - 1, dtype=np.uint8)
+    for i in range(code.size):
+        code[i] = state & 1
+        bit = 0
+        for tap in taps:
+            bit ^= (state >> (order - tap)) & 1
+        state = (state >> 1) | (bit << (order - 1))
+    return code
+
+def cvepTable(n_targets, n_frames, code=None, lag=None):
+    """
+    Luminancia de cada objetivo en cada cuadro para estimulación c-VEP: todos los objetivos usan el mismo código
+    pseudoaleatorio desplazado circularmente lag cuadros por objetivo, y el código se repite hasta completar el
+    trial.
+
+    Params:
+    - n_targets (int): cantidad de objetivos.
+    - n_frames (int): cantidad de cuadros del trial.
+    - code (np.ndarray): código de 0 y 1, un valor por cuadro. Default: mSequence() (63 bits).
+    - lag (int): desplazamiento en cuadros entre objetivos consecutivos. Default: el largo del código dividido la
+    cantidad de objetivos.
+
+    Returns:
+    - Array de forma (objetivos, cuadros) con valores 0 y 1.
+    """
+    code = mSequence() if code is None else np.asarray(code)
+    lag = code.size//n_targets if lag is None else lag
+    # índice en el código de cada objetivo en cada cuadro, con el desplazamiento de cada objetivo
+    index = (np.arange(n_frames)[np.newaxis, :] + lag*np.arange(n_targets)[:, np.newaxis]) % code.size
+    return code[index].astype(np.float64)
+
+class FlickerEngine(QObject):
+    """
+    Motor de parpadeo de estímulos SSVEP y c-VEP sobre varios SquareWidget.
+
+    La luminancia de cada objetivo en cada cuadro del trial se calcula de antemano en una tabla (ver ssvepTable y
+    cvepTable), cuantizada a levels niveles de color entre off_color y on_color, y las imágenes de esos colores se
+    dibujan antes de empezar (SquareWidget.prerender). Durante el trial, en cada flip del StimulusPresenter solo se
+    busca la columna del cuadro siguiente y se piden los cambios de los objetivos cuyo color cambia.
+
+    El índice del cuadro se calcula a partir del instante del flip y del inicio del trial, por lo que si se pierde
+    un cuadro la fase de los estímulos no se corre: se saltea esa columna y se cuenta como cuadro perdido. El
+    marcador de inicio de cada trial se envía con el instante del flip del primer cuadro, con la misma limitación
+    que en StimulusPresenter: los cuadrados se muestran en sus propias ventanas y pueden aparecer después de ese
+    flip, por lo que el retraso real se debe validar con el fotodiodo del presentador.
+    """
+
+    # (número de trial, cuadros perdidos en el trial), emitida al terminar cada trial
+    finished = pyqtSignal(int, int)
+
+    def __init__(self, presenter, targets, on_color="white", off_color="black", levels=32):
+        """
+        Params:
+        - presenter (StimulusPresenter): reloj de cuadros con el que se aplican los cambios y se envían los marcadores.
+        - targets (list): SquareWidget de cada objetivo, en el mismo orden que las filas de las tablas.
+        - on_color (str), off_color (str): colores de luminancia 1 y 0.
+        - levels (int): cantidad de niveles de color entre off_color y on_color.
+        """
+        super().__init__()
+        self.presenter = presenter
+        self.targets = list(targets)
+        self.levels = levels
+        on, off = QColor(on_color), QColor(off_color)
+        weights = np.linspace(0, 1, levels)[:, np.newaxis]
+        rgb = np.round((1 - weights)*[off.red(), off.green(), off.blue()]
+                       + weights*[on.red(), on.green(), on.blue()]).astype(int)
+        self.palette = [QColor(r, g, b).name() for r, g, b in rgb]
+        self.table = None       # nivel de color de cada objetivo en cada cuadro, (objetivos, cuadros)
+        self.trial = 0
+        self.running = False
+        self.onset = None       # instante del flip del primer cuadro del trial
+        self.last_index = -1    # último cuadro mostrado del trial
+        self.missed_frames = 0  # cuadros perdidos en el trial actual
+        self.total_frames = 0
+        self.total_missed = 0
+        self._current = None    # nivel de color actual de cada objetivo
+        self._start = None      # marcador pedido para el inicio del trial: (método, args)
+        presenter.flipped.connect(self._on_flip)
+
+    def set_table(self, luminance):
+        """
+        Cargar la tabla de luminancias del próximo trial y dibujar de antemano los colores que usa.
+
+        Params:
+        - luminance (np.ndarray): luminancia entre 0 y 1 de cada objetivo en cada cuadro, (objetivos, cuadros).
+        """
+        luminance = np.asarray(luminance)
+        if luminance.ndim != 2 or luminance.shape[0] != len(self.targets):
+            raise ValueError(f"La tabla debe tener forma ({len(self.targets)}, cuadros), no {luminance.shape}")
+        self.table = np.round(np.clip(luminance, 0, 1)*(self.levels - 1)).astype(np.intp)
+        used = np.unique(self.table)
+        for target in self.targets:
+            target.cache_size = max(target.cache_size, used.size + 1)
+            target.prerender(colors=[self.palette[level] for level in used])
+
+    def set_ssvep(self, frequencies, duration, phases=None, waveform="sine"):
+        """Cargar un trial SSVEP de duration segundos (ver ssvepTable)."""
+        n_frames = round(duration*self.presenter.refresh_rate)
+        self.set_table(ssvepTable(frequencies, n_frames, self.presenter.refresh_rate, phases, waveform))
+
+    def set_cvep(self, duration, code=None, lag=None):
+        """Cargar un trial c-VEP de duration segundos (ver cvepTable)."""
+        n_frames = round(duration*self.presenter.refresh_rate)
+        self.set_table(cvepTable(len(self.targets), n_frames, code, lag))
+
+    def start_trial(self, mensaje="", phase=None):
+        """
+        Iniciar el trial cargado en el próximo cuadro. El marcador de inicio se envía con el instante del flip del
+        primer cuadro: la siguiente fase del generador de marcadores, o la fase phase si se indica.
+        """
+        if self.table is None:
+            raise ValueError("No hay una tabla de estímulos cargada (ver set_ssvep, set_cvep y set_table)")
+        if self.running:
+            logging.warning("Ya hay un trial en curso")
+            return
+        self.running = True
+        self.onset = None
+        self.last_index = -1
+        self.missed_frames = 0
+        self._current = np.full(len(self.targets), -1)
+        self._start = ("moveTo", (phase, mensaje)) if phase is not None else ("next", (mensaje,))
+
+    def stop_trial(self):
+        """Terminar el trial en curso, dejando los objetivos en off_color en el próximo cuadro."""
+        if not self.running:
+            return
+        self.running = False
+        self._start = None
+        for target in self.targets:
+            self.presenter.set(target, color=self.palette[0])
+        self.total_missed += self.missed_frames
+        self.trial += 1
+        self.finished.emit(self.trial, self.missed_frames)
+
+    def stats(self):
+        """Cuadros mostrados y perdidos en todos los trials y en el trial actual (o el último)."""
+        return {"trials": self.trial,
+                "frames": self.total_frames,
+                "missed_frames": self.total_missed + (self.missed_frames if self.running else 0),
+                "trial_missed_frames": self.missed_frames,
+                "onset": self.onset}
+
+    def _show(self, index):
+        """Pedir al presentador los cambios de los objetivos para mostrar el cuadro index."""
+        levels = self.table[:, index]
+        for i in np.flatnonzero(levels != self._current):
+            self.presenter.set(self.targets[i], color=self.palette[levels[i]])
+        self._current = levels
+
+    def _on_flip(self, frame, flip):
+        if not self.running:
+            return
+        if self._start is not None:
+            # primer cuadro del trial: se muestra en el próximo flip, junto con el marcador de inicio
+            self._show(0)
+            method, args = self._start
+            getattr(self.presenter, method)(*args)
+            self._start = None
+            return
+        if self.onset is None:
+            self.onset = flip
+            index = 0
+        else:
+            # cuadro mostrado según el tiempo transcurrido, para no correr la fase si se perdieron cuadros
+            index = max(round((flip - self.onset)/self.presenter.period), self.last_index + 1)
+            self.missed_frames += index - self.last_index - 1
+        self.total_frames += 1
+        self.last_index = index
+        if index + 1 >= self.table.shape[1]:
+            self.stop_trial()
+        else:
+            self._show(index + 1)
+
+if __name__ == "__main__":
+    from pyhiamp.gui.SquareWidget import SquareWidget
+    from pyhiamp.gui.StimulusPresenter import StimulusPresenter
+    from pyhiamp.markers.MarkersGenerator import MarkersGenerator
+
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+
+    phases = {"rest": {"next": "flicker", "duration": 1.0},
+              "flicker": {"next": "rest", "duration": 4.0}}
+    markerGen = MarkersGenerator(phases, stream_name="Test_Markers", stream_type="Markers")
+    presenter = StimulusPresenter(markerGen, x=0, y=0, size=60)
+    squares = [SquareWidget(x=200 + 150*i, y=200, size=120, color="black") for i in range(4)]
+
+    engine = FlickerEngine(presenter, squares)
+    engine.set_ssvep([8.0, 10.0, 12.0, 15.0], duration=4.0)
+
+    def next_trial(trial, missed):
+        print(f"Trial {trial} terminado. Cuadros perdidos: {missed}")
+        presenter.moveTo("rest")
+        if trial < 3:
+            QTimer.singleShot(1000, lambda: engine.start_trial(phase="flicker"))
+        else:
+            print(engine.stats(), presenter.stop())
+            SquareWidget.close_all()
+            presenter.close()
+            app.quit()
+
+    engine.finished.connect(next_trial)
+    presenter.start()
+    engine.start_trial(phase="flicker")
+    sys.exit(app.exec_())
@@ -1,14 +1,162 @@
 from PyQt5.QtWidgets import QWidget, QApplication
-from PyQt5.QtGui import QColor, QPainter, QFont, QPen
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtGui import QColor, QPainter, QFont, QPen, QPixmap
+from PyQt5.QtCore import Qt, QPoint, QRect
+from collections import OrderedDict
 import sys
 
-class SquareWidget(QWidget):
+def renderSquare(size, color, text, text_color, font_size, ratio=1.0):
+    """
+    Dibuja un cuadrado con borde negro y texto centrado en una imagen nueva, con fondo transparente.
+    Params:
+    - size (int): Tamaño del cuadrado.
+    - color (QColor), text (str), text_color (QColor), font_size (int): Propiedades del cuadrado.
+    - ratio (float): Relación entre píxeles físicos y lógicos de la pantalla (devicePixelRatio).
+    """
+    pixmap = QPixmap(round(size*ratio), round(size*ratio))
+    pixmap.setDevicePixelRatio(ratio)
+    pixmap.fill(Qt.transparent)
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    #Dibujamos el cuadrado
+    painter.setBrush(color)
+    painter.setPen(Qt.black)
+    painter.drawRect(0, 0, size, size)
+
+    #Dibujamos el texto centrado
+    painter.setPen(QPen(text_color))
+    painter.setFont(QFont("Arial", font_size))
+    painter.drawText(QRect(0, 0, size, size), Qt.AlignCenter, text)
+    painter.end()
+    return pixmap
+
+class SquareState:
+    """
+    Estado de un cuadrado (color, texto, color del texto, tamaño de fuente y tamaño) con una caché LRU de la
+    imagen ya dibujada de cada estado, y los métodos para cambiarlo. La comparten SquareWidget y BoardSquare.
+
+    Cada clase que la usa debe llamar a _init_state y definir update() (pedir un repintado) y pixel_ratio()
+    (relación entre píxeles físicos y lógicos de la superficie donde se dibuja).
+    """
+
+    def _init_state(self, size, color, text, text_color, font_size, cache_size):
+        self.size = size
+        self.square_color = QColor(color)
+        self.text = text
+        self.text_color = QColor(text_color)
+        self.font_size = font_size
+        self.cache_size = cache_size
+        self._pixmaps = OrderedDict()  # imagen dibujada de cada estado, de la menos a la más usada recientemente
+        self._pixmap = None            # imagen del estado actual
+
+    def current_pixmap(self):
+        """Imagen ya dibujada del estado actual."""
+        if self._pixmap is None or self._pixmap.devicePixelRatioF() != self.pixel_ratio():
+            self._select_pixmap()
+        return self._pixmap
+
+    def _state(self):
+        """Clave del estado actual en la caché de imágenes."""
+        return (self.square_color.rgba(), self.text, self.text_color.rgba(), self.font_size, self.size,
+                self.pixel_ratio())
+
+    def _render(self):
+        """Dibuja el cuadrado y el texto centrado del estado actual en una imagen nueva."""
+        return renderSquare(self.size, self.square_color, self.text, self.text_color, self.font_size,
+                            self.pixel_ratio())
+
+    def _select_pixmap(self):
+        """Elige la imagen del estado actual, dibujándola solo si no está en la caché."""
+        key = self._state()
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = self._render()
+            self._pixmaps[key] = pixmap
+            while len(self._pixmaps) > self.cache_size:
+                self._pixmaps.popitem(last=False)
+        else:
+            self._pixmaps.move_to_end(key)
+        self._pixmap = pixmap
+
+    def _refresh(self):
+        """Actualiza la imagen del estado actual y pide un repintado."""
+        self._select_pixmap()
+        self.update()
+
+    def prerender(self, colors=(), texts=(), text_colors=()):
+        """
+        Dibuja de antemano las imágenes de los estados que se van a usar (p.ej. los colores de un estímulo
+        parpadeante), para que el primer cambio a cada uno no tenga que dibujarlo. Se combinan todos los valores
+        dados con los actuales del resto de las propiedades.
+        Params:
+        - colors (list), texts (list), text_colors (list): valores de cada propiedad.
+        """
+        current = (self.square_color, self.text, self.text_color)
+        for color in colors or [current[0]]:
+            for text in texts or [current[1]]:
+                for text_color in text_colors or [current[2]]:
+                    self.square_color, self.text, self.text_color = QColor(color), text, QColor(text_color)
+                    self._select_pixmap()
+        self.square_color, self.text, self.text_color = current
+        self._select_pixmap()
+
+    ## Métodos para cambiar propiedades del cuadrado
+    ## Estos métodos actualizan el color, texto, color del texto, tamaño de fuente, etc.
+    def change_color(self, color):
+        """ Cambia el color del cuadrado.
+        Params:
+        - color (str): Nuevo color del cuadrado en formato hexadecimal o nombre de color.
+        """
+        self.square_color = QColor(color)
+        self._refresh()
+
+    def change_text(self, text):
+        """ Cambia el texto dentro del cuadrado.
+        Params:
+        - text (str): Nuevo texto a mostrar dentro del cuadrado.
+        """
+        self.text = text
+        self._refresh()
+
+    def change_text_color(self, color):
+        """ Cambia el color del texto dentro del cuadrado.
+        Params:
+        - color (str): Nuevo color del texto en formato hexadecimal o nombre de color.
+        """
+        self.text_color = QColor(color)
+        self._refresh()
+
+    def change_font_size(self, size):
+        """ Cambia el tamaño de la fuente del texto dentro del cuadrado.
+        Params:
+        - size (int): Nuevo tamaño de la fuente.
+        """
+        self.font_size = size
+        self._refresh()
+
+    def apply_changes(self, color=None, text=None, text_color=None, font_size=None):
+        """
+        Cambia varias propiedades a la vez sin pedir un repintado. Lo usa StimulusPresenter, que repinta el
+        cuadrado en el cuadro que corresponde.
+        Params:
+        - color (str), text (str), text_color (str), font_size (int): nuevos valores. None deja el actual.
+        """
+        if color is not None:
+            self.square_color = QColor(color)
+        if text is not None:
+            self.text = text
+        if text_color is not None:
+            self.text_color = QColor(text_color)
+        if font_size is not None:
+            self.font_size = font_size
+        self._select_pixmap()
+
+class SquareWidget(SquareState, QWidget):
 
     instances = []
 
     def __init__(self, x=100, y=100, size=100, color="red", parent=None,
-                 font_size=14, text="", text_color="white", show_on_init=True):
+                 font_size=14, text="", text_color="white", show_on_init=True, cache_size=16):
         """
         Crea un widget cuadrado que puede ser arrastrado y personalizado.
         Params:
@@ -21,13 +169,11 @@ class SquareWidget(QWidget):
         - text (str): Texto a mostrar dentro del cuadrado.
         - text_color (str): Color del texto en formato hexadecimal o nombre de color.
         - show_on_init (bool): Si se debe mostrar el cuadrado al inicializar.
+        - cache_size (int): Cantidad máxima de estados (color, texto, color del texto, fuente, tamaño) cuya imagen
+        se guarda ya dibujada. Al superarla se descarta la menos usada recientemente.
         """
         super().__init__(parent)
-        self.size = size
-        self.square_color = QColor(color)
-        self.text = text
-        self.text_color = QColor(text_color)
-        self.font_size = font_size
+        self._init_state(size, color, text, text_color, font_size, cache_size)
         self.active = True
         self.dragging = False
         self.offset = QPoint()
@@ -39,10 +185,14 @@ class SquareWidget(QWidget):
             self.show()
         SquareWidget.instances.append(self)
 
+    def pixel_ratio(self):
+        return self.devicePixelRatioF()
+
     def paintEvent(self, event):
         """
         Maneja el evento de pintura del widget.
-        Además dibuja un cuadrado y texto centrado en el widget.
+        Copia la imagen ya dibujada del estado actual (ver SquareState), sin volver a dibujar el cuadrado ni el
+        texto.
         Params:
         - event (QEvent): El evento de pintura
 
@@ -53,19 +203,7 @@ class SquareWidget(QWidget):
         if not self.active:
             return
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        #Dibujamos el cuadrado
-        painter.setBrush(self.square_color)
-        painter.setPen(Qt.black)
-        painter.drawRect(0, 0, self.size, self.size)
-
-        #Dibujamos el texto centrado
-        painter.setPen(QPen(self.text_color))
-        font = QFont("Arial", self.font_size)
-        painter.setFont(font)
-        rect = self.rect()
-        painter.drawText(rect, Qt.AlignCenter, self.text)
+        painter.drawPixmap(0, 0, self.current_pixmap())
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.active:
@@ -79,40 +217,6 @@ class SquareWidget(QWidget):
     def mouseReleaseEvent(self, event):
         self.dragging = False
 
-    ## Métodos para cambiar propiedades del widget
-    ## Estos métodos actualizan el color, texto, color del texto, tamaño de fuente, etc.
-    def change_color(self, color):
-        """ Cambia el color del cuadrado.
-        Params:
-        - color (str): Nuevo color del cuadrado en formato hexadecimal o nombre de color.
-        """
-        self.square_color = QColor(color)
-        self.update()
-
-    def change_text(self, text):
-        """ Cambia el texto dentro del cuadrado.
-        Params:
-        - text (str): Nuevo texto a mostrar dentro del cuadrado.
-        """
-        self.text = text
-        self.update()
-
-    def change_text_color(self, color):
-        """ Cambia el color del texto dentro del cuadrado.
-        Params:
-        - color (str): Nuevo color del texto en formato hexadecimal o nombre de color.
-        """
-        self.text_color = QColor(color)
-        self.update()
-
-    def change_font_size(self, size):
-        """ Cambia el tamaño de la fuente del texto dentro del cuadrado.
-        Params:
-        - size (int): Nuevo tamaño de la fuente.
-        """
-        self.font_size = size
-        self.update()
-
     def activate(self):
         """
         Activa el widget, mostrándolo y permitiendo que responda a eventos."""
@@ -136,7 +240,7 @@ class SquareWidget(QWidget):
         Cambia el tamaño del cuadrado y actualiza su geometría."""
         self.size = new_size
         self.setFixedSize(new_size, new_size)
-        self.update()
+        self._refresh()
 
     def closeEvent(self, event):
         """
@@ -0,0 +1,210 @@
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtCore import Qt, QPoint, QRect
+import sys
+
+from pyhiamp.gui.SquareWidget import SquareState
+
+class StimulusBoard(QWidget):
+    """
+    Superficie única sobre la que se dibujan muchos cuadrados (BoardSquare) en una sola pasada de pintura.
+
+    A diferencia de SquareWidget, donde cada cuadrado es una ventana propia (el compositor maneja N ventanas,
+    N eventos de pintura y N ventanas a las que enviar los eventos del mouse), el tablero es una sola ventana
+    sin marco y con fondo transparente (o del color background). Cada cambio de un cuadrado marca solo su región
+    para repintar, y Qt junta todas las regiones marcadas en un único paintEvent.
+    """
+
+    def __init__(self, x=None, y=None, width=None, height=None, background=None, parent=None,
+                 show_on_init=True):
+        """
+        Params:
+        - x (int), y (int), width (int), height (int): Geometría del tablero. Por defecto, toda la pantalla
+        principal.
+        - background (str): Color de fondo del tablero. Por defecto, transparente.
+        - parent (QWidget): Widget padre del tablero.
+        - show_on_init (bool): Si se debe mostrar el tablero al inicializar.
+        """
+        super().__init__(parent)
+        if None in (x, y, width, height):
+            screen = QApplication.primaryScreen().geometry()
+            x = screen.x() if x is None else x
+            y = screen.y() if y is None else y
+            width = screen.width() if width is None else width
+            height = screen.height() if height is None else height
+        self.background = QColor(background) if background is not None else None
+        self.squares = []        # cuadrados del tablero, en orden de dibujo (el último queda arriba)
+        self.dragged = None      # cuadrado que se está arrastrando
+        self.offset = QPoint()
+
+        self.setGeometry(x, y, width, height)
+        self.setWindowFlags(Qt.FramelessWindowHint)
+        if self.background is None:
+            self.setAttribute(Qt.WA_TranslucentBackground)
+        if show_on_init:
+            self.show()
+
+    def add_square(self, **kwargs):
+        """Crea un BoardSquare en el tablero. Recibe los mismos parámetros que BoardSquare."""
+        return BoardSquare(self, **kwargs)
+
+    def paintEvent(self, event):
+        """
+        Dibuja en una sola pasada los cuadrados activos que intersecan la región a repintar, copiando la imagen
+        ya dibujada del estado de cada uno.
+        """
+        painter = QPainter(self)
+        region = event.rect()
+        if self.background is not None:
+            painter.fillRect(region, self.background)
+        for square in self.squares:
+            if square.active and square.rect().intersects(region):
+                painter.drawPixmap(square.x, square.y, square.current_pixmap())
+
+    def square_at(self, pos):
+        """Cuadrado activo de más arriba que contiene el punto pos, o None."""
+        for square in reversed(self.squares):
+            if square.active and square.rect().contains(pos):
+                return square
+        return None
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.dragged = self.square_at(event.pos())
+            if self.dragged is not None:
+                self.offset = event.pos() - QPoint(self.dragged.x, self.dragged.y)
+
+    def mouseMoveEvent(self, event):
+        if self.dragged is not None and self.dragged.active:
+            pos = event.pos() - self.offset
+            self.dragged.move_to(pos.x(), pos.y())
+
+    def mouseReleaseEvent(self, event):
+        self.dragged = None
+
+    def closeEvent(self, event):
+        """
+        Maneja el evento de cierre del tablero, cerrando también sus cuadrados."""
+        for square in self.squares[:]:
+            square.close()
+        super().closeEvent(event)
+
+class BoardSquare(SquareState):
+    """
+    Cuadrado dibujado sobre un StimulusBoard, con la misma interfaz que SquareWidget (change_color, change_text,
+    move_to, activate/deactivate, etc. y el registro BoardSquare.instances con close_all), por lo que se puede usar
+    en su lugar, incluso con StimulusPresenter y FlickerEngine.
+    """
+
+    instances = []
+
+    def __init__(self, board, x=100, y=100, size=100, color="red", font_size=14, text="", text_color="white",
+                 show_on_init=True, cache_size=16):
+        """
+        Params:
+        - board (StimulusBoard): Tablero sobre el que se dibuja el cuadrado.
+        - x (int): Posición X inicial del cuadrado, relativa al tablero.
+        - y (int): Posición Y inicial del cuadrado, relativa al tablero.
+        - size (int): Tamaño del cuadrado.
+        - color (str): Color del cuadrado en formato hexadecimal o nombre de color.
+        - font_size (int): Tamaño de la fuente del texto dentro del cuadrado.
+        - text (str): Texto a mostrar dentro del cuadrado.
+        - text_color (str): Color del texto en formato hexadecimal o nombre de color.
+        - show_on_init (bool): Si se debe mostrar el cuadrado al inicializar.
+        - cache_size (int): Cantidad máxima de estados cuya imagen se guarda ya dibujada (ver SquareWidget).
+        """
+        self.board = board
+        self.x = x
+        self.y = y
+        self._init_state(size, color, text, text_color, font_size, cache_size)
+        self.active = show_on_init
+
+        board.squares.append(self)
+        BoardSquare.instances.append(self)
+        self.update()
+
+    def pixel_ratio(self):
+        return self.board.devicePixelRatioF()
+
+    def rect(self):
+        """Región del cuadrado en el tablero."""
+        return QRect(self.x, self.y, self.size + 1, self.size + 1)
+
+    def update(self):
+        """Marca la región del cuadrado para repintar en la próxima pasada de pintura del tablero."""
+        self.board.update(self.rect())
+
+    def repaint(self):
+        """Repinta ahora la región del cuadrado."""
+        self.board.repaint(self.rect())
+
+    def activate(self):
+        """
+        Activa el cuadrado, mostrándolo y permitiendo que responda a eventos."""
+        self.active = True
+        self.update()
+
+    def deactivate(self):
+        """
+        Desactiva el cuadrado, ocultándolo y evitando que responda a eventos."""
+        self.active = False
+        self.update()
+
+    def move_to(self, x, y):
+        """
+        Mueve el cuadrado a una nueva posición (x, y) del tablero."""
+        self.update()
+        self.x, self.y = x, y
+        self.update()
+
+    def resize_square(self, new_size):
+        """
+        Cambia el tamaño del cuadrado."""
+        self.update()
+        self.size = new_size
+        self._refresh()
+
+    def close(self):
+        """
+        Quita el cuadrado del tablero y del registro de instancias."""
+        if self in self.board.squares:
+            self.board.squares.remove(self)
+            self.update()
+        if self in BoardSquare.instances:
+            BoardSquare.instances.remove(self)
+        return True
+
+    @classmethod
+    def close_all(cls):
+        """
+        Cierra todos los cuadrados de tipo BoardSquare.
+        """
+        for inst in cls.instances[:]:
+            inst.close()
+        cls.instances.clear()
+
+if __name__ == "__main__":
+    from PyQt5.QtCore import QTimer
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+
+    board = StimulusBoard()
+    marcadores = [board.add_square(x=100 + 130*i, y=200, size=120, color="black", text=f"Marcador {i + 1}")
+                  for i in range(8)]
+
+    def parpadear():
+        for marcador in marcadores:
+            marcador.change_color("white" if marcador.square_color == QColor("black") else "black")
+
+    timer = QTimer()
+    timer.timeout.connect(parpadear)
+    timer.start(500)
+
+    def cerrar():
+        BoardSquare.close_all()
+        board.close()
+        app.quit()
+
+    QTimer.singleShot(4000, cerrar)
+    sys.exit(app.exec_())
@@ -0,0 +1,239 @@
+from PyQt5.QtWidgets import QApplication, QOpenGLWidget
+from PyQt5.QtGui import QColor, QRegion, QSurfaceFormat
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from pylsl import local_clock
+import logging
+import sys
+
+from pyhiamp.utils.timing import DeadlineStats
+
+class StimulusPresenter(QOpenGLWidget):
+    """
+    Presentador de estímulos sincronizado con el refresco de la pantalla.
+
+    Los cambios de los SquareWidget (o BoardSquare de un StimulusBoard) no se aplican al llamar a set(), sino que
+    se acumulan y se aplican todos juntos al comienzo del próximo cuadro. El marcador de MarkersGenerator asociado
+    a esos cambios (ver next() y moveTo()) se envía con el instante del intercambio de buffers (flip) de este
+    widget en el que deberían mostrarse, y no con el instante en que se pidieron.
+
+    El reloj de cuadros es este widget OpenGL con intercambio de buffers sincronizado con el vsync: cada vez que
+    se emite frameSwapped se aplican los cambios pendientes (repintando los cuadrados en el momento) y se pide el
+    cuadro siguiente. Los cambios aplicados tras el flip N se deberían mostrar en el flip N+1, que es el instante
+    con el que se envía su marcador.
+
+    LIMITACIÓN: solo el contenido de este widget se muestra exactamente en ese flip. Los SquareWidget (y el
+    StimulusBoard) son ventanas aparte que el compositor del sistema muestra por su cuenta, por lo que pueden
+    aparecer uno o más cuadros después, con un retraso que depende del sistema operativo, del compositor y del
+    driver. El timestamp del marcador es entonces una cota inferior de la aparición real del estímulo, pero con
+    menos variabilidad que enviarlo al pedir el cambio. Para conocer y corregir el retraso real hay que validarlo
+    con un fotodiodo: con photodiode=True este widget se pinta de blanco en los cuadros que llevan marcador y de
+    negro en el resto, y se puede ubicar al lado de un estímulo y comparar las dos señales del fotodiodo (o la del
+    parche con los marcadores) en el registro.
+
+    Los cuadros perdidos (intervalos entre flips mayores a 1.5 períodos de refresco) se cuentan en stats().
+    """
+
+    # (índice del cuadro, instante del flip en local_clock), emitida después de cada intercambio de buffers
+    flipped = pyqtSignal(int, float)
+
+    def __init__(self, marker_generator=None, x=0, y=0, size=50, refresh_rate=None, photodiode=False,
+                 parent=None, show_on_init=True):
+        """
+        Params:
+        - marker_generator (MarkersGenerator): generador con el que se envían los marcadores de next() y moveTo().
+        - x (int), y (int), size (int): posición y tamaño del widget (parche del fotodiodo).
+        - refresh_rate (float): frecuencia de refresco de la pantalla en Hz. Por defecto, la de la pantalla.
+        - photodiode (bool): pintar el widget de blanco en los cuadros con marcador y de negro en el resto.
+        - parent (QWidget): widget padre.
+        - show_on_init (bool): si se debe mostrar el widget al inicializar.
+        """
+        super().__init__(parent)
+        fmt = self.format()
+        fmt.setSwapInterval(1)  # un flip por vsync
+        fmt.setSwapBehavior(QSurfaceFormat.DoubleBuffer)
+        self.setFormat(fmt)
+        self.setGeometry(x, y, size, size)
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
+
+        self.marker_generator = marker_generator
+        if refresh_rate is None:
+            screen = QApplication.primaryScreen()
+            refresh_rate = screen.refreshRate() if screen is not None else 60.0
+        self.refresh_rate = refresh_rate
+        self.period = 1/refresh_rate
+        self.photodiode = photodiode
+
+        self.pending = {}        # cambios pedidos para el próximo cuadro: {widget: {atributo: valor}}
+        self.pending_markers = []  # marcadores pedidos para el próximo cuadro: (método, args)
+        self.applied_markers = []  # marcadores de los cambios ya aplicados, se envían en el próximo flip
+        self.running = False
+        self.frame = 0
+        self.last_flip = None
+        self.dropped_frames = 0
+        self.frame_stats = DeadlineStats(late_threshold=self.period/2)
+
+        self.frameSwapped.connect(self._on_swapped)
+        # sin contexto OpenGL no hay vsync: los cuadros se pautan con un temporizador (sin garantías de sincronía)
+        self._fallback_timer = QTimer(self)
+        self._fallback_timer.setTimerType(Qt.PreciseTimer)
+        self._fallback_timer.setInterval(max(1, round(self.period*1000)))
+        self._fallback_timer.timeout.connect(self._on_swapped)
+        if show_on_init:
+            self.show()
+
+    def set(self, widget, color=None, text=None, text_color=None, font_size=None):
+        """
+        Pedir un cambio de un SquareWidget para el próximo cuadro. Si se pide más de un cambio del mismo atributo
+        antes del cuadro, se aplica el último.
+
+        Params:
+        - widget (SquareWidget): cuadrado a cambiar.
+        - color (str), text (str), text_color (str), font_size (int): nuevos valores. None deja el actual.
+        """
+        changes = self.pending.setdefault(widget, {})
+        for name, value in (("color", color), ("text", text), ("text_color", text_color),
+                            ("font_size", font_size)):
+            if value is not None:
+                changes[name] = value
+
+    def next(self, mensaje=""):
+        """
+        Avanzar a la siguiente fase del generador de marcadores en el flip en que se muestren los cambios pedidos
+        hasta ahora. El marcador se envía con el instante de ese flip.
+        """
+        self.pending_markers.append(("next", (mensaje,)))
+
+    def moveTo(self, phase_name, mensaje=""):
+        """Como next(), pero moviendo el generador a la fase phase_name (ver MarkersGenerator.moveTo)."""
+        self.pending_markers.append(("moveTo", (phase_name, mensaje)))
+
+    @property
+    def marker_pending(self):
+        """Si hay marcadores pedidos que todavía no se enviaron (sus cambios aún no llegaron a la pantalla)."""
+        return bool(self.pending_markers or self.applied_markers)
+
+    def start(self):
+        """Iniciar el reloj de cuadros."""
+        if self.running:
+            return
+        self.running = True
+        self.frame = 0
+        self.last_flip = None
+        self.dropped_frames = 0
+        self.frame_stats = DeadlineStats(late_threshold=self.period/2)
+        if not self.isVisible():
+            self.show()
+        self.update()
+
+    def stop(self):
+        """
+        Detener el reloj de cuadros. Los cambios y marcadores pendientes se descartan.
+
+        Returns:
+        - Diccionario con las estadísticas de los cuadros (ver stats()).
+        """
+        self.running = False
+        self._fallback_timer.stop()
+        self.pending.clear()
+        self.pending_markers.clear()
+        self.applied_markers.clear()
+        return self.stats()
+
+    def stats(self):
+        """
+        Estadísticas de los cuadros presentados: cuadros, cuadros perdidos, frecuencia de refresco medida y el
+        retraso de cada flip respecto del período nominal (ver DeadlineStats.summary).
+        """
+        summary = self.frame_stats.summary()
+        elapsed = summary["elapsed"]
+        return {"frames": self.frame,
+                "dropped_frames": self.dropped_frames,
+                "refresh_rate": self.refresh_rate,
+                "measured_rate": (self.frame - 1)/elapsed if self.frame > 1 and elapsed > 0 else float("nan"),
+                "mean_lateness_ms": summary["mean_lateness_ms"],
+                "jitter_ms": summary["jitter_ms"],
+                "max_lateness_ms": summary["max_lateness_ms"]}
+
+    def paintGL(self):
+        if not self.photodiode:
+            return
+        gl = self.context().functions()
+        color = QColor("white") if self.applied_markers else QColor("black")
+        gl.glClearColor(color.redF(), color.greenF(), color.blueF(), 1.0)
+        gl.glClear(0x00004000)  # GL_COLOR_BUFFER_BIT
+
+    def _on_swapped(self):
+        """Se llama después de cada flip: enviar los marcadores del cuadro mostrado y preparar el siguiente."""
+        if not self.running:
+            return
+        flip = local_clock()
+
+        # los cambios aplicados tras el flip anterior se acaban de mostrar
+        if self.last_flip is None:
+            self.frame_stats.start_time = flip
+        else:
+            interval = flip - self.last_flip
+            self.frame_stats.add(self.last_flip + self.period, flip)
+            if interval > 1.5*self.period:
+                self.dropped_frames += round(interval/self.period) - 1
+        if self.applied_markers and self.marker_generator is not None:
+            for method, args in self.applied_markers:
+                getattr(self.marker_generator, method)(*args, timestamp=flip)
+        self.applied_markers = []
+        self.last_flip = flip
+        self.frame += 1
+        self.flipped.emit(self.frame, flip)
+
+        # aplicar los cambios pedidos, repintando los cuadrados ahora para que lleguen al próximo flip
+        pending, self.pending = self.pending, {}
+        self.applied_markers, self.pending_markers = self.pending_markers, []
+        boards = {}
+        for widget, changes in pending.items():
+            widget.apply_changes(**changes)
+            board = getattr(widget, "board", None)
+            if board is None:
+                widget.repaint()
+            else:
+                # los cuadrados de un StimulusBoard se repintan juntos, en una sola pasada del tablero
+                boards[board] = boards.get(board, QRegion()).united(widget.rect())
+        for board, region in boards.items():
+            board.repaint(region)
+        if self.isValid():
+            self.update()
+        elif not self._fallback_timer.isActive():
+            logging.warning("Sin contexto OpenGL: los cuadros se pautan con un QTimer y no con el vsync")
+            self._fallback_timer.start()
+
+if __name__ == "__main__":
+    from pyhiamp.gui.SquareWidget import SquareWidget
+    from pyhiamp.markers.MarkersGenerator import MarkersGenerator
+
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv)
+
+    phases = {"rest": {"next": "cue", "duration": 1.0},
+              "cue": {"next": "rest", "duration": 1.0}}
+    markerGen = MarkersGenerator(phases, stream_name="Test_Markers", stream_type="Markers")
+    presenter = StimulusPresenter(markerGen, x=0, y=0, size=60, photodiode=True)
+    squares = [SquareWidget(x=200 + 150*i, y=200, size=120, color="black") for i in range(3)]
+
+    def toggle():
+        color = "white" if markerGen.in_phase != "cue" else "black"
+        for square in squares:
+            presenter.set(square, color=color)
+        presenter.next()
+
+    timer = QTimer()
+    timer.timeout.connect(toggle)
+    timer.start(1000)
+    presenter.start()
+
+    def finish():
+        print(presenter.stop())
+        SquareWidget.close_all()
+        presenter.close()
+        app.quit()
+
+    QTimer.singleShot(10000, finish)
+    sys.exit(app.exec_())
@@ -0,0 +1,62 @@
+import numpy as np
+from pylsl import StreamInlet, cf_string
+
+
+class MarkerDecoder:
+    """
+    Traduce los marcadores recibidos de un flujo de MarkersGenerator a sus etiquetas ("fase" o "fase_mensaje").
+
+    En modo "int32" la tabla código -> etiqueta se lee de la metadata del flujo (desc/markers). En modo "string" los
+    marcadores ya son etiquetas y se devuelven sin cambios, por lo que el mismo código sirve para ambos modos:
+
+        inlet = StreamInlet(info)
+        decoder = MarkerDecoder(inlet)
+        samples, timestamps = inlet.pull_chunk()
+        labels = decoder.decode_chunk(samples)
+    """
+
+    def __init__(self, source, timeout=2.0):
+        """
+        Params:
+        - source: StreamInlet del flujo de marcadores, o su StreamInfo completa (la que devuelve inlet.info(), ya
+        que la información devuelta por la resolución de flujos no incluye la metadata).
+        - timeout (float): segundos de espera para obtener la información de la entrada.
+        """
+        info = source.info(timeout=timeout) if isinstance(source, StreamInlet) else source
+        self.is_string = info.channel_format() == cf_string
+        self.codes = {}
+        marker = info.desc().child("markers").child("marker")
+        while marker.name() == "marker":
+            self.codes[int(marker.child_value("code"))] = marker.child_value("label")
+            marker = marker.next_sibling("marker")
+        # tabla densa para traducir chunks enteros con una sola indexación. Los códigos desconocidos se traducen
+        # como texto, igual que en decode()
+        size = max(self.codes, default=0) + 1
+        self._table = np.array([str(code) for code in range(size)], dtype=object)
+        for code, label in self.codes.items():
+            self._table[code] = label
+
+    def decode(self, marker):
+        """
+        Etiqueta de un marcador (código entero, o texto en modo "string").
+        Los códigos desconocidos (o de flujos sin tabla en su metadata) se devuelven como texto.
+        """
+        if self.is_string:
+            return marker
+        return self.codes.get(int(marker), str(marker))
+
+    def decode_chunk(self, samples):
+        """
+        Etiquetas de un chunk de marcadores (como el que devuelve pull_chunk: una lista de muestras de un canal).
+
+        Returns:
+        - Lista de etiquetas.
+        """
+        if self.is_string:
+            return [sample[0] for sample in samples]
+        codes = np.asarray(samples, dtype=np.int64).reshape(-1)
+        if codes.size == 0:
+            return []
+        if codes.min() < 0 or codes.max() >= self._table.size:
+            return [self.decode(code) for code in codes]
+        return self._table[codes].tolist()
@@ -1,22 +1,64 @@
 import random
 import time
+import threading
 import numpy as np
-import keyboard
 from pylsl import StreamInfo, StreamOutlet, local_clock
 import logging
 
+from pyhiamp.utils.timing import sleep_until, DeadlineStats
+
 logging.basicConfig(level=logging.WARNING)# Configuración básica del logger
 
 def safe_lsl_send(func):
     def wrapper(self, *args, **kwargs):
         try:
             return func(self, *args, **kwargs)
+        except ValueError:
+            # errores de uso (p.ej. un mensaje no declarado en modo "int32"): deben llegar a quien llama
+            raise
         except Exception as e:
             logging.error(f"[Error enviando marcador LSL]: {e}")
     return wrapper
 
+def markerCodes(phases, messages=()):
+    """
+    Tabla de códigos enteros de los marcadores, estable mientras no cambie el orden de phases y messages.
+    La fase i (desde 1, en el orden de phases) tiene el código i, y la fase i con el mensaje j (desde 1, en el orden
+    de messages) el código i*100 + j. Por ejemplo, con phases precue, cue, ... y messages ["izq", "der"], "cue" es 2,
+    "cue_izq" es 201 y "cue_der" es 202. Para que los códigos no se repitan se admiten como máximo 99 fases y 99
+    mensajes.
+
+    Returns:
+    - Diccionario {(fase, mensaje): código}, con mensaje "" para el marcador de la fase sola.
+    """
+    if len(messages) >= 100:
+        raise ValueError("Se admiten como máximo 99 mensajes por fase en el modo de marcadores enteros")
+    if len(phases) >= 100:
+        # la fase 101 tendría el mismo código que la fase 1 con el mensaje 1
+        raise ValueError("Se admiten como máximo 99 fases en el modo de marcadores enteros")
+    codes = {}
+    for i, phase in enumerate(phases, start=1):
+        codes[(phase, "")] = i
+        for j, mensaje in enumerate(messages, start=1):
+            codes[(phase, mensaje)] = i*100 + j
+    assert len(set(codes.values())) == len(codes), "Códigos de marcadores repetidos"
+    return codes
+
 class MarkersGenerator:
-    def __init__(self, phases: dict, stream_name="MarkersGenerator", stream_type="Markers", sourceID=None):
+    def __init__(self, phases: dict, stream_name="MarkersGenerator", stream_type="Markers", sourceID=None,
+                 marker_format="string", messages=None):
+        """
+        Params:
+        - phases (dict): fases, {"fase": {"next": "otra", "duration": 1.0}}.
+        - stream_name (str), stream_type (str), sourceID (str): datos del flujo LSL de marcadores.
+        - marker_format (str): "string" envía cada marcador como texto ("fase" o "fase_mensaje"). "int32" envía un
+        código entero por marcador (ver markerCodes), sin formatear ni transportar strings; la tabla de códigos se
+        escribe en la metadata del flujo (desc/markers) y se puede leer con MarkerDecoder.
+        - messages (list): mensajes que se usarán con next(), update(), moveTo() o start() en modo "int32" (p.ej.
+        las condiciones de una Timeline). En modo "string" no hace falta declararlos.
+        """
+        if marker_format not in ("string", "int32"):
+            raise ValueError(f"Formato de marcadores '{marker_format}' no soportado, usar 'string' o 'int32'")
         self.phases = phases
         self.stream_name = stream_name
         self.stream_type = stream_type
@@ -30,38 +72,82 @@ class MarkersGenerator:
         if sourceID is None:
             sourceID = f"MarkersGenerator_{random.randint(1000, 9999)}"
 
+        self.marker_format = marker_format
+        self.marker_codes = markerCodes(phases, list(messages or [])) if marker_format == "int32" else None
+
         self.outlet_info = StreamInfo(
             name=stream_name,
             type=stream_type,
             nominal_srate=0,
-            channel_format="string",
+            channel_format=marker_format,
             channel_count=1,
             source_id=sourceID)
+        if self.marker_codes is not None:
+            self._addCodesMetadata()
         self.outlet = StreamOutlet(self.outlet_info)
         logging.info(f"Creando un outlet con nombre {stream_name} y tipo {stream_type}")
 
-    def _makeMensaje(self, mensaje):
-        return f"{self.in_phase}_{mensaje}" if mensaje else self.in_phase
+        # modo planificador (ver start)
+        self.subscribers = []
+        self.stats = None
+        self.last_lateness = None
+        self._lock = threading.RLock()
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def _addCodesMetadata(self):
+        """Escribir la tabla código -> marcador en la metadata del flujo."""
+        markers = self.outlet_info.desc().append_child("markers")
+        for (phase, mensaje), code in self.marker_codes.items():
+            marker = markers.append_child("marker")
+            marker.append_child_value("code", str(code))
+            marker.append_child_value("label", f"{phase}_{mensaje}" if mensaje else phase)
+
+    def _makeMensaje(self, mensaje, phase=None):
+        """
+        Marcador a enviar para la fase phase (por defecto, la actual): el texto en modo "string" o su código en modo
+        "int32". Lanza ValueError si el mensaje no fue declarado en messages.
+        """
+        phase = self.in_phase if phase is None else phase
+        if self.marker_codes is not None:
+            try:
+                return self.marker_codes[(phase, mensaje)]
+            except KeyError:
+                raise ValueError(f"El mensaje '{mensaje}' no fue declarado en messages") from None
+        return f"{phase}_{mensaje}" if mensaje else phase
 
-    def _advance_phase(self, mensaje=""):
+    def _advance_phase(self, mensaje="", deadline=None, timestamp=None):
         """
         Función para avanzar a la siguiente fase y enviar un marcador.
+        Si se pasa deadline (el instante nominal de la transición), la próxima transición se calcula desde ese
+        instante y no desde el actual, para que los retrasos no se acumulen fase a fase.
+        Si se pasa timestamp (local_clock), el marcador se envía con ese instante en lugar del actual.
         """
-        now = local_clock()
-        self.accumulated_time += now - self._last_phase_time
-        self._last_phase_time = now
+        with self._lock:
+            # el marcador se arma antes de cambiar el estado, para que un mensaje inválido no avance la fase
+            next_phase = self.phases[self.in_phase]["next"]
+            marker = self._makeMensaje(mensaje, next_phase)
+            now = local_clock() if timestamp is None else timestamp
+            self.accumulated_time += now - self._last_phase_time
+            self._last_phase_time = now
 
-        self.in_phase = self.phases[self.in_phase]["next"]
-        self.next_transition = now + self.phases[self.in_phase]["duration"]
-        self.outlet.push_sample([self._makeMensaje(mensaje)])
+            self.in_phase = next_phase
+            start = now if deadline is None else deadline
+            self.next_transition = start + self.phases[self.in_phase]["duration"]
+            self.outlet.push_sample([marker], now)
+            self._wake_event.set()
+        return marker, now
 
     @safe_lsl_send
-    def next(self, mensaje=""):
+    def next(self, mensaje="", timestamp=None):
         """
         Método para enviar el siguiente marcador dentro de MarkersGenerator.phases
         Usar este método si se necesita enviar marcadores de manera asíncrona.
+        Con timestamp (local_clock) se indica el instante real del evento, p.ej. el cambio de cuadro en el que se
+        mostró el estímulo (ver pyhiamp.gui.StimulusPresenter).
         """
-        self._advance_phase(mensaje)
+        self._advance_phase(mensaje, timestamp=timestamp)
 
     @safe_lsl_send
     def update(self, mensaje=""):
@@ -80,15 +166,20 @@ class MarkersGenerator:
             return True
         return False
     
-    def moveTo(self, phase_name, mensaje=""):
+    def moveTo(self, phase_name, mensaje="", timestamp=None):
         """
         Método para mover manualmente a una fase específica y enviar un marcador.
+        Con timestamp (local_clock) el marcador se envía con ese instante en lugar del actual.
         """
         if phase_name in self.phases:
-            self.in_phase = phase_name
-            self.next_transition = local_clock() + self.phases[phase_name]["duration"]
-            self._last_phase_time = local_clock()
-            self.outlet.push_sample([self._makeMensaje(mensaje)])
+            with self._lock:
+                marker = self._makeMensaje(mensaje, phase_name)
+                now = local_clock() if timestamp is None else timestamp
+                self.in_phase = phase_name
+                self.next_transition = now + self.phases[phase_name]["duration"]
+                self._last_phase_time = now
+                self.outlet.push_sample([marker], now)
+                self._wake_event.set()
         else:
             logging.error(f"Fase '{phase_name}' no encontrada en las fases definidas.")
 
@@ -97,6 +188,157 @@ class MarkersGenerator:
 
     def get_accumulated_time(self):
         return self.accumulated_time
+
+    def subscribe(self, subscriber):
+        """
+        Registrar un suscriptor que se notifica en cada transición del planificador (ver start).
+
+        Params:
+        - subscriber: función que recibe (fase, marcador, timestamp, retraso), o una cola (p.ej. queue.Queue) en la
+        que se pone esa tupla. El marcador es el valor enviado: texto en modo "string" o código en modo "int32". El
+        timestamp es el instante (local_clock) en que se envió el marcador y el retraso, en segundos, es la
+        diferencia con el instante nominal de la transición.
+        Las funciones se ejecutan en el hilo del planificador, por lo que deben ser rápidas. Para actualizar una
+        GUI, conviene usar una cola y leerla desde el hilo de la GUI.
+        """
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Quitar un suscriptor registrado con subscribe."""
+        self.subscribers.remove(subscriber)
+
+    def _notify(self, marker, timestamp, lateness):
+        event = (self.in_phase, marker, timestamp, lateness)
+        for subscriber in list(self.subscribers):
+            try:
+                if hasattr(subscriber, "put"):
+                    subscriber.put(event)
+                else:
+                    subscriber(*event)
+            except Exception as e:
+                logging.error(f"[Error notificando al suscriptor {subscriber}]: {e}")
+
+    def start(self, mensaje="", spin=0.002, late_threshold=0.001, timeline=None, start_time=None):
+        """
+        Iniciar el planificador: un hilo que avanza las fases por su cuenta, sin necesidad de llamar a update()
+        continuamente. El hilo duerme hasta el instante exacto de la próxima transición (ver
+        pyhiamp.utils.timing.sleep_until), envía el marcador y notifica a los suscriptores (ver subscribe).
+        Si todavía no se envió ningún marcador, se envía el primero al iniciar.
+
+        Las transiciones se calculan desde el instante nominal de la anterior, por lo que los retrasos no se
+        acumulan. El retraso de cada transición se registra en self.stats (DeadlineStats) y en self.last_lateness.
+        next() y moveTo() pueden seguir usándose desde otros hilos mientras el planificador está activo.
+
+        Params:
+        - mensaje (str): mensaje que se agrega a cada marcador enviado por el planificador.
+        - spin (float): segundos finales de cada espera que se esperan activamente. Default: 0.002.
+        - late_threshold (float): retraso en segundos a partir del cual una transición se considera tardía.
+        - timeline (Timeline): línea de tiempo precompilada (ver Timeline.compile) a reproducir. En lugar de seguir
+        las fases, se envían sus marcadores en sus instantes de inicio y el planificador se detiene al terminar.
+        - start_time (float): instante (local_clock) de inicio de la línea de tiempo. Por defecto, ahora.
+        """
+        if self.is_running:
+            logging.warning("El planificador de marcadores ya está en ejecución")
+            return
+        # validar los marcadores antes de crear el hilo, para que los errores lleguen a quien llama
+        if timeline is not None:
+            labels = self._timelineMarkers(timeline)
+        else:
+            for phase in self.phases:
+                self._makeMensaje(mensaje, phase)
+        self.stats = DeadlineStats(late_threshold)
+        self.stats.start_time = local_clock()
+        self._stop_event.clear()
+        if timeline is not None:
+            start_time = local_clock() if start_time is None else start_time
+            target, args = self._runTimeline, (timeline, labels, start_time, spin)
+        else:
+            target, args = self._run, (mensaje, spin)
+        self._thread = threading.Thread(target=target, args=args, name="MarkersScheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self, mensaje, spin):
+        if self.next_transition < 0:
+            marker, now = self._advance_phase(mensaje)
+            self._notify(marker, now, 0.0)
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            with self._lock:
+                deadline = self.next_transition
+            now = sleep_until(deadline, clock=local_clock, spin=spin, event=self._wake_event)
+            if self._stop_event.is_set():
+                break
+            with self._lock:
+                # next() o moveTo() cambiaron la fase mientras se esperaba: recalcular el deadline
+                if self.next_transition != deadline or now < deadline:
+                    continue
+                try:
+                    marker, now = self._advance_phase(mensaje, deadline=deadline)
+                except Exception as e:
+                    logging.error(f"[Error enviando marcador LSL]: {e}")
+                    continue
+            lateness = now - deadline
+            self.last_lateness = lateness
+            self.stats.add(deadline, now)
+            logging.debug(f"Marcador {marker} enviado con {lateness*1000:.3f} ms de retraso")
+            self._notify(marker, now, lateness)
+
+    def _timelineMarkers(self, timeline):
+        """
+        Marcadores de todas las transiciones de la línea de tiempo: sus etiquetas en modo "string" o sus códigos en
+        modo "int32". Lanza ValueError si alguna fase o condición de la línea de tiempo no tiene código.
+        """
+        if self.marker_codes is None:
+            return timeline.labels.tolist()
+        missing = [name for name in timeline.phase_names if (name, "") not in self.marker_codes]
+        missing += [name for name in timeline.condition_names
+                    if not any((phase, name) in self.marker_codes for phase in self.phases)]
+        if missing:
+            raise ValueError(f"Fases o condiciones de la línea de tiempo sin código (declararlas en phases o "
+                             f"messages): {missing}")
+        conditions = [""] + timeline.condition_names
+        return [self.marker_codes[(timeline.phase_names[code], conditions[condition + 1])]
+                for code, condition in zip(timeline.codes.tolist(), timeline.conditions.tolist())]
+
+    def _runTimeline(self, timeline, labels, start_time, spin):
+        deadlines = start_time + timeline.onsets
+        for i, deadline in enumerate(deadlines.tolist()):
+            now = sleep_until(deadline, clock=local_clock, spin=spin, event=self._stop_event)
+            if self._stop_event.is_set():
+                break
+            with self._lock:
+                self.accumulated_time += now - self._last_phase_time
+                self._last_phase_time = now
+                self.in_phase = timeline.phase_names[timeline.codes[i]]
+                self.next_transition = deadline + timeline.durations[i]
+                try:
+                    self.outlet.push_sample([labels[i]], now)
+                except Exception as e:
+                    logging.error(f"[Error enviando marcador LSL]: {e}")
+                    continue
+            lateness = now - deadline
+            self.last_lateness = lateness
+            self.stats.add(deadline, now)
+            self._notify(labels[i], now, lateness)
+
+    def stop(self, timeout=1.0):
+        """
+        Detener el planificador y esperar a que termine su hilo.
+
+        Returns:
+        - Diccionario con las estadísticas de retraso de las transiciones (ver DeadlineStats.summary), o None si el
+        planificador nunca se inició.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._wake_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+        return self.stats.summary() if self.stats is not None else None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
     
 if __name__ == "__main__":
     phases = {"precue": {"next": "cue", "duration": 1.0},
@@ -104,17 +346,19 @@ if __name__ == "__main__":
               "go": {"next": "evaluate", "duration": 2.0},
               "evaluate": {"next": "precue", "duration": 0.5},}
     
+    import keyboard
+
     markerGen = MarkersGenerator(phases,stream_name="Test_Markers",stream_type="Markers")
-    markerGen.next()
+    markerGen.subscribe(lambda phase, marker, timestamp, lateness:
+                        logging.debug(f"Marcador enviado: {marker}. Retraso: {lateness*1000:.3f} ms"))
+    # el planificador avanza las fases en su propio hilo, sin ocupar la CPU mientras espera
+    markerGen.start()
     try:
-        while True:
-            if markerGen.update():
-                logging.debug(f"Marcador enviado: {markerGen.in_phase}")
-                logging.debug(f"Tiempo acumulado: {markerGen.get_accumulated_time()}")
-            if keyboard.is_pressed("esc"):
-                logging.info("Escape por usuario. Saliendo...")
-                break
+        keyboard.wait("esc")
+        logging.info("Escape por usuario. Saliendo...")
 
     except KeyboardInterrupt:
         logging.info("Nos fuimos...")
-        pass
\ No newline at end of file
+        pass
+    finally:
+        print(markerGen.stop())
\ No newline at end of file
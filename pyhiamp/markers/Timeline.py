@@ -0,0 +1,177 @@
+import csv
+import json
+
+import numpy as np
+
+
+class Timeline:
+    """
+    Línea de tiempo precompilada de una sesión: instantes de inicio, duraciones, códigos y etiquetas de todas las
+    transiciones de fase, generadas de una sola vez (con operaciones vectorizadas) antes de iniciar la sesión.
+
+    Se construye con Timeline.compile a partir del mismo diccionario de fases que usa MarkersGenerator, más reglas
+    de aleatorización (jitter de duraciones y orden balanceado de condiciones) reproducibles con una semilla.
+    Se reproduce con MarkersGenerator.start(timeline=...) y se exporta con save().
+    """
+
+    def __init__(self, onsets, durations, codes, trials, conditions, phase_names, condition_names=(), seed=None):
+        """
+        Params:
+        - onsets (np.ndarray): inicio de cada transición en segundos, relativo al inicio de la sesión.
+        - durations (np.ndarray): duración de cada fase en segundos.
+        - codes (np.ndarray): código de la fase de cada transición (índice en phase_names).
+        - trials (np.ndarray): número de trial de cada transición (-1 para las fases previas al primer trial).
+        - conditions (np.ndarray): código de la condición de cada transición (índice en condition_names), o -1 si la
+        fase no lleva condición.
+        - phase_names (list): nombres de las fases.
+        - condition_names (list): nombres de las condiciones.
+        - seed: semilla usada para generar la línea de tiempo.
+        """
+        self.onsets = onsets
+        self.durations = durations
+        self.codes = codes
+        self.trials = trials
+        self.conditions = conditions
+        self.phase_names = list(phase_names)
+        self.condition_names = list(condition_names)
+        self.seed = seed
+        self._labels = None
+
+    @classmethod
+    def compile(cls, phases: dict, n_trials: int, trial_phase=None, start_phase=None, conditions=None,
+                condition_phases=(), seed=None):
+        """
+        Compilar la línea de tiempo de una sesión de n_trials trials.
+
+        Un trial es una vuelta completa por la cadena de fases ("next") que empieza en trial_phase. Las fases que
+        se recorren desde start_phase hasta llegar a trial_phase se ejecutan una sola vez al inicio.
+
+        Params:
+        - phases (dict): fases como en MarkersGenerator, {"fase": {"next": "otra", "duration": 1.0}}. Cada fase
+        puede tener además "jitter": (min, max), un tiempo aleatorio uniforme en segundos que se suma a su
+        duración en cada trial.
+        - n_trials (int): cantidad de trials.
+        - trial_phase (str): primera fase de cada trial. Por defecto, la fase siguiente a start_phase.
+        - start_phase (str): primera fase de la sesión. Por defecto, la primera fase de phases.
+        - conditions (list): nombres de las condiciones (p.ej. ["izquierda", "derecha"]). Se asigna una por trial,
+        en orden aleatorio y balanceado (cada condición aparece la misma cantidad de veces, ±1).
+        - condition_phases (list): fases cuyo marcador lleva la condición del trial (p.ej. ["cue"]).
+        - seed: semilla (o np.random.SeedSequence) para reproducir exactamente la misma sesión.
+
+        Returns:
+        - Timeline.
+        """
+        phase_names = list(phases.keys())
+        index = {name: i for i, name in enumerate(phase_names)}
+        start_phase = phase_names[0] if start_phase is None else start_phase
+        trial_phase = phases[start_phase]["next"] if trial_phase is None else trial_phase
+        for name in (start_phase, trial_phase, *condition_phases):
+            if name not in phases:
+                raise ValueError(f"Fase '{name}' no encontrada en las fases definidas.")
+
+        # fases previas al primer trial y ciclo de fases de un trial
+        prologue = [] if start_phase == trial_phase else _walk(phases, start_phase, stop=trial_phase)
+        cycle = _walk(phases, trial_phase, stop=trial_phase)
+        if prologue is None or cycle is None:
+            raise ValueError(f"La cadena de fases no vuelve a la fase '{trial_phase}'")
+
+        rng = np.random.default_rng(seed)
+        n_cycle = len(cycle)
+        cycle_codes = np.array([index[name] for name in cycle], dtype=np.int32)
+
+        # duraciones de todas las fases de todos los trials (trials x fases del ciclo), con jitter
+        durations = np.tile(np.array([phases[name]["duration"] for name in cycle], dtype=np.float64),
+                            (n_trials, 1))
+        for j, name in enumerate(cycle):
+            if "jitter" in phases[name]:
+                low, high = phases[name]["jitter"]
+                durations[:, j] += rng.uniform(low, high, n_trials)
+
+        # condición de cada trial, balanceada y en orden aleatorio
+        trial_conditions = np.full(n_trials, -1, dtype=np.int32)
+        condition_names = list(conditions) if conditions else []
+        if condition_names:
+            balanced = np.resize(np.arange(len(condition_names), dtype=np.int32), n_trials)
+            trial_conditions = rng.permutation(balanced)
+        with_condition = np.isin(cycle_codes, [index[name] for name in condition_phases])
+
+        n_prologue = len(prologue)
+        prologue_durations = np.array([phases[name]["duration"] for name in prologue], dtype=np.float64)
+        all_durations = np.concatenate([prologue_durations, durations.ravel()])
+        onsets = np.zeros(all_durations.size)
+        np.cumsum(all_durations[:-1], out=onsets[1:])
+        codes = np.concatenate([np.array([index[name] for name in prologue], dtype=np.int32),
+                                np.tile(cycle_codes, n_trials)])
+        trials = np.concatenate([np.full(n_prologue, -1, dtype=np.int32),
+                                 np.repeat(np.arange(n_trials, dtype=np.int32), n_cycle)])
+        event_conditions = np.where(with_condition[np.newaxis, :], trial_conditions[:, np.newaxis], -1)
+        conditions_all = np.concatenate([np.full(n_prologue, -1, dtype=np.int32),
+                                         event_conditions.ravel().astype(np.int32)])
+        seed_value = seed.entropy if isinstance(seed, np.random.SeedSequence) else seed
+        return cls(onsets, all_durations, codes, trials, conditions_all, phase_names, condition_names, seed_value)
+
+    def __len__(self):
+        return self.onsets.size
+
+    @property
+    def labels(self):
+        """
+        Marcador de cada transición, con el mismo formato que MarkersGenerator: "fase" o "fase_condición".
+        """
+        if self._labels is None:
+            names = np.array(self.phase_names + [""])
+            suffixes = np.array([f"_{name}" for name in self.condition_names] + [""])
+            self._labels = np.char.add(names[self.codes], suffixes[self.conditions])
+        return self._labels
+
+    @property
+    def total_time(self):
+        """Duración total de la sesión en segundos."""
+        return float(self.onsets[-1] + self.durations[-1]) if len(self) else 0.0
+
+    def to_dict(self):
+        """Diccionario con los arrays de la línea de tiempo y su metadata."""
+        return {"onsets": self.onsets, "durations": self.durations, "codes": self.codes, "trials": self.trials,
+                "conditions": self.conditions, "labels": self.labels, "phase_names": self.phase_names,
+                "condition_names": self.condition_names, "seed": self.seed}
+
+    def save(self, path):
+        """
+        Guardar la línea de tiempo para su análisis posterior.
+        Con extensión .csv se guarda una fila por transición (onset, duration, trial, code, condition, label) y la
+        metadata (nombres de fases y condiciones, semilla) en path + ".json". Con cualquier otra extensión se
+        guarda un archivo .npz con los arrays y la metadata, que se puede leer con Timeline.load.
+        """
+        metadata = {"phase_names": self.phase_names, "condition_names": self.condition_names, "seed": self.seed}
+        if str(path).endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["onset", "duration", "trial", "code", "condition", "label"])
+                writer.writerows(zip(self.onsets.tolist(), self.durations.tolist(), self.trials.tolist(),
+                                     self.codes.tolist(), self.conditions.tolist(), self.labels.tolist()))
+            with open(f"{path}.json", "w") as f:
+                json.dump(metadata, f, indent=2)
+        else:
+            np.savez(path, onsets=self.onsets, durations=self.durations, codes=self.codes, trials=self.trials,
+                     conditions=self.conditions, metadata=json.dumps(metadata))
+
+    @classmethod
+    def load(cls, path):
+        """Leer una línea de tiempo guardada con save() en formato .npz."""
+        data = np.load(path)
+        metadata = json.loads(str(data["metadata"]))
+        return cls(data["onsets"], data["durations"], data["codes"], data["trials"], data["conditions"],
+                   metadata["phase_names"], metadata["condition_names"], metadata["seed"])
+
+
+def _walk(phases, start, stop):
+    """Fases recorridas desde start siguiendo "next" hasta llegar a stop (sin incluirla). None si no llega."""
+    sequence = []
+    phase = start
+    while True:
+        sequence.append(phase)
+        phase = phases[phase]["next"]
+        if phase == stop:
+            return sequence
+        if len(sequence) > len(phases):
+            return None
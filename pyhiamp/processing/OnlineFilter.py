@@ -0,0 +1,131 @@
+"""
+Filtrado en línea (chunk a chunk) de datos multicanal, con el estado de los filtros guardado entre chunks.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+FILTER_CACHE_SIZE = 32  # cantidad de diseños de filtros que se guardan en caché
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def designSOS(srate, band=(1.0, 40.0), notch=50.0, harmonics=1, notch_q=30.0, order=4, detrend=None):
+    """
+    Diseña la cascada de secciones de segundo orden (SOS) de OnlineFilter.
+    Los diseños se guardan en una caché LRU, por lo que varias entradas con los mismos parámetros comparten el
+    mismo diseño.
+
+    Params:
+    - srate (float): frecuencia de muestreo en Hz.
+    - band (tuple): frecuencias de corte (baja, alta) del pasabanda Butterworth en Hz. Si la baja es None se usa
+    un pasabajos y si la alta es None un pasaaltos. Si es None no se aplica.
+    - notch (float): frecuencia de línea a eliminar en Hz (50 o 60). Si es None no se aplica.
+    - harmonics (int): cantidad de armónicos de la frecuencia de línea a eliminar (1 elimina solo la fundamental).
+    - notch_q (float): factor de calidad de los filtros notch.
+    - order (int): orden del pasabanda.
+    - detrend (float): frecuencia de corte en Hz de un pasaaltos de primer orden que elimina el offset de continua
+    y las derivas lentas. Si es None no se aplica.
+
+    Returns:
+    - Array de forma (n_secciones, 6).
+    """
+    nyquist = srate / 2
+    sections = []
+    if detrend is not None:
+        sections.append(signal.butter(1, detrend, btype="highpass", fs=srate, output="sos"))
+    if band is not None:
+        low, high = band
+        if high is not None and high >= nyquist:
+            high = None
+        if low is not None and high is not None:
+            sections.append(signal.butter(order, [low, high], btype="bandpass", fs=srate, output="sos"))
+        elif low is not None:
+            sections.append(signal.butter(order, low, btype="highpass", fs=srate, output="sos"))
+        elif high is not None:
+            sections.append(signal.butter(order, high, btype="lowpass", fs=srate, output="sos"))
+    if notch is not None:
+        for k in range(1, harmonics + 1):
+            if k * notch >= nyquist:
+                break
+            b, a = signal.iirnotch(k * notch, notch_q, fs=srate)
+            sections.append(signal.tf2sos(b, a))
+    if not sections:
+        raise ValueError("OnlineFilter necesita al menos un filtro (band, notch o detrend)")
+    return np.vstack(sections)
+
+
+class OnlineFilter:
+    """
+    Filtro IIR en línea para datos multicanal (muestras x canales), aplicado chunk a chunk.
+
+    Todos los filtros (detrend, pasabanda y notch) se combinan en una única cascada de secciones de segundo orden
+    y se aplican a todos los canales a la vez con una sola llamada a scipy.signal.sosfilt. El estado de cada sección
+    y de cada canal se guarda entre chunks, de modo que filtrar una señal por partes da el mismo resultado que
+    filtrarla completa, sin volver a filtrar ventanas enteras.
+
+    Se puede usar como hook de RingBuffer (process=filtro) o por separado en scripts de procesamiento:
+
+        filtro = OnlineFilter(512, 64, band=(1, 40), notch=50)
+        for chunk in chunks:
+            filtrado = filtro.filter(chunk)
+    """
+
+    def __init__(self, srate: float, n_channels: int, band=(1.0, 40.0), notch=50.0, harmonics=1, notch_q=30.0,
+                 order=4, detrend=None):
+        """
+        Params:
+        - srate (float): frecuencia de muestreo en Hz.
+        - n_channels (int): cantidad de canales.
+        - band, notch, harmonics, notch_q, order, detrend: parámetros de los filtros, ver designSOS.
+        """
+        self.srate = srate
+        self.n_channels = n_channels
+        self.sos = designSOS(srate, None if band is None else tuple(band), notch, harmonics, notch_q, order, detrend)
+        # estado de la cascada para cada sección y canal, forma (n_secciones, 2, n_canales)
+        self.zi = np.zeros((self.sos.shape[0], 2, n_channels))
+        # estado inicial para una entrada escalón unitaria, se usa para arrancar sin transitorio
+        self._zi_step = signal.sosfilt_zi(self.sos)[:, :, np.newaxis]
+        self._initialized = False
+
+    def reset(self):
+        """Descartar el estado de los filtros. El próximo chunk se filtra como si fuera el primero."""
+        self.zi[:] = 0.0
+        self._initialized = False
+
+    def filter(self, chunk):
+        """
+        Filtrar un chunk (muestras x canales) y actualizar el estado de los filtros.
+
+        En el primer chunk el estado se inicializa en el régimen permanente de su primera muestra, para que el offset
+        de continua de los amplificadores no produzca un transitorio largo.
+
+        Params:
+        - chunk (np.ndarray): array de forma (n_muestras, n_channels).
+
+        Returns:
+        - Array filtrado de forma (n_muestras, n_channels) y tipo float64.
+        """
+        chunk = np.asarray(chunk)
+        if chunk.shape[0] == 0:
+            return np.empty(chunk.shape)
+        if not self._initialized:
+            self.zi[:] = self._zi_step * chunk[0]
+            self._initialized = True
+        filtered, self.zi = signal.sosfilt(self.sos, chunk, axis=0, zi=self.zi)
+        return filtered
+
+    def __call__(self, rows):
+        """
+        Filtrar rows en el lugar. Permite pasar el filtro como process de RingBuffer.pull y RingBuffer.write.
+
+        Params:
+        - rows (np.ndarray): vista (muestras x canales) de un array de punto flotante.
+        """
+        rows[:] = self.filter(rows)
+
+    @staticmethod
+    def cache_info():
+        """Estadísticas de la caché de diseños de filtros."""
+        return designSOS.cache_info()
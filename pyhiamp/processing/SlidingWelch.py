@@ -0,0 +1,151 @@
+"""
+Estimación de la densidad espectral de potencia (Welch) que se actualiza de forma incremental con cada chunk.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+
+@lru_cache(maxsize=16)
+def _welchWindow(window, nperseg, srate):
+    """Ventana de los segmentos y escala de la densidad espectral, compartidas entre estimadores."""
+    win = signal.get_window(window, nperseg)
+    win.flags.writeable = False
+    scale = 1.0 / (srate * np.sum(win ** 2))
+    return win, scale
+
+
+class SlidingWelch:
+    """
+    PSD de Welch de los últimos n_segments segmentos (solapados) de todos los canales.
+
+    Cada vez que llegan muestras suficientes para completar segmentos nuevos, solo esos segmentos se enventanan y
+    transforman (una llamada a rfft para todos los segmentos y canales). Los periodogramas se guardan en un buffer
+    circular y su suma se mantiene actualizada, por lo que la PSD nunca recalcula segmentos anteriores.
+    La ventana y su escala se calculan una sola vez por combinación de parámetros.
+
+    Con los mismos parámetros (y detrend igual a "constant" o False), la PSD coincide con la de scipy.signal.welch
+    sobre los mismos segmentos.
+    """
+
+    def __init__(self, srate: float, n_channels: int, nperseg: int = None, overlap: float = 0.5, n_segments: int = 8,
+                 window="hann", detrend="constant"):
+        """
+        Params:
+        - srate (float): frecuencia de muestreo en Hz.
+        - n_channels (int): cantidad de canales.
+        - nperseg (int): muestras por segmento. Por defecto, un segundo de señal (resolución de 1 Hz).
+        - overlap (float): fracción de solapamiento entre segmentos consecutivos (0 a 1).
+        - n_segments (int): cantidad de segmentos que se promedian.
+        - window (str): ventana aplicada a cada segmento (ver scipy.signal.get_window).
+        - detrend (str | bool): "constant" resta la media de cada segmento antes de enventanarlo, como
+        scipy.signal.welch por defecto. False no la resta.
+        """
+        if detrend not in ("constant", False):
+            raise ValueError(f"detrend debe ser 'constant' o False, no {detrend!r}")
+        self.srate = srate
+        self.n_channels = n_channels
+        self.nperseg = int(nperseg) if nperseg else int(round(srate))
+        self.hop = max(1, int(round(self.nperseg * (1 - overlap))))
+        self.n_segments = n_segments
+        self.detrend = detrend
+        self.window, self._scale = _welchWindow(window, self.nperseg, srate)
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1 / srate)
+        n_bins = self.freqs.size
+        # escala de un solo lado: se duplican todos los bins salvo continua y Nyquist
+        self._one_sided = np.full(n_bins, 2.0)
+        self._one_sided[0] = 1.0
+        if self.nperseg % 2 == 0:
+            self._one_sided[-1] = 1.0
+        self._one_sided *= self._scale
+        # periodogramas de los últimos segmentos (segmentos x canales x frecuencias) y su suma
+        self._periodograms = np.zeros((n_segments, n_channels, n_bins))
+        self._sum = np.zeros((n_channels, n_bins))
+        self._next = 0  # posición del próximo periodograma en el buffer circular
+        self.count = 0  # cantidad de periodogramas válidos, como máximo n_segments
+        # muestras que aún no completan un segmento
+        self._buffer = np.zeros((self.nperseg + self.hop, n_channels))
+        self._filled = 0
+
+    def reset(self):
+        """Descartar los segmentos acumulados."""
+        self._periodograms[:] = 0.0
+        self._sum[:] = 0.0
+        self._next = 0
+        self.count = 0
+        self._filled = 0
+
+    def update(self, chunk):
+        """
+        Agregar muestras nuevas (muestras x canales) y actualizar la PSD con los segmentos que se completen.
+
+        Returns:
+        - Cantidad de segmentos nuevos.
+        """
+        chunk = np.asarray(chunk)
+        n = chunk.shape[0]
+        if self._filled + n > self._buffer.shape[0]:
+            buffer = np.zeros((self._filled + n, self.n_channels))
+            buffer[: self._filled] = self._buffer[: self._filled]
+            self._buffer = buffer
+        self._buffer[self._filled : self._filled + n] = chunk
+        self._filled += n
+        if self._filled < self.nperseg:
+            return 0
+
+        n_new = (self._filled - self.nperseg) // self.hop + 1
+        # solo se conservan los últimos n_segments segmentos nuevos
+        skip = max(0, n_new - self.n_segments)
+        # vista (segmentos, canales, nperseg) de los segmentos nuevos, sin copiar
+        segments = sliding_window_view(self._buffer[: self._filled], self.nperseg, axis=0)[skip * self.hop :: self.hop]
+        segments = segments[: n_new - skip]
+        if self.detrend == "constant":
+            segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectrum = np.fft.rfft(segments * self.window, axis=-1)
+        power = spectrum.real ** 2
+        power += spectrum.imag ** 2
+        power *= self._one_sided
+        for p in power:
+            self._sum -= self._periodograms[self._next]
+            self._periodograms[self._next] = p
+            self._sum += p
+            self._next = (self._next + 1) % self.n_segments
+            if self._next == 0:
+                # recalcular la suma en cada vuelta para no acumular errores de redondeo
+                self._sum[:] = self._periodograms.sum(axis=0)
+        self.count = min(self.count + len(power), self.n_segments)
+
+        # conservar las muestras que forman parte del próximo segmento
+        consumed = n_new * self.hop
+        rest = self._filled - consumed
+        self._buffer[:rest] = self._buffer[consumed : self._filled]
+        self._filled = rest
+        return n_new
+
+    def psd(self, channels=None):
+        """
+        PSD promedio de los segmentos acumulados.
+
+        Params:
+        - channels: índices de los canales. Por defecto, todos.
+
+        Returns:
+        - (freqs, psd) con psd de forma (canales, frecuencias), en unidades²/Hz. Si todavía no se completó ningún
+        segmento, psd es cero.
+        """
+        total = self._sum if channels is None else self._sum[channels]
+        return self.freqs, total / max(self.count, 1)
+
+    def band_power(self, low: float, high: float, channels=None):
+        """
+        Potencia de cada canal en la banda [low, high] Hz, integrando la PSD.
+
+        Returns:
+        - Array de forma (canales,).
+        """
+        freqs, psd = self.psd(channels)
+        band = (freqs >= low) & (freqs <= high)
+        return psd[:, band].sum(axis=1) * (freqs[1] - freqs[0])
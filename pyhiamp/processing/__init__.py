@@ -0,0 +1 @@
+from pyhiamp.processing import *
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Interpolación espacial (splines esféricos) para mapas topográficos a partir de las posiciones de los electrodos.
+
+La interpolación es lineal en los valores de los electrodos, por lo que se resume en una matriz
+(píxeles x electrodos) que se calcula una sola vez por montaje y se guarda en disco. Cada cuadro del mapa es
+luego un único producto matriz-vector.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pyhiamp", "topomaps")
+
+
+def readMontage(path):
+    """
+    Leer un montaje en formato .sfp (etiqueta, X, Y, Z separados por tabulaciones o espacios), como
+    tests/ghiamp_montage.sfp.
+
+    Returns:
+    - (labels, positions) con positions de forma (electrodos, 3).
+    """
+    labels, positions = [], []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 4:
+                continue
+            labels.append(fields[0])
+            positions.append([float(v) for v in fields[1:4]])
+    return labels, np.array(positions)
+
+
+def projectPositions(positions):
+    """
+    Proyección azimutal equidistante de las posiciones (normalizadas a la esfera unitaria, Z hacia arriba y Y hacia
+    la nariz) sobre el plano. El vértice queda en (0, 0) y el ecuador en el círculo de radio 1.
+
+    Returns:
+    - Array de forma (electrodos, 2).
+    """
+    pos = positions / np.linalg.norm(positions, axis=1, keepdims=True)
+    theta = np.arccos(np.clip(pos[:, 2], -1, 1))
+    phi = np.arctan2(pos[:, 1], pos[:, 0])
+    r = theta / (np.pi / 2)
+    return np.column_stack([r * np.cos(phi), r * np.sin(phi)])
+
+
+def _legendreSeries(cos_angle, m, n_terms):
+    """Función g(cos) de los splines esféricos (Perrin et al., 1989)."""
+    n = np.arange(1, n_terms + 1)
+    coeffs = np.zeros(n_terms + 1)
+    coeffs[1:] = (2 * n + 1) / (n * (n + 1)) ** m / (4 * np.pi)
+    return np.polynomial.legendre.legval(np.clip(cos_angle, -1, 1), coeffs)
+
+
+def montageHash(labels, positions, resolution, m, n_terms, smoothing):
+    """Clave del montaje y de los parámetros de la interpolación, usada como nombre del archivo en caché."""
+    key = hashlib.sha1()
+    key.update("\n".join(labels).encode())
+    key.update(np.round(np.asarray(positions, dtype=np.float64), 6).tobytes())
+    key.update(repr((resolution, m, n_terms, smoothing)).encode())
+    return key.hexdigest()
+
+
+def interpolationMatrix(labels, positions, resolution=64, m=4, n_terms=50, smoothing=1e-5, cache_dir=CACHE_DIR):
+    """
+    Matriz de interpolación por splines esféricos de los electrodos a una grilla de resolution x resolution píxeles.
+
+    Solo se interpolan los píxeles dentro de la cabeza (el disco que contiene a todos los electrodos proyectados).
+    Si cache_dir no es None, la matriz se guarda en cache_dir con el hash del montaje como nombre y se vuelve a leer
+    en los próximos llamados con el mismo montaje y parámetros.
+
+    Params:
+    - labels (list): nombres de los electrodos, en el mismo orden que positions.
+    - positions (np.ndarray): posiciones X, Y, Z de los electrodos, de forma (electrodos, 3).
+    - resolution (int): cantidad de píxeles por lado del mapa.
+    - m (int): orden de los splines.
+    - n_terms (int): cantidad de términos de la serie de Legendre.
+    - smoothing (float): regularización de la interpolación.
+    - cache_dir (str): carpeta de la caché en disco. Si es None no se usa caché.
+
+    Returns:
+    - (matrix, inside, radius): matrix de forma (píxeles dentro de la cabeza, electrodos) y tipo float32, inside con
+    los índices planos de esos píxeles en la imagen de resolution x resolution, y radius el radio de la cabeza en
+    las coordenadas de projectPositions.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, montageHash(labels, positions, resolution, m, n_terms, smoothing) + ".npz")
+        if os.path.exists(path):
+            cached = np.load(path)
+            return cached["matrix"], cached["inside"], float(cached["radius"])
+
+    pos = positions / np.linalg.norm(positions, axis=1, keepdims=True)
+    n_electrodes = pos.shape[0]
+
+    # sistema de los splines: [G + smoothing*I, 1; 1^T, 0] [C; c0] = [v; 0]
+    system = np.ones((n_electrodes + 1, n_electrodes + 1))
+    system[:n_electrodes, :n_electrodes] = _legendreSeries(pos @ pos.T, m, n_terms)
+    system[:n_electrodes, :n_electrodes] += smoothing * np.eye(n_electrodes)
+    system[-1, -1] = 0.0
+    # solo se necesitan las columnas que multiplican a v
+    weights = np.linalg.pinv(system)[:, :n_electrodes]
+
+    # píxeles de la grilla dentro de la cabeza, llevados de vuelta a la esfera
+    radius = 1.05 * max(1.0, np.max(np.linalg.norm(projectPositions(pos), axis=1)))
+    axis = np.linspace(-radius, radius, resolution)
+    x, y = np.meshgrid(axis, axis, indexing="ij")
+    r = np.hypot(x, y)
+    inside = np.flatnonzero(r.ravel() <= radius)
+    theta = r.ravel()[inside] * (np.pi / 2)
+    phi = np.arctan2(y.ravel()[inside], x.ravel()[inside])
+    grid = np.column_stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)])
+
+    basis = np.ones((inside.size, n_electrodes + 1))
+    basis[:, :n_electrodes] = _legendreSeries(grid @ pos.T, m, n_terms)
+    matrix = (basis @ weights).astype(np.float32)
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # escribir en un archivo temporal y renombrar, para no dejar archivos a medio escribir
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, matrix=matrix, inside=inside, radius=radius)
+        os.replace(tmp_path, path)
+    return matrix, inside, radius
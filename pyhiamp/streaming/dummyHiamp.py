@@ -1,6 +1,10 @@
 import numpy as np
 import pylsl
 import time
+import threading
+import inspect
+from pyhiamp.streaming.generators import SpectralGenerator, ContinuousEEGGenerator, CHANNEL_FORMAT_DTYPES
+from pyhiamp.utils.timing import sleep_until, DeadlineStats
 
 class dummyHiamp:
     """
@@ -8,12 +12,13 @@ class dummyHiamp:
     It is mainly used for testing and development.
     Generates a synthetic EEG signal at a given sampling frequency and a given number of channels.
     The class is designed to be used with the LSL (Lab Streaming Layer) library for streaming data.
-    The generated signal is a random signal with a Gaussian distribution or a sine wave per channel.
+    The generated signal is a continuous 1/f background plus a band-limited component per channel,
+    or, optionally, an independent random spectrum per chunk.
     You can add metadata to the stream and rename channels.
     The class also allows you to scale the signal.
     """
     def __init__(self, name="DummyHIAMP", stream_type="eeg",srate=512, channels_names:list=None,
-                 channel_format="float32", source_id="DummyHiamp2025", channel_locations:list=None):
+                 channel_format="float32", source_id="DummyHiamp2025", channel_locations:list=None, seed=None):
         """
         Constructor for the dummy Hiamp class.
 
@@ -24,6 +29,7 @@ class dummyHiamp:
         - channels: Number of channels. Default is 62.
         - channels_names: List of channel names (e.g., ["Cz"]). Default is None.
         - channels_positions: List of channel positions (e.g., [[-0.0742, 0, 0.0668],]). Default is None.
+        - seed: Seed (int or np.random.SeedSequence) for the signal generators. Default is None (random).
         """
 
         self.scale = 1.0
@@ -35,6 +41,7 @@ class dummyHiamp:
         self.channel_format = channel_format
         self.source_id = source_id
         self.channel_locations = channel_locations
+        self.createGenerators(seed)
 
         self.info = pylsl.StreamInfo(self.name, self.stream_type, self.n_channels, self.srate,
                                      channel_format=channel_format, source_id=self.source_id)
@@ -47,6 +54,20 @@ class dummyHiamp:
     def __call__(self):
         pass
 
+    def createGenerators(self, seed=None):
+        """
+        Create the signal generators of the synthetic sources.
+
+        Parameters:
+        - seed: Seed (int or np.random.SeedSequence) for the signal generators. Default is None (random).
+        """
+        dtype = CHANNEL_FORMAT_DTYPES.get(self.channel_format, np.float32)
+        #independent random streams for each generator, derived from the same seed
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        spectral_seed, continuous_seed = seed_sequence.spawn(2)
+        self.generator = SpectralGenerator(self.n_channels, self.srate, dtype=dtype, seed=spectral_seed)
+        self.continuous_generator = ContinuousEEGGenerator(self.n_channels, self.srate, dtype=dtype, seed=continuous_seed)
+
     def addManufacterMetadata(self):
         self.info.desc().append_child_value("manufacturer", "DummyHiamp")
 
@@ -78,21 +99,87 @@ class dummyHiamp:
         cap.append_child_value("labelscheme", labelscheme)
 
 
-    def startStreaming(self,chunk_size=32, sleep=0.01, total_time = 60, delay=0.0, terminate=True, **kwargs):
+    def startStreaming(self,chunk_size=32, sleep=0.01, total_time = 60, delay=0.0, terminate=True, source="continuous",
+                       pacing="poll", nominal_stamps=False, spin=0.002, late_threshold=0.001, start_time=None, **kwargs):
         """
         Starting the streaming of the dummy Hiamp.
 
         Parameters:
-        - chunk_size (int): Size of the chunk to send. Default is 32 samples.
-        - sleep (float): Delay in seconds. Default is 0.01 seconds.
+        - chunk_size (int): Size of the chunk to send. Default is 32 samples. With pacing="deadline" every chunk has exactly this size.
+        - sleep (float): Delay in seconds. Default is 0.01 seconds. Only used with pacing="poll".
         - total_time (int): Total time in seconds. Default is 60 seconds.
         - delay (float): Delay in seconds. Default is 0.0 seconds. This is used to simulate the delay of the signal e.g., as if coming from some external hardware with known latency.
         - terminate (bool): If True, the stream will be terminated after the total time. Default is True.
-        - kwargs: Additional arguments to pass to the _getSyntheticEEG method.
+        - source (str): Signal source. "continuous" uses _getContinuousEEG (1/f background with filter state carried
+        between chunks) and "spectral" uses _getSyntheticEEG (independent random spectrum per chunk). Default is "continuous".
+        - pacing (str): "poll" sends every sleep seconds the samples accumulated since the last send. "deadline" sends
+        fixed-size chunks at their exact nominal times, see _streamDeadline. Default is "poll".
+        - nominal_stamps (bool): If True, chunks are stamped with the nominal time of their last sample instead of the
+        time of the push. Only used with pacing="deadline". Default is False.
+        - spin (float): Seconds before each deadline that are busy-waited instead of slept. Only used with pacing="deadline". Default is 0.002.
+        - late_threshold (float): Lateness in seconds from which a chunk is counted as late. Only used with pacing="deadline". Default is 0.001.
+        - start_time (float): Time (pylsl.local_clock) of the first sample. The stream waits until then, and all deadlines
+        are referred to it, e.g. to align several amplifiers. Only used with pacing="deadline". Default is None (now).
+        - kwargs: Additional arguments to pass to the method of the selected source.
+
+        Returns:
+        - With pacing="deadline", a dictionary with the achieved rate, jitter and late chunks (also stored in self.stream_stats).
         """
+        getEEG = self._getSource(source)
+        if pacing not in ("poll", "deadline"):
+            raise ValueError(f"Unknown pacing '{pacing}'. Valid pacings are ['poll', 'deadline'].")
+
         total_time=int(total_time)
         self.outlet = pylsl.StreamOutlet(self.info, chunk_size, total_time)
         print(f"Now sending data for {total_time} seconds...")
+        stats = None
+        if pacing == "deadline":
+            stats = self._streamDeadline(getEEG, chunk_size, total_time, delay, nominal_stamps, spin, late_threshold,
+                                         start_time=start_time, **kwargs)
+            self.stream_stats = stats
+            print(f"Finished streaming. Total time: {round(stats['elapsed'],5)} seconds. "
+                  f"Rate: {stats['achieved_rate']:.2f} Hz, jitter: {stats['jitter_ms']:.3f} ms, "
+                  f"late chunks: {stats['late_chunks']}/{stats['chunks']}.")
+        else:
+            self._streamPolling(getEEG, sleep, total_time, delay, **kwargs)
+
+        if terminate:
+            del self.outlet
+            print("Stream outlet deleted.")
+        return stats
+
+    def startBackground(self, chunk_size=32, total_time=None, delay=0.0, terminate=True, source="continuous",
+                        nominal_stamps=False, spin=0.002, late_threshold=0.001, **kwargs):
+        """
+        Starting the streaming of the dummy Hiamp in a background thread.
+        The stream uses deadline pacing (see _streamDeadline) and the method returns immediately.
+
+        Parameters:
+        - total_time (float): Total time in seconds. Default is None, i.e. stream until StreamHandle.stop() is called.
+        - The remaining parameters are the same as in startStreaming.
+
+        Returns:
+        - A started StreamHandle, to pause, resume, update or stop the stream.
+        """
+        handle = StreamHandle(self, chunk_size=chunk_size, total_time=total_time, delay=delay, terminate=terminate,
+                              source=source, nominal_stamps=nominal_stamps, spin=spin,
+                              late_threshold=late_threshold, **kwargs)
+        handle.start()
+        return handle
+
+    def _getSource(self, source):
+        """
+        Return the method that generates the signal of the given source.
+        """
+        sources = {"continuous": self._getContinuousEEG, "spectral": self._getSyntheticEEG}
+        if source not in sources:
+            raise ValueError(f"Unknown source '{source}'. Valid sources are {list(sources)}.")
+        return sources[source]
+
+    def _streamPolling(self, getEEG, sleep, total_time, delay, **kwargs):
+        """
+        Streaming loop that sends the samples accumulated since the last send every sleep seconds.
+        """
         start_time = pylsl.local_clock()
         sent_samples = 0
         while True:
@@ -101,7 +188,7 @@ class dummyHiamp:
             if required_samples > 0:
                 # if the required samples are more than the chunk size, we need to send them in chunks
 
-                mychunk=self._getSyntheticEEG(required_samples, **kwargs)
+                mychunk=getEEG(required_samples, **kwargs)
                 stamp = pylsl.local_clock() - delay
                 # now send it and wait for a bit
                 self.outlet.push_chunk(mychunk, stamp)
@@ -111,18 +198,70 @@ class dummyHiamp:
                 break
 
             time.sleep(sleep)
-        self.chunk = mychunk
+        self.chunk = mychunk.copy() #the generator reuses its buffer, so we keep a copy of the last chunk
 
         print(f"Finished streaming. Total time: {round(elapsed_time,5)} seconds.")
-        if terminate:
-            del self.outlet
-            print("Stream outlet deleted.")
+
+    def _streamDeadline(self, getEEG, chunk_size, total_time, delay, nominal_stamps, spin, late_threshold,
+                        handle=None, start_time=None, **kwargs):
+        """
+        Streaming loop driven by absolute deadlines.
+        The chunk k (samples k*chunk_size to (k+1)*chunk_size-1) is sent at the nominal time of its last sample,
+        start_time + ((k+1)*chunk_size-1)/srate. Deadlines are computed from the start time and the sample index,
+        so errors do not accumulate (no drift). Each chunk is generated before waiting, and the wait sleeps until
+        shortly before the deadline and busy-waits the rest (see utils.timing.sleep_until).
+
+        When a StreamHandle is given, the loop stops as soon as the handle is stopped, waits while it is paused
+        (shifting the following deadlines by the paused time) and reads the generation parameters from the handle
+        before each chunk. total_time can then be None to stream until the handle is stopped.
+        When start_time is given, the loop waits until that time and uses it as the time of the first sample.
+
+        Returns:
+        - Dictionary with the statistics of the stream (see utils.timing.DeadlineStats.summary).
+        """
+        n_chunks = int(total_time*self.srate) // chunk_size if total_time is not None else None
+        stop_event = handle._stop_event if handle is not None else None
+        stats = DeadlineStats(late_threshold)
+        if start_time is None:
+            start_time = pylsl.local_clock()
+        else:
+            sleep_until(start_time, pylsl.local_clock, spin, stop_event)
+        stats.start_time = start_time - 1/self.srate #one sample period before the first sample, so that rate = samples/elapsed
+        mychunk = None
+        k = 0
+        while n_chunks is None or k < n_chunks:
+            if handle is not None:
+                if not handle._resume_event.is_set():
+                    paused_at = pylsl.local_clock()
+                    handle._resume_event.wait()
+                    paused_time = pylsl.local_clock() - paused_at
+                    start_time += paused_time
+                    stats.start_time += paused_time
+                if stop_event.is_set():
+                    break
+                kwargs = handle.params
+
+            mychunk = getEEG(chunk_size, **kwargs)
+            deadline = start_time + ((k+1)*chunk_size - 1)/self.srate
+            now = sleep_until(deadline, pylsl.local_clock, spin, stop_event)
+            if stop_event is not None and stop_event.is_set():
+                break
+            stamp = (deadline if nominal_stamps else now) - delay
+            self.outlet.push_chunk(mychunk, stamp)
+            stats.add(deadline, now, chunk_size)
+            k += 1
+        if mychunk is not None:
+            self.chunk = mychunk.copy()
+
+        return stats.summary()
 
     def _getSyntheticEEG(self, n_samples, peak_freq=14, fwhm=15):
         """
         This function generates a synthetic EEG signal using a Gaussian distribution.
         The signal is generated using the inverse Fourier transform of a random spectrum.
         The spectrum is generated using a Gaussian distribution with a given peak frequency and full width at half maximum (FWHM).
+        All channels are generated at once by the SpectralGenerator, which returns a C-contiguous array with shape
+        (n_samples, n_channels) that is pushed as is to the outlet, without converting it to a list.
 
         Parameters:
         - n_samples: Number of samples to generate.
@@ -130,23 +269,23 @@ class dummyHiamp:
         - fwhm: Full width at half maximum (FWHM) of the Gaussian distribution. Default is 15 Hz.
         """
 
-        hz = np.linspace(0,self.srate,n_samples) #frequencies
-        s = fwhm*(2*np.pi-1)/(4*np.pi) #normalized width
-        x  = hz-peak_freq #shifted frequencies
-        gauss = np.exp((-.5)*(x/s)**2) #gaussian
+        return self.generator.generate(n_samples, peak_freq=peak_freq, fwhm=fwhm, scale=self.scale)
 
-        ##nd.array with shape channels x required_samples
-        data = np.zeros((self.n_channels, n_samples))
-        for ch in range(self.n_channels):
-            #fourier coefficients for the random spectrum
-            fc = np.random.rand(n_samples)*np.exp(2j*np.pi*np.random.rand(n_samples))
-            fc = fc*gauss
-            #inverse fourier transform to get the signal
-            data[ch] = np.fft.ifft(fc).real
-
-        data*=self.scale #scaling the signal
+    def _getContinuousEEG(self, n_samples, peak_freq=14, fwhm=15, band_ratio=1.0):
+        """
+        This function generates the next chunk of a continuous synthetic EEG signal.
+        The signal is a 1/f (pink) background plus a band-limited component centered at peak_freq.
+        Both are obtained by filtering white noise with IIR filters whose state is kept between calls,
+        so the signal has no jumps at the chunk edges and the cost per sample does not depend on the chunk size.
 
-        return data.T.tolist() #returning a list of lists, where each list is a channel with the samples
+        Parameters:
+        - n_samples: Number of samples to generate.
+        - peak_freq: Center frequency of the band-limited component. Default is 14 Hz.
+        - fwhm: Bandwidth of the band-limited component. Default is 15 Hz.
+        - band_ratio: Amplitude of the band-limited component relative to the 1/f background. Default is 1.0.
+        """
+        return self.continuous_generator.generate(n_samples, peak_freq=peak_freq, fwhm=fwhm,
+                                                  scale=self.scale, band_ratio=band_ratio)
 
     def rename_channels(self, mapping:dict):
         """
@@ -167,6 +306,141 @@ class dummyHiamp:
         """
         pass
 
+class StreamHandle:
+    """
+    Handle for streaming a dummyHiamp in a background thread.
+    The outlet is created once when the handle starts and it is kept while the stream is paused or its
+    parameters are updated. stop() wakes the streaming thread immediately and joins it, so many short
+    streams can be started and stopped deterministically (e.g. in tests).
+    The handle can also be used as a context manager, which starts and stops the stream.
+    """
+    def __init__(self, hiamp, chunk_size=32, total_time=None, delay=0.0, terminate=True, source="continuous",
+                 nominal_stamps=False, spin=0.002, late_threshold=0.001, **kwargs):
+        """
+        Constructor for the stream handle.
+
+        Parameters:
+        - hiamp: The dummyHiamp to stream.
+        - total_time (float): Total time in seconds. Default is None, i.e. stream until stop() is called.
+        - terminate (bool): If True, the outlet is deleted when the stream stops. Default is True.
+        - kwargs: Initial parameters for the method of the selected source (e.g., peak_freq, fwhm).
+        - The remaining parameters are the same as in dummyHiamp.startStreaming.
+        """
+        self.hiamp = hiamp
+        self.chunk_size = chunk_size
+        self.total_time = total_time
+        self.delay = delay
+        self.terminate = terminate
+        self.nominal_stamps = nominal_stamps
+        self.spin = spin
+        self.late_threshold = late_threshold
+        self._getEEG = hiamp._getSource(source)
+        self._valid_params = set(inspect.signature(self._getEEG).parameters) - {"n_samples"}
+        self.params = {}
+        self.update(**kwargs)
+
+        self.stats = None
+        self.error = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+
+    def start(self):
+        """
+        Create the outlet and start streaming in a background thread.
+        """
+        if self.is_running:
+            raise RuntimeError("The stream is already running.")
+        self._stop_event.clear()
+        self._resume_event.set()
+        self.stats = None
+        self.error = None
+        if getattr(self.hiamp, "outlet", None) is None:
+            buffer_time = int(self.total_time) if self.total_time is not None else 360
+            self.hiamp.outlet = pylsl.StreamOutlet(self.hiamp.info, self.chunk_size, max(buffer_time, 1))
+        self._thread = threading.Thread(target=self._run, name=f"{self.hiamp.name}_stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.stats = self.hiamp._streamDeadline(self._getEEG, self.chunk_size, self.total_time, self.delay,
+                                                    self.nominal_stamps, self.spin, self.late_threshold, handle=self)
+        except Exception as e:
+            self.error = e
+        finally:
+            if self.terminate:
+                self.hiamp.outlet = None
+
+    def stop(self, timeout=None):
+        """
+        Stop the stream and wait for the background thread to finish.
+
+        Parameters:
+        - timeout (float): Maximum time in seconds to wait for the thread. Default is None (wait until it finishes).
+
+        Returns:
+        - Dictionary with the statistics of the stream (see utils.timing.DeadlineStats.summary).
+        """
+        self._stop_event.set()
+        self._resume_event.set() #wake the thread if it is paused
+        self.join(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.stats
+
+    def join(self, timeout=None):
+        """
+        Wait for the background thread to finish, e.g. when total_time was given.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def pause(self):
+        """
+        Pause the stream. No samples are sent until resume() is called, and the outlet is kept.
+        """
+        self._resume_event.clear()
+
+    def resume(self):
+        """
+        Resume a paused stream. The following deadlines are shifted by the paused time.
+        """
+        self._resume_event.set()
+
+    def update(self, scale=None, **kwargs):
+        """
+        Update the generation parameters while streaming, without restarting the outlet.
+        The new values are used from the next chunk.
+
+        Parameters:
+        - scale (float): New scaling factor of the signal. Default is None (unchanged).
+        - kwargs: New parameters for the method of the selected source (e.g., peak_freq, fwhm, band_ratio).
+        """
+        invalid = set(kwargs) - self._valid_params
+        if invalid:
+            raise ValueError(f"Invalid parameters {sorted(invalid)}. Valid parameters are {sorted(self._valid_params)}.")
+        if scale is not None:
+            self.hiamp.scale = scale
+        self.params = {**self.params, **kwargs} #a new dict, so the streaming thread always reads a consistent one
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_paused(self):
+        return not self._resume_event.is_set()
+
+    def __enter__(self):
+        if not self.is_running:
+            self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
 if __name__ == "__main__":
     # Example usage of the dummy Hiamp class.
     import pandas as pd
@@ -0,0 +1,287 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+
+#numpy dtype for each LSL channel format supported by the generators
+CHANNEL_FORMAT_DTYPES = {"float32": np.float32, "double64": np.float64, "int64": np.int64,
+                         "int32": np.int32, "int16": np.int16, "int8": np.int8}
+
+class SpectralGenerator:
+    """
+    Batched synthetic EEG generator based on random spectra.
+    The spectrum of every channel is a random complex spectrum shaped by a Gaussian with a given
+    peak frequency and full width at half maximum (FWHM). All channels are synthesized at once with
+    a single real inverse FFT and the result is written into a preallocated C-contiguous buffer with
+    shape (n_samples, n_channels), which can be passed directly to StreamOutlet.push_chunk.
+    """
+    def __init__(self, n_channels, srate, dtype=np.float32, seed=None):
+        """
+        Constructor for the spectral generator.
+
+        Parameters:
+        - n_channels: Number of channels.
+        - srate: Sampling frequency.
+        - dtype: Data type of the generated chunks. Default is np.float32.
+        - seed: Seed (or np.random.SeedSequence) for the random generator. Default is None.
+        """
+        self.n_channels = n_channels
+        self.srate = srate
+        self.dtype = np.dtype(dtype)
+        self.rng = np.random.default_rng(seed)
+        self._capacity = 0
+
+    def _allocate(self, n_samples):
+        """
+        Allocate the working buffers for chunks of up to n_samples samples.
+        The buffers are flat, so views of any smaller chunk size are still contiguous.
+        """
+        n_bins = n_samples//2 + 1
+        self._amp = np.empty(self.n_channels*n_bins)
+        self._phase = np.empty(self.n_channels*n_bins)
+        self._spectrum = np.empty(self.n_channels*n_bins, dtype=np.complex128)
+        self._out = np.empty((n_samples, self.n_channels), dtype=self.dtype)
+        self._capacity = n_samples
+
+    def generate(self, n_samples, peak_freq=14, fwhm=15, scale=1.0):
+        """
+        Generate a chunk of synthetic EEG for all channels.
+
+        Parameters:
+        - n_samples: Number of samples to generate. 0 returns an empty chunk, negative values raise ValueError.
+        - peak_freq: Peak frequency of the Gaussian distribution. Default is 14 Hz.
+        - fwhm: Full width at half maximum (FWHM) of the Gaussian distribution. Default is 15 Hz.
+        - scale: Scaling factor applied to the signal. Default is 1.0.
+
+        Returns:
+        - C-contiguous array with shape (n_samples, n_channels). The array is a view of an internal
+        buffer that is overwritten by the next call, so copy it if you need to keep it.
+        """
+        if n_samples < 0:
+            raise ValueError(f"n_samples must be non-negative, not {n_samples}.")
+        if n_samples == 0:
+            return np.empty((0, self.n_channels), dtype=self.dtype)
+        if n_samples > self._capacity:
+            self._allocate(n_samples)
+        n_bins = n_samples//2 + 1
+        size = self.n_channels*n_bins
+        amp = self._amp[:size].reshape(self.n_channels, n_bins)
+        phase = self._phase[:size].reshape(self.n_channels, n_bins)
+        spectrum = self._spectrum[:size].reshape(self.n_channels, n_bins)
+
+        gauss = spectralKernel(n_samples, self.srate, peak_freq, fwhm) #cached between calls
+
+        #fourier coefficients for the random spectrum of all channels
+        self.rng.random(out=amp)
+        self.rng.random(out=phase)
+        phase *= 2*np.pi
+        np.cos(phase, out=spectrum.real)
+        np.sin(phase, out=spectrum.imag)
+        amp *= gauss
+        spectrum *= amp
+
+        #inverse fourier transform of all channels in one call
+        data = np.fft.irfft(spectrum, n=n_samples, axis=-1)
+        out = self._out[:n_samples]
+        np.multiply(data.T, scale, out=out, casting="unsafe") #scaling while copying to the output buffer
+        return out
+
+    @staticmethod
+    def cache_info():
+        """
+        Hits, misses, maximum size and current size of the cache of spectral kernels (see spectralKernel).
+        """
+        return spectralKernel.cache_info()
+
+class ContinuousEEGGenerator:
+    """
+    Stateful synthetic EEG generator for continuous streaming.
+    The signal of every channel is the sum of a 1/f (pink) background, obtained by filtering white
+    noise with an IIR pink-noise filter, and a band-limited component, obtained by filtering another
+    white noise with a Butterworth band-pass centered at a peak frequency.
+    The filter states are carried between calls, so consecutive chunks join without discontinuities
+    and the cost is O(n) per sample whatever the chunk size, which keeps chunks of a few samples cheap.
+    """
+
+    #IIR filter approximating a 1/f spectrum (-3 dB per octave)
+    PINK_B = np.array([0.049922035, -0.095993537, 0.050612699, -0.004408786])
+    PINK_A = np.array([1, -2.494956002, 2.017265875, -0.522189400])
+
+    def __init__(self, n_channels, srate, dtype=np.float32, seed=None, band_order=2, warmup=4096):
+        """
+        Constructor for the continuous generator.
+
+        Parameters:
+        - n_channels: Number of channels.
+        - srate: Sampling frequency.
+        - dtype: Data type of the generated chunks. Default is np.float32.
+        - seed: Seed (or np.random.SeedSequence) for the random generator. Default is None.
+        - band_order: Order of the Butterworth band-pass filter. Default is 2.
+        - warmup: Number of samples filtered (and discarded) to bring the filters to steady state. Default is 4096.
+        """
+        self.n_channels = n_channels
+        self.srate = srate
+        self.dtype = np.dtype(dtype)
+        self.rng = np.random.default_rng(seed)
+        self.band_order = band_order
+        self.warmup = warmup
+        self._capacity = 0
+
+        #pink filter state and the gain that normalizes its output to unit variance
+        self._pink_zi = np.zeros((len(self.PINK_A)-1, n_channels))
+        self._pink_gain = _pinkGain()
+
+        #the band-pass filter is designed on the first call, when peak_freq and fwhm are known
+        self._band = None
+        self._band_zi = None
+
+    def _allocate(self, n_samples):
+        """
+        Allocate the white noise and output buffers for chunks of up to n_samples samples.
+        """
+        self._white = np.empty(2*n_samples*self.n_channels)
+        self._out = np.empty((n_samples, self.n_channels), dtype=self.dtype)
+        self._capacity = n_samples
+
+    def _designBand(self, peak_freq, fwhm):
+        """
+        Design the band-pass filter for the given peak frequency and FWHM.
+        The filter state is kept when the band changes, so the output stays continuous.
+        """
+        sos, gain = bandFilter(self.srate, self.band_order, peak_freq, fwhm) #cached between calls
+        sos = sos.copy() #the cached filter is read-only, and sosfilt needs a writable array
+
+        if self._band_zi is None or self._band_zi.shape[0] != sos.shape[0]:
+            self._band_zi = np.zeros((sos.shape[0], 2, self.n_channels))
+            first_design = True
+        else:
+            first_design = False
+        self._band = (peak_freq, fwhm, sos, gain)
+
+        if first_design and self.warmup > 0:
+            self._filter(self.warmup, band_ratio=1.0)
+
+    def _filter(self, n_samples, band_ratio):
+        """
+        Filter n_samples of new white noise through both filters, updating their states.
+        Returns the sum of both components, normalized to unit variance each.
+        """
+        size = 2*n_samples*self.n_channels
+        if n_samples > self._capacity:
+            white = self.rng.standard_normal(size) #e.g. the warmup, longer than the chunk buffers
+        else:
+            white = self._white[:size]
+            self.rng.standard_normal(out=white)
+        #sample-major layout, so the noise sequence does not depend on how the stream is split in chunks
+        white = white.reshape(n_samples, 2, self.n_channels)
+
+        _, _, sos, band_gain = self._band
+        pink, self._pink_zi = signal.lfilter(self.PINK_B, self.PINK_A, white[:, 0], axis=0, zi=self._pink_zi)
+        band, self._band_zi = signal.sosfilt(sos, white[:, 1], axis=0, zi=self._band_zi)
+        pink *= self._pink_gain
+        band *= band_gain*band_ratio
+        pink += band
+        return pink
+
+    @staticmethod
+    def cache_info():
+        """
+        Hits, misses, maximum size and current size of the cache of band-pass filters (see bandFilter).
+        """
+        return bandFilter.cache_info()
+
+    def generate(self, n_samples, peak_freq=14, fwhm=15, scale=1.0, band_ratio=1.0):
+        """
+        Generate the next chunk of synthetic EEG for all channels.
+
+        Parameters:
+        - n_samples: Number of samples to generate. 0 returns an empty chunk, negative values raise ValueError.
+        - peak_freq: Center frequency of the band-limited component. Default is 14 Hz.
+        - fwhm: Bandwidth of the band-limited component. Default is 15 Hz.
+        - scale: Scaling factor applied to the signal. Default is 1.0.
+        - band_ratio: Amplitude of the band-limited component relative to the 1/f background. Default is 1.0.
+
+        Returns:
+        - C-contiguous array with shape (n_samples, n_channels). The array is a view of an internal
+        buffer that is overwritten by the next call, so copy it if you need to keep it.
+        """
+        if n_samples < 0:
+            raise ValueError(f"n_samples must be non-negative, not {n_samples}.")
+        if n_samples == 0:
+            return np.empty((0, self.n_channels), dtype=self.dtype)
+        if self._band is None or self._band[:2] != (peak_freq, fwhm):
+            self._designBand(peak_freq, fwhm)
+        if n_samples > self._capacity:
+            self._allocate(n_samples)
+
+        data = self._filter(n_samples, band_ratio)
+        data *= scale
+        out = self._out[:n_samples]
+        np.copyto(out, data, casting="unsafe")
+        return out
+
+#maximum number of spectral kernels and band-pass filters kept in cache
+KERNEL_CACHE_SIZE = 64
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def spectralKernel(n_samples, srate, peak_freq, fwhm):
+    """
+    Gaussian spectral shaping kernel used by SpectralGenerator, over the rfft frequencies of n_samples samples.
+    The kernels are kept in a bounded LRU cache, so with fixed chunk sizes they are computed only once.
+    The returned array is read-only because it is shared between calls and generators.
+
+    Parameters:
+    - n_samples: Number of samples of the chunk.
+    - srate: Sampling frequency.
+    - peak_freq: Peak frequency of the Gaussian distribution.
+    - fwhm: Full width at half maximum (FWHM) of the Gaussian distribution.
+    """
+    hz = np.fft.rfftfreq(n_samples, d=1/srate) #frequencies
+    s = fwhm*(2*np.pi-1)/(4*np.pi) #normalized width
+    #gaussian. The 0.5 factor compensates that irfft sums each bin with its complex conjugate,
+    #so the amplitude matches the real part of the full complex ifft
+    gauss = np.exp((-.5)*((hz-peak_freq)/s)**2)*0.5
+    gauss.flags.writeable = False
+    return gauss
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def bandFilter(srate, order, peak_freq, fwhm):
+    """
+    Butterworth band-pass filter (second-order sections) used by ContinuousEEGGenerator, and the gain that
+    normalizes its output to unit variance. If the band reaches 0 Hz, a low-pass filter is used instead, and if it
+    reaches the Nyquist frequency, a high-pass filter. A band entirely above the Nyquist frequency raises ValueError.
+    The filters are kept in a bounded LRU cache, so switching between parameters does not redesign them.
+    The returned sections are read-only because they are shared between calls and generators.
+    """
+    nyquist = srate/2
+    if fwhm <= 0:
+        raise ValueError(f"fwhm must be positive, not {fwhm}.")
+    low = max(peak_freq - fwhm/2, 0.0)
+    high = min(peak_freq + fwhm/2, 0.99*nyquist)
+    if low >= high:
+        raise ValueError(f"The band of peak_freq={peak_freq} Hz and fwhm={fwhm} Hz is above the Nyquist frequency "
+                         f"({nyquist} Hz) of srate={srate} Hz.")
+    if low > 0 and high < peak_freq + fwhm/2:
+        sos = signal.butter(order, low, btype="highpass", fs=srate, output="sos")
+    elif low > 0:
+        sos = signal.butter(order, [low, high], btype="bandpass", fs=srate, output="sos")
+    else:
+        sos = signal.butter(order, high, btype="lowpass", fs=srate, output="sos")
+    gain = 1/_impulse_norm(lambda x: signal.sosfilt(sos, x))
+    sos.flags.writeable = False
+    return sos, gain
+
+@lru_cache(maxsize=1)
+def _pinkGain():
+    """
+    Gain that normalizes the output of the pink-noise filter to unit variance.
+    """
+    return 1/_impulse_norm(lambda x: signal.lfilter(ContinuousEEGGenerator.PINK_B, ContinuousEEGGenerator.PINK_A, x))
+
+def _impulse_norm(filt, n_samples=2**15):
+    """
+    L2 norm of the impulse response of a filter, i.e. the standard deviation of its output for unit white noise.
+    """
+    impulse = np.zeros(n_samples)
+    impulse[0] = 1.0
+    return np.sqrt(np.sum(filt(impulse)**2))
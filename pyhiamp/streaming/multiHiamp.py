@@ -0,0 +1,101 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pylsl
+
+from pyhiamp.streaming.dummyHiamp import dummyHiamp
+
+def _available_cpus():
+    """
+    Return the sorted list of CPUs this process can run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _runAmplifier(index, cpu, seed, start_time, hiamp_kwargs, stream_kwargs):
+    """
+    Worker function that emulates one amplifier in its own process.
+    The process is pinned to the given CPU (when the platform allows it) and streams with deadline pacing
+    from the shared start_time.
+
+    Returns:
+    - Tuple with the amplifier index and the statistics of its stream.
+    """
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})
+    scale = hiamp_kwargs.pop("scale", 1.0)
+    hiamp = dummyHiamp(seed=seed, **hiamp_kwargs)
+    hiamp.scale = scale
+    stats = hiamp.startStreaming(pacing="deadline", start_time=start_time, **stream_kwargs)
+    return index, stats
+
+def launchAmplifiers(n_amplifiers, channels_names:list, srate=512, total_time=60, chunk_size=32, name="DummyHiamp",
+                     source_id="DummyHiamp2025", channel_locations:list=None, scale=1.0, seed=None, pin_cpus=True,
+                     startup_time=3.0, **kwargs):
+    """
+    Emulate several g.HIamp amplifiers (or 64-channel modules) at once, each one in its own process and
+    exposed as its own LSL stream named "{name}_{i}" with source_id "{source_id}_{i}" (i from 1 to n_amplifiers).
+
+    Every amplifier gets an independent random stream spawned from the same seed, and all of them share the same
+    start time (pylsl.local_clock is monotonic and shared by all the processes of the machine), so their sample
+    clocks are aligned. When pin_cpus is True, each process is pinned to a different core (Linux only).
+
+    Parameters:
+    - n_amplifiers: Number of amplifiers to emulate.
+    - channels_names: List of channel names of each amplifier.
+    - srate: Sampling frequency. Default is 512 Hz.
+    - total_time: Total time in seconds. Default is 60 seconds.
+    - chunk_size: Size of the chunks to send. Default is 32 samples.
+    - name: Base name of the streams. Default is "DummyHiamp".
+    - source_id: Base source id of the streams. Default is "DummyHiamp2025".
+    - channel_locations: List of channel positions. Default is None.
+    - scale: Scaling factor of the signal. Default is 1.0.
+    - seed: Seed for the random streams of all the amplifiers. Default is None (random).
+    - pin_cpus: If True, pin each amplifier to its own core. Default is True.
+    - startup_time: Seconds from now to the shared start time, to let all the processes start. Default is 3.0 seconds.
+    - kwargs: Additional arguments for dummyHiamp.startStreaming (e.g., source, nominal_stamps, peak_freq, fwhm).
+
+    Returns:
+    - Dictionary with the statistics of each amplifier ("amplifiers") and the aggregate throughput in samples and
+    channel-samples per second.
+    """
+    cpus = _available_cpus()
+    if pin_cpus and n_amplifiers > len(cpus):
+        print(f"Warning: {n_amplifiers} amplifiers but only {len(cpus)} cores available. Cores will be shared.")
+    seeds = np.random.SeedSequence(seed).spawn(n_amplifiers)
+    stream_kwargs = dict(chunk_size=chunk_size, total_time=total_time, **kwargs)
+
+    start_time = pylsl.local_clock() + startup_time
+    #spawn instead of fork, so the workers do not inherit the LSL threads of the parent process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=n_amplifiers, mp_context=context) as executor:
+        futures = []
+        for i in range(n_amplifiers):
+            hiamp_kwargs = dict(name=f"{name}_{i+1}", srate=srate, channels_names=channels_names,
+                                source_id=f"{source_id}_{i+1}", channel_locations=channel_locations, scale=scale)
+            cpu = cpus[i % len(cpus)] if pin_cpus else None
+            futures.append(executor.submit(_runAmplifier, i, cpu, seeds[i], start_time, hiamp_kwargs, stream_kwargs))
+        results = dict(future.result() for future in futures)
+
+    amplifiers = [results[i] for i in range(n_amplifiers)]
+    samples = sum(stats["samples"] for stats in amplifiers)
+    elapsed = max(stats["elapsed"] for stats in amplifiers)
+    summary = {"amplifiers": amplifiers,
+               "samples": samples,
+               "elapsed": elapsed,
+               "samples_per_second": samples/elapsed if elapsed > 0 else float("nan"),
+               "channel_samples_per_second": samples*len(channels_names)/elapsed if elapsed > 0 else float("nan"),
+               "late_chunks": sum(stats["late_chunks"] for stats in amplifiers)}
+
+    print(f"{n_amplifiers} amplifiers x {len(channels_names)} channels. "
+          f"Throughput: {summary['samples_per_second']:.1f} samples/s, "
+          f"{summary['channel_samples_per_second']:.0f} channel-samples/s, late chunks: {summary['late_chunks']}.")
+    return summary
+
+if __name__ == "__main__":
+    # Example usage: four 64-channel amplifiers at 4800 Hz (256 channels in total).
+    channels_names = [f"CH{i+1}" for i in range(64)]
+    launchAmplifiers(4, channels_names, srate=4800, total_time=10, chunk_size=48, seed=2025, scale=30)
@@ -0,0 +1,276 @@
+import os
+import json
+import mmap
+
+import numpy as np
+import pylsl
+
+from pyhiamp.streaming.dummyHiamp import dummyHiamp
+from pyhiamp.streaming.generators import CHANNEL_FORMAT_DTYPES
+from pyhiamp.utils.timing import sleep_until, DeadlineStats
+
+class replayHiamp(dummyHiamp):
+    """
+    Class for replaying a recorded session through LSL.
+    It is mainly used for regression testing of the processing pipeline with real data.
+    The signal is read from a NPY file or a raw binary dump with shape (n_samples, n_channels) through memory
+    mapping, so only the chunk being sent is read from disk and multi-hour recordings stream with constant memory.
+    The session metadata (channels, cap, manufacturer and markers) is read from a JSON sidecar file
+    ("<data file>.json", see xdfToSession) and republished with the signal and marker streams.
+    Playback can be in real time, N times faster or as fast as possible.
+    """
+    def __init__(self, data_path, metadata:dict=None, name=None, source_id=None):
+        """
+        Constructor for the replay Hiamp class.
+
+        Parameters:
+        - data_path: Path of the recorded signal. ".npy" files are memory mapped with np.load, any other file is
+        read as a raw binary dump with the "dtype" and "n_channels" of the metadata.
+        - metadata: Dictionary with the session metadata. Default is None, i.e. read it from "<data_path>.json".
+        The keys are "srate" (required), "name", "type", "source_id", "channel_format", "manufacturer",
+        "cap" (dict with "name", "size" and "labelscheme"), "channels" (list of dicts with "label", "unit", "type"
+        and "location" [X, Y, Z]), "dtype" and "n_channels" (raw binary dumps only), and "markers" (dict with "name",
+        "type" and "events", a list of [time in seconds from the first sample, label]).
+        - name: Name of the signal stream. Default is None, i.e. the name in the metadata.
+        - source_id: Source id of the signal stream. Default is None, i.e. the source id in the metadata.
+        """
+        if metadata is None:
+            with open(f"{data_path}.json", "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        self.metadata = metadata
+        self.data_path = data_path
+
+        if data_path.endswith(".npy"):
+            self.data = np.load(data_path, mmap_mode="r")
+        else:
+            self.data = np.memmap(data_path, dtype=metadata.get("dtype", "float32"), mode="r")
+            self.data = self.data.reshape(-1, int(metadata["n_channels"]))
+        if self.data.ndim != 2:
+            raise ValueError(f"The data must have shape (n_samples, n_channels), not {self.data.shape}.")
+        self.n_samples = self.data.shape[0]
+
+        channels = metadata.get("channels") or [{"label": f"CH{i+1}"} for i in range(self.data.shape[1])]
+        if len(channels) != self.data.shape[1]:
+            raise ValueError(f"The metadata has {len(channels)} channels but the data has {self.data.shape[1]}.")
+        channels_names = [ch["label"] for ch in channels]
+        channel_locations = None
+        if all("location" in ch for ch in channels):
+            channel_locations = [ch["location"] for ch in channels]
+
+        super().__init__(name=name or metadata.get("name", "ReplayHIAMP"), stream_type=metadata.get("type", "eeg"),
+                         srate=metadata["srate"], channels_names=channels_names,
+                         channel_format=metadata.get("channel_format", "float32"),
+                         source_id=source_id or metadata.get("source_id", "ReplayHiamp2025"),
+                         channel_locations=channel_locations)
+
+        markers = metadata.get("markers")
+        self.marker_info = None
+        self.marker_events = []
+        if markers:
+            self.marker_events = sorted((float(t), str(label)) for t, label in markers.get("events", []))
+            self.marker_info = pylsl.StreamInfo(markers.get("name", f"{self.name}_Markers"), markers.get("type", "Markers"),
+                                                1, pylsl.IRREGULAR_RATE, channel_format="string",
+                                                source_id=f"{self.source_id}_markers")
+
+    def addManufacterMetadata(self):
+        self.info.desc().append_child_value("manufacturer", self.metadata.get("manufacturer", "DummyHiamp"))
+
+    def createGenerators(self, seed=None):
+        """
+        The replay sends the recorded signal, so the synthetic generators are not created.
+        """
+        self.generator = None
+        self.continuous_generator = None
+
+    def addChannelMetadata(self, unit="microvolts", scaling_factor=1.0, type=None):
+        """
+        Add the metadata of every channel as recorded: label, unit, type and location.
+        unit and type are only used for the channels whose metadata does not have them.
+        """
+        channels = self.metadata.get("channels") or [{} for _ in self.channels_names]
+        type = type or self.stream_type
+        chns = self.info.desc().append_child("channels")
+        for label, channel in zip(self.channels_names, channels):
+            ch = chns.append_child("channel")
+            ch.append_child_value("label", label)
+            ch.append_child_value("unit", channel.get("unit") or unit)
+            ch.append_child_value("type", channel.get("type") or type)
+            ch.append_child_value("scaling_factor", str(scaling_factor))
+            if channel.get("location") is not None:
+                loc = ch.append_child("location")
+                for ax_str, pos in zip(["X", "Y", "Z"], channel["location"]):
+                    loc.append_child_value(ax_str, str(pos))
+
+    def addCapMetadata(self, name=None, size=None, labelscheme=None):
+        cap = self.metadata.get("cap", {})
+        super().addCapMetadata(name=name or cap.get("name", "DummyCap"), size=size or cap.get("size", "M"),
+                               labelscheme=labelscheme or cap.get("labelscheme", "10-20"))
+
+    def startReplay(self, chunk_size=32, speed=1.0, start=0.0, duration=None, delay=0.0, terminate=True, spin=0.002,
+                    late_threshold=0.001, release_every=10.0, max_buffered=360):
+        """
+        Replay the recorded session.
+        Chunks of chunk_size samples are sent at the nominal time of their last sample divided by the speed,
+        using deadline pacing (see dummyHiamp._streamDeadline), and stamped with that time. Markers are sent
+        with the first chunk that reaches their time.
+
+        Parameters:
+        - chunk_size (int): Size of the chunk to send. Default is 32 samples.
+        - speed (float): Playback speed. 1.0 is real time, 4.0 four times faster, and None or 0 as fast as
+        possible (chunks are stamped with the push time). Default is 1.0.
+        An outlet only keeps max_buffered seconds of data for each consumer and drops the oldest samples beyond
+        that. So as fast as possible is limited to max_buffered seconds of recording ahead of real time: a
+        consumer that keeps up with real time gets every sample, while a slower one can still lose samples.
+        - start (float): Time in seconds of the recording where the replay starts. Default is 0.0.
+        - duration (float): Seconds of the recording to replay. Default is None, i.e. until the end.
+        - delay (float): Delay in seconds subtracted from the timestamps. Default is 0.0 seconds.
+        - terminate (bool): If True, the outlets are deleted after the replay. Default is True.
+        - spin (float): Seconds before each deadline that are busy-waited instead of slept. Default is 0.002.
+        - late_threshold (float): Lateness in seconds from which a chunk is counted as late. Default is 0.001.
+        - release_every (float): Seconds of recording after which the pages already sent are released from memory.
+        Default is 10.0 seconds.
+        - max_buffered (int): Seconds of data the signal outlet keeps for each consumer (see pylsl.StreamOutlet).
+        Default is 360 seconds.
+
+        Returns:
+        - Dictionary with the statistics of the replay (see utils.timing.DeadlineStats.summary).
+        """
+        first = int(start*self.srate)
+        last = self.n_samples if duration is None else min(self.n_samples, first + int(duration*self.srate))
+        paced = bool(speed)
+        period = 1/(self.srate*speed) if paced else 0.0
+        release_samples = max(int(release_every*self.srate), chunk_size)
+        dtype = CHANNEL_FORMAT_DTYPES.get(self.channel_format, np.float32)
+
+        #samples that can be pushed ahead of real time as fast as possible without overflowing the outlet buffer
+        lead = int(max_buffered*self.srate)
+        self.outlet = pylsl.StreamOutlet(self.info, chunk_size, max_buffered)
+        self.marker_outlet = pylsl.StreamOutlet(self.marker_info) if self.marker_info is not None else None
+        events = [(t, label) for t, label in self.marker_events if first/self.srate <= t < last/self.srate]
+        next_event = 0
+
+        print(f"Now replaying {(last - first)/self.srate:.2f} seconds of {self.data_path} at speed {speed if paced else 'max'}...")
+        stats = DeadlineStats(late_threshold)
+        start_time = pylsl.local_clock()
+        stats.start_time = start_time - period
+        released = first
+        for ix in range(first, last, chunk_size):
+            mychunk = np.ascontiguousarray(self.data[ix:min(ix + chunk_size, last)], dtype=dtype)
+            n = mychunk.shape[0]
+            if paced:
+                deadline = start_time + (ix + n - 1 - first)*period
+                now = sleep_until(deadline, pylsl.local_clock, spin)
+            else:
+                now = sleep_until(start_time + max(0, ix + n - first - lead)/self.srate, pylsl.local_clock, spin)
+            self.outlet.push_chunk(mychunk, (deadline if paced else now) - delay)
+            stats.add(deadline if paced else now, now, n)
+
+            #markers up to the last sample of this chunk, stamped at their own time in the replay clock
+            while next_event < len(events) and events[next_event][0] < (ix + n)/self.srate:
+                t, label = events[next_event]
+                if self.marker_outlet is not None:
+                    stamp = start_time + (t - first/self.srate)/speed if paced else now
+                    self.marker_outlet.push_sample([label], stamp - delay)
+                next_event += 1
+
+            if ix + n - released >= release_samples:
+                self._release(ix + n)
+                released = ix + n
+
+        summary = stats.summary()
+        self.stream_stats = summary
+        print(f"Finished replay. Total time: {round(summary['elapsed'],5)} seconds. "
+              f"Rate: {summary['achieved_rate']:.2f} Hz, late chunks: {summary['late_chunks']}/{summary['chunks']}.")
+        if terminate:
+            del self.outlet
+            self.marker_outlet = None
+            print("Stream outlets deleted.")
+        return summary
+
+    def _release(self, upto):
+        """
+        Release from memory the pages of the mapped file before the sample upto, so the resident memory
+        does not grow with the length of the recording (only where mmap.madvise is available, e.g. Linux).
+        """
+        mapped = getattr(self.data, "_mmap", None)
+        if mapped is None or not hasattr(mapped, "madvise") or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        #the mapping starts at the allocation boundary before the array offset
+        array_start = self.data.offset % mmap.ALLOCATIONGRANULARITY
+        length = (array_start + upto*self.data.strides[0]) // mmap.PAGESIZE * mmap.PAGESIZE
+        if length > 0:
+            mapped.madvise(mmap.MADV_DONTNEED, 0, length)
+
+def xdfToSession(xdf_path, out_dir, stream_name=None):
+    """
+    Convert a XDF recording to a session that replayHiamp can memory map.
+    The signal stream is saved as "<out_dir>/<stream name>.npy" with shape (n_samples, n_channels) and its
+    metadata, including the first marker stream found, as "<out_dir>/<stream name>.npy.json".
+    The XDF file is read once with pyxdf, so this conversion needs as much memory as the recording.
+
+    Parameters:
+    - xdf_path: Path of the XDF file.
+    - out_dir: Directory where the session files are saved.
+    - stream_name: Name of the signal stream to convert. Default is None, i.e. the first stream with a regular rate.
+
+    Returns:
+    - Path of the NPY file, to be passed to replayHiamp.
+    """
+    try:
+        import pyxdf
+    except ImportError:
+        raise ImportError("pyxdf is needed to read XDF files. Install it with 'pip install pyxdf'.")
+
+    streams, _ = pyxdf.load_xdf(xdf_path)
+    signals = [s for s in streams if float(s["info"]["nominal_srate"][0]) > 0
+               and (stream_name is None or s["info"]["name"][0] == stream_name)]
+    if not signals:
+        raise ValueError(f"No signal stream{' named ' + stream_name if stream_name else ''} found in {xdf_path}.")
+    eeg = signals[0]
+    info = eeg["info"]
+    markers = next((s for s in streams if s["info"]["type"][0] == "Markers"), None)
+
+    def _first(node, key, default=None):
+        if not node or key not in node[0] or not node[0][key]:
+            return default
+        return node[0][key][0]
+
+    desc = info["desc"][0] if info.get("desc") and info["desc"][0] else {}
+    channels = []
+    channels_node = desc.get("channels")
+    for ch in (channels_node[0].get("channel", []) if channels_node else []):
+        channel = {"label": _first([ch], "label"), "unit": _first([ch], "unit", "microvolts"),
+                   "type": _first([ch], "type", info["type"][0])}
+        location = ch.get("location")
+        if location:
+            channel["location"] = [float(_first(location, ax, 0.0)) for ax in ("X", "Y", "Z")]
+        channels.append(channel)
+
+    metadata = {"name": info["name"][0],
+                "type": info["type"][0],
+                "srate": float(info["nominal_srate"][0]),
+                "channel_format": info["channel_format"][0],
+                "source_id": _first([info], "source_id", "ReplayHiamp2025"),
+                "manufacturer": _first([desc], "manufacturer", "DummyHiamp"),
+                "cap": {key: _first(desc.get("cap"), key, default)
+                        for key, default in (("name", "DummyCap"), ("size", "M"), ("labelscheme", "10-20"))},
+                "channels": channels or None}
+    if markers is not None and len(markers["time_stamps"]):
+        t0 = eeg["time_stamps"][0]
+        metadata["markers"] = {"name": markers["info"]["name"][0], "type": "Markers",
+                               "events": [[float(t - t0), str(m[0])] for t, m in zip(markers["time_stamps"], markers["time_series"])]}
+
+    os.makedirs(out_dir, exist_ok=True)
+    npy_path = os.path.join(out_dir, f"{metadata['name']}.npy")
+    np.save(npy_path, np.ascontiguousarray(eeg["time_series"]))
+    with open(f"{npy_path}.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    return npy_path
+
+if __name__ == "__main__":
+    # Example usage: replay a converted XDF session four times faster than real time.
+    import sys
+    path = sys.argv[1]
+    npy_path = xdfToSession(path, os.path.dirname(path) or ".") if path.endswith(".xdf") else path
+    replay = replayHiamp(npy_path)
+    replay.startReplay(chunk_size=64, speed=4.0)
@@ -1,14 +1,165 @@
+import math
+import threading
 import time
 from functools import wraps
 
+import numpy as np
+
+class P2Quantile:
+    """
+    Estimación en línea de un percentil con el algoritmo P² (Jain y Chlamtac, 1985).
+    Usa memoria constante (5 marcadores) sin guardar los valores observados.
+    """
+    def __init__(self, percentile):
+        """
+        Params:
+            percentile (float): Percentil a estimar, entre 0 y 100.
+        """
+        self.percentile = percentile
+        p = percentile/100
+        self._q = []                                  # alturas de los marcadores
+        self._n = [0, 1, 2, 3, 4]                     # posiciones de los marcadores
+        self._desired = [0, 2*p, 4*p, 2 + 2*p, 4]     # posiciones deseadas
+        self._increments = [0, p/2, p, (1 + p)/2, 1]
+
+    def add(self, x):
+        q, n = self._q, self._n
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        # celda en la que cae x, ajustando los extremos
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        # ajustar los marcadores intermedios que se alejaron de su posición deseada
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d/(n[i + 1] - n[i - 1])*(
+                    (n[i] - n[i - 1] + d)*(q[i + 1] - q[i])/(n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d)*(q[i] - q[i - 1])/(n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] = q[i] + d*(q[i + d] - q[i])/(n[i + d] - n[i])
+                n[i] += d
+
+    def value(self):
+        """Estimación actual del percentil (nan si no hay valores)."""
+        if not self._q:
+            return math.nan
+        if len(self._q) < 5:
+            return float(np.percentile(self._q, self.percentile))
+        return self._q[2]
+
 class TimerLogger:
-    def __init__(self):
-        self.timestamps = []
+    """
+    Registro de intervalos de tiempo (en milisegundos) de memoria acotada, para usar con intervalCounter.
+
+    Los últimos capacity valores se guardan en un buffer circular de numpy, y la cantidad, media, varianza,
+    mínimo y máximo de todos los valores se acumulan en línea (algoritmo de Welford), por lo que la memoria no
+    crece con la duración de la medición. Opcionalmente se estiman percentiles en línea con P2Quantile.
+    Es seguro usarlo desde varios hilos.
+
+    Con enabled=False, intervalCounter devuelve la función sin envolver, por lo que el decorador no agrega ningún
+    costo y puede quedar en el código de producción.
+    """
+    def __init__(self, capacity=10000, percentiles=(), enabled=True):
+        """
+        Params:
+            capacity (int): Cantidad de valores recientes que se guardan. Default: 10000.
+            percentiles (tuple): Percentiles a estimar en línea sobre todos los valores, p.ej. (50, 99). Default: ().
+            enabled (bool): Si es False, intervalCounter no mide nada. Default: True.
+        """
+        self.capacity = capacity
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self._buffer = np.empty(capacity, dtype=np.float64)
+        self._percentiles = tuple(percentiles)
+        self.reset()
+
+    def reset(self):
+        """Descarta todos los valores registrados."""
+        with self.lock:
+            self._index = 0
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+            self.min = math.inf
+            self.max = -math.inf
+            self.sketches = [P2Quantile(p) for p in self._percentiles]
+
+    def add(self, value):
+        """
+        Registra un valor.
+        Params:
+            value (float): Intervalo en milisegundos.
+        """
+        with self.lock:
+            self._add(value)
+
+    def _add(self, value):
+        """Registra un valor. Se debe llamar con self.lock tomado."""
+        self._buffer[self._index] = value
+        self._index = (self._index + 1) % self.capacity
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self._m2 += delta*(value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        for sketch in self.sketches:
+            sketch.add(value)
+
+    @property
+    def timestamps(self):
+        """Últimos valores registrados (como mucho capacity), del más viejo al más nuevo."""
+        with self.lock:
+            if self.count < self.capacity:
+                return self._buffer[:self.count].copy()
+            return np.roll(self._buffer, -self._index)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2/self.count) if self.count else math.nan
+
+    def summary(self):
+        """
+        Devuelve un diccionario con las estadísticas de todos los valores registrados (count, mean, std, min, max),
+        los percentiles estimados en línea (p50, p99, etc.) y la mediana de los últimos capacity valores.
+        """
+        recent = self.timestamps
+        with self.lock:
+            stats = {"count": self.count,
+                     "mean": self.mean if self.count else math.nan,
+                     "std": self.std,
+                     "min": self.min if self.count else math.nan,
+                     "max": self.max if self.count else math.nan}
+            for sketch in self.sketches:
+                stats[f"p{sketch.percentile:g}"] = sketch.value()
+        stats["recent_median"] = float(np.median(recent)) if recent.size else math.nan
+        return stats
 
 def intervalCounter(logger):
     """
     Función decoradora para medir el tiempo entre llamadas a la función decorada.
-    Guarda los tiempos en milisegundos en logger.timestamps.
+    Registra los tiempos en milisegundos en logger (ver TimerLogger).
+    Si logger.enabled es False al decorar, devuelve la función original sin costo adicional.
 
     Params:
         logger (TimerLogger): Instancia de TimerLogger donde se guardarán los tiempos.
@@ -21,13 +172,16 @@ def intervalCounter(logger):
             pass
     """
     def decorator(func):
+        if not logger.enabled:
+            return func
         last_time = [None] #debe ser una lista mutable para mantener el estado entre llamadas
         @wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.perf_counter() # Usamos perf_counter para mayor precisión
-            if last_time[0] is not None: # Verificamos si es la primera llamada
-                logger.timestamps.append((now - last_time[0]) * 1000)
-            last_time[0] = now
+            with logger.lock: # el instante se toma con el lock para que los intervalos entre hilos no sean negativos
+                now = time.perf_counter() # Usamos perf_counter para mayor precisión
+                if last_time[0] is not None: # Verificamos si es la primera llamada
+                    logger._add((now - last_time[0]) * 1000)
+                last_time[0] = now
             return func(*args, **kwargs) # Llamamos a la función original
         return wrapper # Decorador que envuelve la función original
-    return decorator # Decorador que envuelve la función original
\ No newline at end of file
+    return decorator # Decorador que envuelve la función original
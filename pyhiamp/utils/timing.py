@@ -0,0 +1,83 @@
+import time
+import math
+
+def sleep_until(deadline, clock=time.perf_counter, spin=0.002, event=None):
+    """
+    Función para esperar hasta un instante absoluto (deadline) con precisión submilisegundo.
+    Se duerme con time.sleep() hasta spin segundos antes del deadline y el tiempo restante
+    se espera activamente (spin), ya que time.sleep() puede despertar varios ms tarde.
+
+    Params:
+        deadline (float): Instante absoluto hasta el cual esperar, en el dominio de clock.
+        clock (callable): Reloj a utilizar, por ejemplo pylsl.local_clock. Default: time.perf_counter.
+        spin (float): Segundos finales que se esperan activamente. Default: 0.002.
+        event (threading.Event): Si se pasa, la espera se interrumpe en cuanto el evento se activa. Default: None.
+    Returns:
+        float: Instante (según clock) en el que se terminó de esperar.
+    """
+    now = clock()
+    remaining = deadline - now
+    if remaining > spin:
+        if event is None:
+            time.sleep(remaining - spin)
+        elif event.wait(remaining - spin):
+            return clock()
+    now = clock()
+    while now < deadline:
+        now = clock()
+    return now
+
+class DeadlineStats:
+    """
+    Estadísticas de un bucle pautado por deadlines absolutos.
+    Se acumulan en línea (sin guardar cada valor) el retraso de cada envío respecto de su deadline,
+    la cantidad de envíos tardíos y las muestras enviadas.
+    """
+    def __init__(self, late_threshold=0.001):
+        """
+        Params:
+            late_threshold (float): Retraso en segundos a partir del cual un envío se considera tardío. Default: 0.001.
+        """
+        self.late_threshold = late_threshold
+        self.count = 0
+        self.late_count = 0
+        self.samples = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = 0.0
+        self.start_time = None
+        self.last_time = None
+
+    def add(self, deadline, now, n_samples=0):
+        """
+        Registra un envío.
+        Params:
+            deadline (float): Instante nominal del envío.
+            now (float): Instante real del envío.
+            n_samples (int): Muestras enviadas.
+        """
+        lateness = now - deadline
+        self.count += 1
+        self.samples += n_samples
+        delta = lateness - self.mean
+        self.mean += delta/self.count
+        self._m2 += delta*(lateness - self.mean)
+        self.max = max(self.max, lateness)
+        if lateness > self.late_threshold:
+            self.late_count += 1
+        self.last_time = now
+
+    def summary(self):
+        """
+        Devuelve un diccionario con las estadísticas acumuladas.
+        Los tiempos se expresan en milisegundos y la tasa en muestras por segundo.
+        """
+        elapsed = (self.last_time - self.start_time) if self.count and self.start_time is not None else 0.0
+        return {"chunks": self.count,
+                "samples": self.samples,
+                "elapsed": elapsed,
+                "achieved_rate": self.samples/elapsed if elapsed > 0 else math.nan,
+                "mean_lateness_ms": self.mean*1000,
+                "jitter_ms": math.sqrt(self._m2/self.count)*1000 if self.count else math.nan,
+                "max_lateness_ms": self.max*1000,
+                "late_chunks": self.late_count}
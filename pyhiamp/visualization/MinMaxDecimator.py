@@ -0,0 +1,94 @@
+"""
+Decimación por envolvente mín/máx para graficar muchos canales a alta frecuencia de muestreo.
+"""
+
+import math
+
+import numpy as np
+
+from pyhiamp.visualization.RingBuffer import RingBuffer
+
+
+class MinMaxDecimator:
+    """Reduce todos los canales a la vez a dos puntos (mínimo y máximo) por cada bloque de factor muestras.
+
+    A diferencia de un submuestreo simple, la envolvente conserva los picos de la señal. La envolvente se
+    actualiza de forma incremental con cada chunk nuevo: solo se reducen los bloques completos y las muestras
+    sobrantes quedan pendientes hasta el próximo chunk, sin recalcular toda la ventana.
+    Los puntos se guardan en un RingBuffer, por lo que la envolvente visible es una vista contigua.
+    """
+
+    def __init__(self, n_channels: int, factor: int, capacity: int, dtype=np.float32):
+        """
+        :param n_channels: cantidad de canales
+        :param factor: cantidad de muestras que se reducen a un par mín/máx
+        :param capacity: cantidad máxima de muestras originales que cubre la envolvente
+        :param dtype: tipo de dato de las muestras
+        """
+        self.n_channels = n_channels
+        self.factor = max(1, int(factor))
+        self.dtype = dtype
+        self.envelope = RingBuffer(2 * math.ceil(capacity / self.factor) + 2, n_channels, dtype=dtype)
+        # muestras que aún no completan un bloque
+        self._pending = np.empty((self.factor, n_channels), dtype=dtype)
+        self._pending_ts = np.empty(self.factor)
+        self._n_pending = 0
+
+    @staticmethod
+    def factor_for(n_samples: int, width_px: int) -> int:
+        """Factor de decimación para mostrar n_samples en width_px píxeles con unos dos puntos por píxel."""
+        return max(1, math.ceil(n_samples / max(1, width_px)))
+
+    def reset(self):
+        """Descartar la envolvente y las muestras pendientes."""
+        self.envelope.count = 0
+        self.envelope.write_pos = 0
+        self._n_pending = 0
+
+    def update(self, timestamps, data):
+        """Agregar muestras nuevas (muestras x canales) a la envolvente.
+        :param timestamps: timestamps de las muestras nuevas
+        :param data: muestras nuevas
+        """
+        n = data.shape[0]
+        if n == 0:
+            return
+        start = 0
+        # completar el bloque pendiente del chunk anterior
+        if self._n_pending:
+            take = min(self.factor - self._n_pending, n)
+            self._pending[self._n_pending : self._n_pending + take] = data[:take]
+            self._pending_ts[self._n_pending : self._n_pending + take] = timestamps[:take]
+            self._n_pending += take
+            start = take
+            if self._n_pending == self.factor:
+                self._reduce(self._pending_ts, self._pending)
+                self._n_pending = 0
+        # reducir todos los bloques completos de una vez
+        n_blocks = (n - start) // self.factor
+        if n_blocks:
+            stop = start + n_blocks * self.factor
+            self._reduce(timestamps[start:stop], data[start:stop])
+            start = stop
+        # guardar las muestras sobrantes
+        rest = n - start
+        if rest:
+            self._pending[:rest] = data[start:]
+            self._pending_ts[:rest] = timestamps[start:]
+            self._n_pending = rest
+
+    def _reduce(self, timestamps, data):
+        """Reducir bloques completos de factor muestras a pares mín/máx y guardarlos en la envolvente."""
+        blocks = data.reshape(-1, self.factor, self.n_channels)
+        block_ts = np.asarray(timestamps).reshape(-1, self.factor)
+        env = np.empty((2 * blocks.shape[0], self.n_channels), dtype=self.dtype)
+        env_ts = np.empty(2 * blocks.shape[0])
+        np.min(blocks, axis=1, out=env[0::2])
+        np.max(blocks, axis=1, out=env[1::2])
+        env_ts[0::2] = block_ts[:, 0]
+        env_ts[1::2] = block_ts[:, -1]
+        self.envelope.write(env, env_ts)
+
+    def window(self):
+        """Devuelve vistas de los timestamps y de la envolvente (puntos x canales), en orden."""
+        return self.envelope.window()
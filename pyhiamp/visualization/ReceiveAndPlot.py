@@ -3,175 +3,717 @@ Clase basada en el ejemplo de ReceiveAndPlot.py de pylsl (ver sitio oficial)
 """
 
 import math
+import queue
+import threading
+import time
+from collections import deque
 from typing import List
 
 import numpy as np
 import pyqtgraph as pg
-from pyqtgraph.Qt import QtCore, QtGui
+from pyqtgraph.Qt import QtCore, QtGui, QtWidgets
 
 import pylsl
 
+from pyhiamp.markers.MarkerDecoder import MarkerDecoder
+from pyhiamp.processing.OnlineFilter import OnlineFilter
+from pyhiamp.processing.SlidingWelch import SlidingWelch
+from pyhiamp.visualization.RingBuffer import RingBuffer
+from pyhiamp.visualization.MinMaxDecimator import MinMaxDecimator
+from pyhiamp.visualization.SpectrumPanel import SpectrumPanel
+from pyhiamp.visualization.TopoMap import TopoMap
+from pyhiamp.processing.topography import readMontage
+
 # Parámetros básicos para la ventana de graficado
 plot_duration = 15  # cuántos segundos de datos mostrar
 update_interval = 10  # ms entre actualizaciones de pantalla
-pull_interval = 500  # ms entre cada operación de extracción de datos
+pull_interval = 100  # ms entre cada actualización de las curvas con los datos ya adquiridos
+acquire_interval = 20  # ms entre cada extracción de datos del hilo de adquisición
+stats_interval = 1000  # ms entre cada actualización de las estadísticas de extracción y graficado
+max_markers = 64  # cantidad máxima de marcadores visibles al mismo tiempo por entrada de marcadores
+channels_per_page = 16  # cantidad de canales visibles al mismo tiempo por entrada de datos
+filter_band = (1.0, 40.0)  # pasabanda aplicado a los datos continuos, en Hz
+line_freq = 50.0  # frecuencia de la red eléctrica que se elimina con un notch, en Hz
+spectrum_interval = 100  # ms entre cada actualización del panel de espectros
+welch_segment = 1.0  # duración en segundos de cada segmento de Welch (resolución de 1/welch_segment Hz)
+welch_segments = 8  # cantidad de segmentos (con 50% de solapamiento) que se promedian en la PSD
+spectrum_max_freq = 45.0  # frecuencia máxima mostrada en el panel de espectros, en Hz
+topomap_band = (8.0, 13.0)  # banda de frecuencias del mapa topográfico, en Hz
+montage_file = None  # archivo .sfp con las posiciones de los electrodos, si el flujo no las publica
+default_width = 1920  # ancho en píxeles supuesto mientras el gráfico aún no se muestra
+discovery_interval = 500  # ms entre cada revisión de los flujos encontrados
+forget_after = 5.0  # segundos sin respuesta tras los cuales un flujo se considera desaparecido
+open_timeout = 2.0  # segundos de espera para conectarse a un flujo nuevo
+retry_interval = 5.0  # segundos de espera antes de reintentar la conexión con un flujo que no respondió
+
+
+def open_inlet(info: pylsl.StreamInfo) -> pylsl.StreamInlet:
+    """Crear una entrada y conectarla a la salida encontrada previamente."""
+    # max_buflen se establece para que los datos más antiguos que plot_duration
+    # se descarten automáticamente y solo extrayamos datos recientes para mostrar
+
+    # Además, realizamos sincronización de reloj en línea para que todos los flujos
+    # estén en el mismo dominio temporal que lsl_clock() local
+    # (ver https://labstreaminglayer.readthedocs.io/projects/liblsl/ref/enums.html#_CPPv414proc_clocksync)
+    # y eliminar jitter de las marcas de tiempo
+    return pylsl.StreamInlet(
+        info,max_buflen=plot_duration,
+        processing_flags=pylsl.proc_clocksync | pylsl.proc_dejitter,)
 
 
 class Inlet:
     """Clase base para representar una entrada que puede graficarse"""
 
-    def __init__(self, info: pylsl.StreamInfo):
-        # crear una entrada y conectarla a la salida encontrada previamente.
-        # max_buflen se establece para que los datos más antiguos que plot_duration
-        # se descarten automáticamente y solo extrayamos datos recientes para mostrar
-
-        # Además, realizamos sincronización de reloj en línea para que todos los flujos
-        # estén en el mismo dominio temporal que lsl_clock() local
-        # (ver https://labstreaminglayer.readthedocs.io/projects/liblsl/ref/enums.html#_CPPv414proc_clocksync)
-        # y eliminar jitter de las marcas de tiempo
-        self.inlet = pylsl.StreamInlet(
-            info,max_buflen=plot_duration,
-            processing_flags=pylsl.proc_clocksync | pylsl.proc_dejitter,)
-        
-        # almacenamos el nombre y la cantidad de canales
+    def __init__(self, info: pylsl.StreamInfo, inlet: pylsl.StreamInlet = None):
+        """
+        :param info: información del flujo
+        :param inlet: entrada ya conectada al flujo (p.ej. por StreamDiscovery). Por defecto se crea con open_inlet.
+        """
+        self.inlet = inlet if inlet is not None else open_inlet(info)
+
+        # almacenamos el nombre, el identificador único y la cantidad de canales
         self.name = info.name()
+        self.uid = info.uid()
         self.channel_count = info.channel_count()
+        self.closed = False
 
-    def pull_and_plot(self, plot_time: float, plt: pg.PlotItem):
-        """Extraer datos de la entrada y agregarlos al gráfico.
+        # la adquisición (hilo de adquisición) y el graficado (hilo de la GUI) comparten
+        # los buffers, por lo que se protegen con un lock
+        self.lock = threading.Lock()
+        self.pull_time = LatencyMeter()  # duración de cada extracción
+        self.render_time = LatencyMeter()  # duración de cada actualización del gráfico
+
+    def acquire(self):
+        """Extraer los datos disponibles de la entrada y guardarlos en los buffers.
+        Se llama desde el hilo de adquisición, nunca toca el gráfico.
+        """
+        # No sabemos qué hacer con una entrada genérica, por lo que la omitimos.
+        pass
+
+    def plot(self, plot_time: float, plt: pg.PlotItem):
+        """Actualizar el gráfico con una copia de los datos ya adquiridos.
+        Se llama desde el hilo de la GUI.
         :param plot_time: marca de tiempo mínima aún visible en el gráfico
         :param plt: el gráfico en el cual mostrar los datos
         """
-        # No sabemos qué hacer con una entrada genérica, por lo que la omitimos.
         pass
 
+    def close(self):
+        """Cerrar la entrada y liberar sus buffers y sus items del gráfico. Se llama desde el hilo de la GUI."""
+        with self.lock:
+            self.closed = True
+            self.inlet.close_stream()
+            self.inlet = None
+
+    def pull_and_plot(self, plot_time: float, plt: pg.PlotItem):
+        """Extraer datos de la entrada y agregarlos al gráfico, en el mismo hilo.
+        :param plot_time: marca de tiempo mínima aún visible en el gráfico
+        :param plt: el gráfico en el cual mostrar los datos
+        """
+        self.acquire()
+        self.plot(plot_time, plt)
+
+
+class LatencyMeter:
+    """Mide duraciones en ms: última, media móvil exponencial y máximo."""
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.last = 0.0
+        self.mean = 0.0
+        self.max = 0.0
+        self.count = 0
+
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        self.last = ms
+        self.mean = ms if self.count == 0 else self.mean + self.alpha * (ms - self.mean)
+        self.max = max(self.max, ms)
+        self.count += 1
+
+    def __str__(self):
+        return f"{self.mean:.2f} ms (máx {self.max:.2f})"
+
+
+class AcquisitionWorker(threading.Thread):
+    """Hilo que extrae periódicamente los datos de todas las entradas hacia sus buffers.
+    De esta forma una extracción lenta no frena el dibujado, y un dibujado lento no frena la adquisición.
+    """
+
+    def __init__(self, inlets: List[Inlet], interval=acquire_interval):
+        """
+        :param inlets: lista de entradas de las que extraer datos
+        :param interval: ms entre extracciones
+        """
+        super().__init__(name="AcquisitionWorker", daemon=True)
+        self.inlets = inlets
+        self.interval = interval / 1000
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            for inlet in list(self.inlets):
+                inlet.acquire()
+            # esperar el resto del intervalo, despertando enseguida si se pide detener el hilo
+            self._stop_event.wait(max(0.0, self.interval - (time.perf_counter() - start)))
+
+    def stop(self, timeout=1.0):
+        """Detener el hilo y esperar a que termine."""
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class StreamDiscovery(threading.Thread):
+    """Hilo que busca flujos LSL de forma continua (pylsl.ContinuousResolver), sin bloquear la GUI.
+
+    Cuando aparece un flujo nuevo se conecta a él desde este hilo (la primera conexión puede tardar) y lo deja en
+    la cola added como (info, entrada, info completa con la metadata). Cuando un flujo deja de responder durante forget_after segundos, su uid se
+    deja en la cola removed. Un amplificador que se reinicia aparece como un flujo nuevo, con otro uid.
+    """
+
+    def __init__(self, interval=discovery_interval, forget_after=forget_after):
+        """
+        :param interval: ms entre cada revisión de los flujos encontrados
+        :param forget_after: segundos sin respuesta tras los cuales un flujo se considera desaparecido
+        """
+        super().__init__(name="StreamDiscovery", daemon=True)
+        self.interval = interval / 1000
+        self.forget_after = forget_after
+        self.added = queue.Queue()  # (info, entrada, info completa) de los flujos nuevos
+        self.removed = queue.Queue()  # uid de los flujos desaparecidos
+        self.known = set()  # uid de los flujos ya conectados
+        self._retry = {}  # uid de los flujos que no respondieron y momento del próximo intento
+        self._stop_event = threading.Event()
+
+    def run(self):
+        resolver = pylsl.ContinuousResolver(forget_after=self.forget_after)
+        while not self._stop_event.is_set():
+            found = {info.uid(): info for info in resolver.results()}
+            for uid, info in found.items():
+                if uid in self.known or self._retry.get(uid, 0.0) > time.monotonic():
+                    continue
+                inlet = open_inlet(info)
+                try:
+                    # conectarse, obtener la metadata completa y la primera corrección de reloj, para que ni la GUI ni
+                    # la primera extracción tengan que esperar
+                    full_info = inlet.info(timeout=open_timeout)
+                    inlet.open_stream(timeout=open_timeout)
+                    inlet.time_correction(timeout=open_timeout)
+                except RuntimeError:  # TimeoutError o LostError de pylsl
+                    if uid not in self._retry:
+                        print(f"No se pudo conectar con el flujo {info.name()}, se reintentará")
+                    self._retry[uid] = time.monotonic() + retry_interval
+                    continue
+                self._retry.pop(uid, None)
+                self.known.add(uid)
+                self.added.put((info, inlet, full_info))
+            for uid in self.known - found.keys():
+                self.known.discard(uid)
+                self.removed.put(uid)
+            for uid in self._retry.keys() - found.keys():
+                del self._retry[uid]
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout=1.0):
+        """Detener el hilo y esperar a que termine."""
+        self._stop_event.set()
+        self.join(timeout)
+
+
+def channel_labels(info: pylsl.StreamInfo) -> List[str]:
+    """Leer los nombres de los canales desde la metadata "channels" del flujo
+    (como la escrita por dummyHiamp.addChannelMetadata). Si no existen se usan CH1, CH2, etc."""
+    labels = []
+    ch = info.desc().child("channels").child("channel")
+    while ch.name() == "channel":
+        labels.append(ch.child_value("label"))
+        ch = ch.next_sibling("channel")
+    if len(labels) != info.channel_count():
+        labels = [f"CH{i + 1}" for i in range(info.channel_count())]
+    return labels
+
+
+def channel_locations(info: pylsl.StreamInfo):
+    """Leer las posiciones X, Y, Z de los canales desde la metadata "location" de cada canal.
+    :return: array de forma (canales, 3), o None si algún canal no tiene posición"""
+    locations = []
+    ch = info.desc().child("channels").child("channel")
+    while ch.name() == "channel":
+        loc = ch.child("location")
+        try:
+            locations.append([float(loc.child_value(axis)) for axis in ("X", "Y", "Z")])
+        except ValueError:
+            return None
+        ch = ch.next_sibling("channel")
+    if len(locations) != info.channel_count():
+        return None
+    return np.array(locations)
+
 
 class DataInlet(Inlet):
     """Una DataInlet representa una entrada con datos continuos multicanal
-    que se deben graficar como múltiples líneas."""
+    que se deben graficar como múltiples líneas.
+
+    Solo se grafica una página de canales a la vez (o una selección de canales). Todos los canales se
+    guardan en el buffer circular, pero la envolvente y las curvas se calculan solo para los visibles.
+    """
 
     dtypes = [[], np.float32, np.float64, None, np.int32, np.int16, np.int8, np.int64]
 
     def __init__(self, info: pylsl.StreamInfo, plt: pg.PlotItem,
-                 background_color=(255,255,255), lines_color='k'):
-        super().__init__(info)
-        # calcular el tamaño del buffer, es decir, dos veces la cantidad de datos visualizados
-        bufsize = (2 * math.ceil(info.nominal_srate() * plot_duration), info.channel_count(),)
-        self.buffer = np.empty(bufsize, dtype=self.dtypes[info.channel_format()])
-        empty = np.array([])
-        # crear un objeto de curva por cada canal/línea que se encargará de mostrar los datos
-        self.curves = [pg.PlotCurveItem(x=empty, y=empty, autoDownsample=True, pen=pg.mkPen(color=lines_color))
-               for _ in range(self.channel_count)]
-        
-        for curve in self.curves:
-            plt.addItem(curve)
+                 background_color=(255,255,255), lines_color='k', channels_per_page=channels_per_page,
+                 online_filter: OnlineFilter = None, spectrum: SlidingWelch = None, inlet: pylsl.StreamInlet = None,
+                 full_info: pylsl.StreamInfo = None):
+        """
+        :param online_filter: filtro que se aplica a cada chunk al guardarlo en el buffer circular (p.ej. pasabanda y
+            notch). Solo se usa con flujos de punto flotante. Por defecto, los datos se grafican sin filtrar.
+        :param spectrum: estimador de la PSD que se actualiza con cada chunk (ya filtrado) de todos los canales.
+            Se lee desde un SpectrumPanel.
+        :param inlet: entrada ya conectada al flujo. Por defecto se crea una nueva.
+        :param full_info: información completa del flujo (con la metadata), p.ej. la obtenida por StreamDiscovery.
+            Por defecto se pide a la entrada, con un tiempo de espera.
+        """
+        super().__init__(info, inlet)
+        self.plt = plt
+        self.lines_color = lines_color
+        # la información devuelta por la resolución no incluye la metadata, hay que pedirla a la entrada
+        try:
+            if full_info is None:
+                full_info = self.inlet.info(timeout=open_timeout)
+            self.labels = channel_labels(full_info)
+            self.locations = channel_locations(full_info)
+        except RuntimeError:  # TimeoutError o LostError de pylsl
+            self.labels = [f"CH{i + 1}" for i in range(self.channel_count)]
+            self.locations = None
+        # calcular el tamaño del buffer circular, es decir, los datos visualizados más lo que
+        # puede llegar entre dos extracciones
+        capacity = math.ceil(info.nominal_srate() * (plot_duration + 2 * pull_interval / 1000))
+        self.buffer = RingBuffer(capacity, self.channel_count, dtype=self.dtypes[info.channel_format()])
+        # el filtro trabaja en el lugar sobre el buffer, por lo que no puede usarse con enteros
+        if online_filter is not None and not np.issubdtype(self.buffer.data.dtype, np.floating):
+            print(f"No se filtra {self.name}: el formato de sus canales no es de punto flotante")
+            online_filter = None
+        self.online_filter = online_filter
+        self.spectrum = spectrum
+        # envolvente mín/máx de los canales visibles, con unos dos puntos por píxel de pantalla
+        self.srate = info.nominal_srate()
+        self.decimator = None
+        self.factor = None
+        # canales visibles, en el orden en que se grafican de arriba hacia abajo
+        self.channels_per_page = max(1, min(channels_per_page, self.channel_count))
+        self.visible = np.arange(self.channels_per_page)
+        self.curves = []
+        self._new_data = False  # hay datos adquiridos que aún no se graficaron
+        self._show_channels(self.visible)
+        self._set_width(plt.getViewBox().width())
 
         # Setear el color de fondo del plot
         plt.getViewBox().setBackgroundColor(background_color)
-
-    def pull_and_plot(self, plot_time, plt):
-        # extraer los datos
-        _, ts = self.inlet.pull_chunk(
-            timeout=0.0, max_samples=self.buffer.shape[0], dest_obj=self.buffer
-        )
-        # ts estará vacío si no se extrajeron muestras, o contendrá una lista de timestamps en caso contrario
-        if ts:
-            ts = np.asarray(ts)
-            y = self.buffer[0 : ts.size, :]
-            this_x = None
-            old_offset = 0
-            new_offset = 0
-            for ch_ix in range(self.channel_count):
-                # no extraemos una pantalla completa de datos, así que debemos
-                # recortar los datos antiguos y agregar los nuevos
-                old_x, old_y = self.curves[ch_ix].getData()
-                # los timestamps son idénticos para todos los canales, por lo que calculamos esto solo una vez
-                if ch_ix == 0:
-                    # buscar el índice de la primera muestra que aún es visible,
-                    # es decir, más reciente que el borde izquierdo del gráfico
-                    old_offset = old_x.searchsorted(plot_time)
-                    # lo mismo para los nuevos datos, en caso de haber extraído más de lo que puede mostrarse
-                    new_offset = ts.searchsorted(plot_time)
-                    # agregar nuevos timestamps a los antiguos recortados
-                    this_x = np.hstack((old_x[old_offset:], ts[new_offset:]))
-                # agregar nuevos datos a los datos antiguos recortados
-                this_y = np.hstack((old_y[old_offset:], y[new_offset:, ch_ix] - ch_ix))
-                # reemplazar los datos antiguos
-                self.curves[ch_ix].setData(this_x, this_y)
+        # recalcular el factor de decimación si cambia el ancho del gráfico
+        self._on_resize = lambda vb: self._set_width(vb.width())
+        plt.getViewBox().sigResized.connect(self._on_resize)
+
+    def _set_width(self, width_px):
+        """Ajustar la decimación al ancho del gráfico en píxeles y reconstruir la envolvente desde el buffer."""
+        width_px = int(width_px) if width_px and width_px > 1 else default_width
+        factor = MinMaxDecimator.factor_for(math.ceil(self.srate * plot_duration), width_px)
+        if self.factor != factor:
+            with self.lock:
+                self.factor = factor
+                self._rebuild()
+
+    def _rebuild(self):
+        """Reconstruir la envolvente de los canales visibles a partir del buffer circular.
+        Se debe llamar con self.lock tomado."""
+        self.decimator = MinMaxDecimator(len(self.visible), self.factor, self.buffer.capacity,
+                                         dtype=self.buffer.data.dtype)
+        ts, y = self.buffer.window()
+        self.decimator.update(ts, self._visible_data(y))
+        self._new_data = True
+
+    def _visible_data(self, y):
+        """Copia de los canales visibles, desplazados verticalmente según su posición en el gráfico."""
+        visible = y[:, self.visible]
+        visible += self.offsets
+        return visible
+
+    def _show_channels(self, channels):
+        """Mostrar los canales indicados (índices), creando curvas si hacen falta y ocultando las sobrantes."""
+        visible = np.asarray(channels, dtype=int)
+        with self.lock:
+            self.visible = visible
+            # desplazamiento vertical de cada canal visible
+            self.offsets = -np.arange(len(visible), dtype=self.buffer.data.dtype)
+            if self.factor is not None:
+                self._rebuild()
+        empty = np.array([])
+        # crear un objeto de curva por cada canal/línea visible que se encargará de mostrar los datos.
+        # No se usa autoDownsample porque los datos ya llegan decimados.
+        while len(self.curves) < len(self.visible):
+            curve = pg.PlotCurveItem(x=empty, y=empty, autoDownsample=False, pen=pg.mkPen(color=self.lines_color))
+            self.plt.addItem(curve)
+            self.curves.append(curve)
+        for slot, curve in enumerate(self.curves):
+            curve.setVisible(slot < len(self.visible))
+            if slot >= len(self.visible):
+                curve.setData(empty, empty)
+        # nombres de los canales en el eje vertical
+        ticks = [(float(self.offsets[slot]), self.labels[ch]) for slot, ch in enumerate(self.visible)]
+        axis = self.plt.getAxis("left")
+        axis.setTicks([ticks])
+        # el eje es compartido por todas las entradas: se recuerda cuál puso los nombres actuales
+        axis.ticks_owner = self
+
+    @property
+    def page(self) -> int:
+        """Página actual (según el primer canal visible)."""
+        return int(self.visible[0]) // self.channels_per_page if len(self.visible) else 0
+
+    @property
+    def n_pages(self) -> int:
+        return math.ceil(self.channel_count / self.channels_per_page)
+
+    def set_page(self, page: int):
+        """Mostrar la página indicada de channels_per_page canales consecutivos."""
+        page = max(0, min(page, self.n_pages - 1))
+        self.scroll_to(page * self.channels_per_page)
+
+    def next_page(self):
+        self.set_page(self.page + 1)
+
+    def prev_page(self):
+        self.set_page(self.page - 1)
+
+    def scroll_to(self, first: int):
+        """Mostrar channels_per_page canales consecutivos a partir del canal first."""
+        first = max(0, min(first, self.channel_count - self.channels_per_page))
+        self._show_channels(np.arange(first, first + self.channels_per_page))
+
+    def scroll(self, step: int):
+        """Desplazar los canales visibles step canales (negativo hacia arriba)."""
+        self.scroll_to(int(self.visible[0]) + step if len(self.visible) else 0)
+
+    def select(self, channels):
+        """Mostrar solo los canales indicados, por nombre o por índice (p.ej. ["Cz", "Pz", 3])."""
+        indices = []
+        for ch in channels:
+            if isinstance(ch, str):
+                if ch not in self.labels:
+                    print(f"Canal {ch} no encontrado en {self.name}")
+                    continue
+                ch = self.labels.index(ch)
+            if 0 <= ch < self.channel_count:
+                indices.append(ch)
+        if indices:
+            self._show_channels(indices)
+
+    def acquire(self):
+        start = time.perf_counter()
+        with self.lock:
+            if self.closed:
+                return
+            # extraer los datos directamente en el buffer circular (todos los canales), filtrándolos si corresponde
+            n = self.buffer.pull(self.inlet, process=self.online_filter)
+            if n:
+                # actualizar la envolvente solo con las muestras nuevas de los canales visibles
+                ts, y = self.buffer.window(n)
+                self.decimator.update(ts, self._visible_data(y))
+                if self.spectrum is not None:
+                    self.spectrum.update(y)
+                self._new_data = True
+        self.pull_time.add(time.perf_counter() - start)
+
+    def plot(self, plot_time, plt):
+        if not self._new_data:
+            return
+        start = time.perf_counter()
+        with self.lock:
+            # copia de la envolvente visible, para que el hilo de adquisición pueda seguir escribiendo
+            ts, y = self.decimator.window()
+            # buscar el índice de la primera muestra que aún es visible,
+            # es decir, más reciente que el borde izquierdo del gráfico
+            offset = ts.searchsorted(plot_time)
+            ts = ts[offset:].copy()
+            y = y[offset:].copy()
+            self._new_data = False
+        for slot in range(y.shape[1]):
+            self.curves[slot].setData(ts, y[:, slot])
+        self.render_time.add(time.perf_counter() - start)
+
+    def close(self):
+        super().close()
+        self.plt.getViewBox().sigResized.disconnect(self._on_resize)
+        for curve in self.curves:
+            self.plt.removeItem(curve)
+        # solo se borran los nombres de los canales si son los de esta entrada
+        axis = self.plt.getAxis("left")
+        if getattr(axis, "ticks_owner", None) is self:
+            axis.setTicks(None)
+            axis.ticks_owner = None
+        self.curves = []
+        # liberar los buffers
+        with self.lock:
+            self.buffer = None
+            self.decimator = None
+            self.spectrum = None
+            self.online_filter = None
 
 
 class MarkerInlet(Inlet):
-    """Muestra eventos esporádicos como líneas verticales con colores únicos por marcador."""
+    """Muestra eventos esporádicos como líneas verticales con colores únicos por marcador.
 
-    def __init__(self, info: pylsl.StreamInfo):
-        super().__init__(info)
+    Las líneas y textos se toman de un pool de tamaño fijo: cuando un marcador sale de la ventana
+    de plot_duration sus items se ocultan y se reutilizan para los marcadores siguientes, por lo que
+    la escena y la memoria no crecen con la duración de la sesión.
+    """
+
+    font = None  # fuente compartida por todos los textos, se crea al graficar el primer marcador
+
+    def __init__(self, info: pylsl.StreamInfo, max_markers=max_markers, inlet: pylsl.StreamInlet = None,
+                 full_info: pylsl.StreamInfo = None):
+        """
+        :param full_info: información completa del flujo, con la tabla de códigos de los marcadores enteros.
+            Por defecto se pide a la entrada, con un tiempo de espera.
+        """
+        super().__init__(info, inlet)
+        self.plt = None          # gráfico donde se agregan los items, se guarda al crear el primero
         self.marker_colors = {}  # Diccionario para asignar colores por marcador
+        self.marker_pens = {}    # Lápiz de cada marcador, para no crearlo en cada marcador
         self.color_index = 0     # Contador de colores únicos
-        self.text_items = []     # Guardamos los textos si después quisiéramos actualizarlos
         self.YTOP = 5.0          # Altura fija para mostrar los labels (ajustar según tus señales)
-
-    def pull_and_plot(self, plot_time, plt):
-        strings, timestamps = self.inlet.pull_chunk(0)
-        if timestamps:
-            for string, ts in zip(strings, timestamps):
-                label = string[0]
-
-                # Asignación de color por marcador
-                if label not in self.marker_colors:
-                    color = pg.intColor(self.color_index, hues=20)
-                    self.marker_colors[label] = color
-                    self.color_index += 1
-                else:
-                    color = self.marker_colors[label]
-
-                # Dibujar la línea vertical
-                plt.addItem(
-                    pg.InfiniteLine(pos=ts, angle=90, pen=pg.mkPen(color=color, width=2), movable=False)
-                )
-
-                # Dibujar el texto encima de todo
-                text = pg.TextItem(text=label, color='k', anchor=(0.5, 0), fill=pg.mkBrush('w'))
-                text.setFont(QtGui.QFont("Arial", 14))
-                plt.addItem(text)
-                ymin, ymax = plt.viewRange()[1]
-                centerY = (ymin + ymax) / 2
+        self.pending = []        # marcadores adquiridos que aún no se graficaron
+        self.max_markers = max_markers
+        self.free_items = []     # pares (línea, texto) creados y disponibles para reutilizar
+        self.active = deque()    # marcadores visibles: (timestamp, línea, texto), del más viejo al más nuevo
+        self.n_items = 0         # cantidad de pares creados, como máximo max_markers
+        # traduce los códigos de los flujos de marcadores enteros a sus etiquetas (los de texto pasan sin cambios).
+        # Si no se puede leer la metadata del flujo, los códigos se muestran como números
+        try:
+            self.decoder = MarkerDecoder(full_info if full_info is not None else self.inlet, timeout=open_timeout)
+        except RuntimeError:  # TimeoutError o LostError de pylsl
+            print(f"No se pudo leer la tabla de marcadores de {self.name}, se muestran los códigos")
+            self.decoder = None
+
+    @property
+    def text_items(self):
+        """Textos de los marcadores visibles."""
+        return [text for _, _, text in self.active]
+
+    def acquire(self):
+        start = time.perf_counter()
+        with self.lock:
+            if self.closed:
+                return
+            strings, timestamps = self.inlet.pull_chunk(0)
+            if len(timestamps):
+                self.pending.extend(zip(strings, timestamps))
+        self.pull_time.add(time.perf_counter() - start)
+
+    def _get_pen(self, label):
+        """Lápiz del marcador, asignando un color nuevo a cada marcador distinto."""
+        if label not in self.marker_pens:
+            color = pg.intColor(self.color_index, hues=20)
+            self.marker_colors[label] = color
+            self.marker_pens[label] = pg.mkPen(color=color, width=2)
+            self.color_index += 1
+        return self.marker_pens[label]
+
+    def _get_items(self, plt):
+        """Obtener un par (línea, texto) libre, creándolo si el pool aún no está completo
+        o reutilizando el del marcador más viejo si está lleno."""
+        if self.free_items:
+            return self.free_items.pop()
+        if self.n_items < self.max_markers:
+            if MarkerInlet.font is None:
+                MarkerInlet.font = QtGui.QFont("Arial", 14)
+            line = pg.InfiniteLine(pos=0, angle=90, movable=False)
+            text = pg.TextItem(text="", color='k', anchor=(0.5, 0), fill=pg.mkBrush('w'))
+            text.setFont(MarkerInlet.font)
+            plt.addItem(line)
+            plt.addItem(text)
+            self.plt = plt
+            self.n_items += 1
+            return line, text
+        _, line, text = self.active.popleft()
+        return line, text
+
+    def _recycle(self, plot_time):
+        """Ocultar y liberar los items de los marcadores que ya salieron de la ventana."""
+        while self.active and self.active[0][0] < plot_time:
+            _, line, text = self.active.popleft()
+            line.setVisible(False)
+            text.setVisible(False)
+            self.free_items.append((line, text))
+
+    def plot(self, plot_time, plt):
+        self._recycle(plot_time)
+        if not self.pending:
+            return
+        start = time.perf_counter()
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if pending:
+            ymin, ymax = plt.viewRange()[1]
+            centerY = (ymin + ymax) / 2
+            # si llegan más marcadores que el tamaño del pool solo se muestran los últimos
+            for string, ts in pending[-self.max_markers:]:
+                label = self.decoder.decode(string[0]) if self.decoder is not None else str(string[0])
+                line, text = self._get_items(plt)
+
+                # Ubicar la línea vertical con el color del marcador
+                line.setPen(self._get_pen(label))
+                line.setValue(ts)
+                line.setVisible(True)
+
+                # Ubicar el texto encima de todo
+                text.setText(label)
                 text.setPos(ts, centerY)
-
-                self.text_items.append(text)
+                text.setVisible(True)
+
+                self.active.append((ts, line, text))
+            self.render_time.add(time.perf_counter() - start)
+
+    def close(self):
+        super().close()
+        items = self.free_items + [(line, text) for _, line, text in self.active]
+        if self.plt is not None:
+            for line, text in items:
+                self.plt.removeItem(line)
+                self.plt.removeItem(text)
+        self.free_items = []
+        self.active.clear()
+        self.pending = []
+        self.n_items = 0
 
 def main():
-    # primero resolvemos todos los flujos que podrían mostrarse
+    # los flujos se buscan en segundo plano y se agregan a medida que aparecen
     inlets: List[Inlet] = []
     print("buscando flujos")
-    streams = pylsl.resolve_streams()
 
+    pg.mkQApp("LSL Plot")
     pg.setConfigOption('background', 'w')  
     pg.setConfigOption('foreground', 'k') 
 
-    # Crear la ventana de pyqtgraph
-    pw = pg.plot(title="LSL Plot")
+    # Crear la ventana con el gráfico de pyqtgraph y un campo para elegir los canales visibles
+    win = QtWidgets.QWidget()
+    win.setWindowTitle("LSL Plot")
+    layout = QtWidgets.QVBoxLayout(win)
+    selector = QtWidgets.QLineEdit()
+    selector.setPlaceholderText("Canales a mostrar separados por coma (p.ej. Cz, Pz, Oz). Vacío para paginar. "
+                                "RePág/AvPág: cambiar de página, flechas: desplazar canales")
+    layout.addWidget(selector)
+    pw = pg.PlotWidget()
+    layout.addWidget(pw, 3)
+    win.resize(1200, 800)
+    win.show()
     plt = pw.getPlotItem()
     plt.enableAutoRange(x=False, y=True)
 
-    # iterar sobre los flujos encontrados, creando objetos de entrada especializados
-    # que manejarán el graficado de los datos
-    for info in streams:
+    data_inlets: List[DataInlet] = []
+    panels = []  # paneles de espectros y mapas topográficos de todas las entradas de datos
+    rows = {}  # uid -> (widgets, paneles) de cada entrada de datos
+    montage = readMontage(montage_file) if montage_file else (None, None)
+
+    def add_panels(inlet):
+        """Agregar un panel de espectros y un mapa topográfico debajo del gráfico para la entrada de datos"""
+        row = QtWidgets.QHBoxLayout()
+        layout.addLayout(row, 1)
+        spw = pg.PlotWidget(title=f"PSD {inlet.name}")
+        row.addWidget(spw, 3)
+        widgets, inlet_panels = [spw], [SpectrumPanel(inlet, spw.getPlotItem(), max_freq=spectrum_max_freq)]
+        if inlet.locations is not None or montage_file is not None:
+            tpw = pg.PlotWidget()
+            try:
+                inlet_panels.append(TopoMap(inlet, tpw.getPlotItem(), *montage, band=topomap_band))
+                row.addWidget(tpw, 1)
+                widgets.append(tpw)
+            except ValueError as e:
+                print(f"No se muestra el mapa topográfico: {e}")
+                tpw.deleteLater()
+        panels.extend(inlet_panels)
+        rows[inlet.uid] = (row, widgets, inlet_panels)
+
+    def add_stream(info, inlet, full_info=None):
+        """Crear el objeto de entrada especializado que manejará el graficado de los datos del flujo"""
         if info.type() == "Markers":
             if (
                 info.nominal_srate() != pylsl.IRREGULAR_RATE
-                or info.channel_format() != pylsl.cf_string
+                or info.channel_format() not in (pylsl.cf_string, pylsl.cf_int32)
             ):
                 print("Flujo de marcadores inválido " + info.name())
             print("Agregando entrada de marcador: " + info.name())
-            inlets.append(MarkerInlet(info))
+            inlets.append(MarkerInlet(info, inlet=inlet, full_info=full_info))
         elif (
             info.nominal_srate() != pylsl.IRREGULAR_RATE
             and info.channel_format() != pylsl.cf_string
         ):
             print("Agregando entrada de datos: " + info.name())
-            inlets.append(DataInlet(info, plt, background_color=(255,255,255), lines_color='k'))
+            online_filter = OnlineFilter(info.nominal_srate(), info.channel_count(), band=filter_band, notch=line_freq)
+            spectrum = SlidingWelch(info.nominal_srate(), info.channel_count(),
+                                    nperseg=int(info.nominal_srate() * welch_segment), n_segments=welch_segments)
+            data_inlet = DataInlet(info, plt, background_color=(255,255,255), lines_color='k',
+                                   online_filter=online_filter, spectrum=spectrum, inlet=inlet,
+                                   full_info=full_info)
+            inlets.append(data_inlet)
+            data_inlets.append(data_inlet)
+            add_panels(data_inlet)
         else:
             print("No sé qué hacer con el flujo " + info.name())
+            inlet.close_stream()
+
+    def remove_stream(uid):
+        """Quitar la entrada de un flujo que desapareció y liberar sus buffers, paneles e items del gráfico"""
+        for inlet in [inlet for inlet in inlets if inlet.uid == uid]:
+            print("Quitando entrada: " + inlet.name)
+            # primero se quita de la lista, para que el hilo de adquisición deje de usarla
+            inlets.remove(inlet)
+            if inlet in data_inlets:
+                data_inlets.remove(inlet)
+            if uid in rows:
+                row, widgets, inlet_panels = rows.pop(uid)
+                for panel in inlet_panels:
+                    panels.remove(panel)
+                for widget in widgets:
+                    row.removeWidget(widget)
+                    widget.deleteLater()
+                layout.removeItem(row)
+            inlet.close()
+
+    def check_streams():
+        """Agregar y quitar las entradas de los flujos que el hilo de búsqueda encontró o perdió, sin esperar"""
+        while True:
+            try:
+                add_stream(*discovery.added.get_nowait())
+            except queue.Empty:
+                break
+        while True:
+            try:
+                remove_stream(discovery.removed.get_nowait())
+            except queue.Empty:
+                break
+
+    def select_channels():
+        """Mostrar los canales escritos en el selector, o volver a la paginación si está vacío"""
+        text = selector.text().strip()
+        for inlet in data_inlets:
+            if not text:
+                inlet.set_page(0)
+                continue
+            channels = [int(ch) - 1 if ch.isdigit() else ch for ch in (c.strip() for c in text.split(",")) if ch]
+            inlet.select(channels)
+
+    selector.returnPressed.connect(select_channels)
+
+    # atajos de teclado para recorrer los canales de todas las entradas de datos
+    shortcuts = []
+    for key, action in [(QtCore.Qt.Key.Key_PageDown, lambda inlet: inlet.next_page()),
+                        (QtCore.Qt.Key.Key_PageUp, lambda inlet: inlet.prev_page()),
+                        (QtCore.Qt.Key.Key_Down, lambda inlet: inlet.scroll(1)),
+                        (QtCore.Qt.Key.Key_Up, lambda inlet: inlet.scroll(-1))]:
+        shortcut = QtWidgets.QShortcut(QtGui.QKeySequence(key), win)
+        shortcut.activated.connect(lambda action=action: [action(inlet) for inlet in data_inlets])
+        shortcuts.append(shortcut)
 
     def scroll():
         """Mover la vista para que los datos parezcan desplazarse"""
@@ -182,24 +724,52 @@ def main():
         pw.setXRange(plot_time - plot_duration + fudge_factor, plot_time - fudge_factor)
 
     def update():
-        # Leer datos de la entrada. Usamos un timeout de 0.0 para no bloquear la GUI.
+        # Graficar los datos que el hilo de adquisición ya guardó en los buffers.
         mintime = pylsl.local_clock() - plot_duration
-        # llamar a pull_and_plot para cada entrada.
+        # llamar a plot para cada entrada.
         # El manejo específico de tipos de entrada (marcadores, datos continuos) se realiza
         # en las diferentes clases de entrada.
         for inlet in inlets:
-            inlet.pull_and_plot(mintime, plt)
+            inlet.plot(mintime, plt)
+
+    def show_stats():
+        """Mostrar por separado la duración de las extracciones y del graficado de cada entrada"""
+        stats = [f"{inlet.name}: extracción {inlet.pull_time}, graficado {inlet.render_time}" for inlet in inlets]
+        plt.setTitle(" | ".join(stats), size="8pt")
+
+    # crear el hilo que extrae los datos de las entradas fuera del hilo de la GUI
+    worker = AcquisitionWorker(inlets)
+    worker.start()
+    QtGui.QGuiApplication.instance().aboutToQuit.connect(worker.stop)
+
+    # crear el hilo que busca los flujos y un temporizador que agregará o quitará sus entradas
+    discovery = StreamDiscovery()
+    discovery.start()
+    QtGui.QGuiApplication.instance().aboutToQuit.connect(discovery.stop)
+    discovery_timer = QtCore.QTimer()
+    discovery_timer.timeout.connect(check_streams)
+    discovery_timer.start(discovery_interval)
 
     # crear un temporizador que moverá la vista cada update_interval ms
     update_timer = QtCore.QTimer()
     update_timer.timeout.connect(scroll)
     update_timer.start(update_interval)
 
-    # crear un temporizador que extraerá y agregará nuevos datos ocasionalmente
+    # crear un temporizador que graficará los nuevos datos ocasionalmente
     pull_timer = QtCore.QTimer()
     pull_timer.timeout.connect(update)
     pull_timer.start(pull_interval)
 
+    # crear un temporizador que actualizará los espectros
+    spectrum_timer = QtCore.QTimer()
+    spectrum_timer.timeout.connect(lambda: [panel.update() for panel in panels])
+    spectrum_timer.start(spectrum_interval)
+
+    # crear un temporizador que mostrará las estadísticas de extracción y graficado
+    stats_timer = QtCore.QTimer()
+    stats_timer.timeout.connect(show_stats)
+    stats_timer.start(stats_interval)
+
     import sys
 
     # Iniciar el bucle de eventos de Qt a menos que estemos en modo interactivo o usando pyside.
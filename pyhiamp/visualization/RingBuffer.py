@@ -0,0 +1,92 @@
+"""
+Buffer circular para datos multicanal provenientes de un StreamInlet de LSL.
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Buffer circular 2-D (tiempo x canal) con un anillo de timestamps asociado.
+
+    Cada muestra se guarda dos veces, en la posición p y en su espejo p + capacity. De esta forma
+    las últimas muestras recibidas son siempre una vista contigua y ordenada del buffer, que puede
+    pasarse directamente a las curvas sin concatenar arrays en cada extracción.
+    """
+
+    def __init__(self, capacity: int, n_channels: int, dtype=np.float32):
+        """
+        :param capacity: cantidad máxima de muestras que se guardan
+        :param n_channels: cantidad de canales
+        :param dtype: tipo de dato de las muestras (debe coincidir con el formato del flujo)
+        """
+        self.capacity = int(capacity)
+        self.n_channels = n_channels
+        self.data = np.zeros((2 * self.capacity, n_channels), dtype=dtype)
+        self.timestamps = np.zeros(2 * self.capacity)
+        self.write_pos = 0  # posición (en la primera mitad) donde se escribirá la próxima muestra
+        self.count = 0  # cantidad de muestras válidas, como máximo capacity
+        self.total = 0  # cantidad de muestras escritas desde la creación
+
+    def pull(self, inlet, process=None) -> int:
+        """Extraer todas las muestras disponibles de la entrada y escribirlas en el buffer.
+        Las muestras se escriben directamente en el buffer con pull_chunk(dest_obj=...).
+        :param inlet: StreamInlet desde donde extraer los datos
+        :param process: función opcional que recibe la vista (muestras x canales) de las muestras nuevas
+            y la modifica en el lugar antes de copiarla al espejo
+        :return: cantidad de muestras extraídas
+        """
+        pulled = 0
+        while True:
+            # espacio contiguo hasta el final de la primera mitad
+            space = self.capacity - self.write_pos
+            dest = self.data[self.write_pos : self.capacity]
+            _, ts = inlet.pull_chunk(timeout=0.0, max_samples=space, dest_obj=dest)
+            n = len(ts)
+            if n == 0:
+                break
+            self._commit(dest[:n], ts, process)
+            pulled += n
+            if n < space:
+                break
+        return pulled
+
+    def write(self, samples, timestamps, process=None) -> int:
+        """Escribir muestras ya extraídas (muestras x canales) en el buffer.
+        :return: cantidad de muestras escritas
+        """
+        samples = np.asarray(samples)
+        timestamps = np.asarray(timestamps)
+        # si hay más muestras que la capacidad solo se conservan las últimas
+        if samples.shape[0] > self.capacity:
+            samples = samples[-self.capacity :]
+            timestamps = timestamps[-self.capacity :]
+        written = 0
+        while written < samples.shape[0]:
+            n = min(self.capacity - self.write_pos, samples.shape[0] - written)
+            dest = self.data[self.write_pos : self.write_pos + n]
+            dest[:] = samples[written : written + n]
+            self._commit(dest, timestamps[written : written + n], process)
+            written += n
+        return written
+
+    def _commit(self, rows, ts, process):
+        """Registrar n muestras ya escritas a partir de write_pos y copiarlas al espejo."""
+        n = rows.shape[0]
+        start = self.write_pos
+        if process is not None:
+            process(rows)
+        self.timestamps[start : start + n] = ts
+        self.data[start + self.capacity : start + self.capacity + n] = rows
+        self.timestamps[start + self.capacity : start + self.capacity + n] = ts
+        self.write_pos = (start + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+        self.total += n
+
+    def window(self, n=None):
+        """Devuelve vistas (sin copiar) de los timestamps y datos de las últimas n muestras, en orden.
+        :param n: cantidad de muestras. Por defecto, todas las muestras válidas.
+        :return: (timestamps, data) con formas (n,) y (n, canales)
+        """
+        n = self.count if n is None else min(n, self.count)
+        end = self.write_pos + self.capacity
+        return self.timestamps[end - n : end], self.data[end - n : end]
@@ -0,0 +1,69 @@
+"""
+Panel con la densidad espectral de potencia de los canales visibles de una DataInlet.
+"""
+
+import numpy as np
+import pyqtgraph as pg
+
+
+class SpectrumPanel:
+    """Muestra la PSD de Welch que la DataInlet actualiza en el hilo de adquisición (ver SlidingWelch).
+
+    El panel no calcula espectros: en cada actualización solo copia, bajo el lock de la entrada, la PSD de los
+    canales visibles en el rango de frecuencias mostrado, por lo que puede refrescarse a 10 Hz con 64 canales o más
+    sin afectar al gráfico de las series temporales.
+    """
+
+    def __init__(self, inlet, plt: pg.PlotItem, max_freq: float = 45.0, log: bool = True):
+        """
+        :param inlet: DataInlet con un estimador de la PSD (inlet.spectrum)
+        :param plt: el gráfico en el cual mostrar los espectros
+        :param max_freq: frecuencia máxima mostrada, en Hz
+        :param log: si es True, la potencia se muestra en escala logarítmica
+        """
+        self.inlet = inlet
+        self.plt = plt
+        freqs = inlet.spectrum.freqs
+        # índices de las frecuencias mostradas, calculados una sola vez
+        self.bins = np.flatnonzero(freqs <= max_freq)
+        self.freqs = freqs[self.bins]
+        self.curves = []
+        self.legend = plt.addLegend(offset=(-10, 10))
+        self._shown = None  # canales de las curvas actuales, para rehacer la leyenda al cambiar de página
+        plt.setLogMode(x=False, y=log)
+        plt.setLabel("bottom", "Frecuencia", units="Hz")
+        plt.setLabel("left", "PSD")
+        plt.setXRange(0, max_freq)
+
+    def _set_channels(self, visible):
+        """Crear las curvas que falten y rehacer la leyenda con los nombres de los canales visibles."""
+        empty = np.array([])
+        while len(self.curves) < len(visible):
+            self.curves.append(self.plt.plot(empty, empty))
+        self.legend.clear()
+        for slot, curve in enumerate(self.curves):
+            if slot < len(visible):
+                curve.setPen(pg.mkPen(pg.intColor(slot, hues=max(len(visible), 1)), width=1))
+                self.legend.addItem(curve, self.inlet.labels[visible[slot]])
+                curve.setVisible(True)
+            else:
+                curve.setData(empty, empty)
+                curve.setVisible(False)
+        self._shown = tuple(visible)
+
+    def update(self):
+        """Actualizar las curvas con la PSD actual. Se llama desde el hilo de la GUI."""
+        inlet = self.inlet
+        with inlet.lock:
+            if inlet.spectrum.count == 0:
+                return
+            visible = inlet.visible
+            # la indexación avanzada copia, así el hilo de adquisición puede seguir actualizando la PSD
+            _, psd = inlet.spectrum.psd(visible)
+        psd = psd[:, self.bins]
+        if self._shown != tuple(visible):
+            self._set_channels(visible)
+        # evitar log(0) en los bins sin potencia
+        np.maximum(psd, np.finfo(psd.dtype).tiny, out=psd)
+        for slot in range(psd.shape[0]):
+            self.curves[slot].setData(self.freqs, psd[slot])
@@ -0,0 +1,75 @@
+"""
+Mapa topográfico en tiempo real de la potencia en una banda de frecuencias.
+"""
+
+import numpy as np
+import pyqtgraph as pg
+
+from pyhiamp.processing.topography import CACHE_DIR, interpolationMatrix, projectPositions
+
+
+class TopoMap:
+    """Muestra la potencia en banda de cada electrodo interpolada sobre la cabeza.
+
+    La matriz de interpolación (splines esféricos) se calcula una sola vez por montaje y se guarda en disco, por lo
+    que cada cuadro es solo la potencia en banda de la PSD de la entrada (ver SlidingWelch.band_power) y un producto
+    matriz-vector.
+    """
+
+    def __init__(self, inlet, plt: pg.PlotItem, labels=None, positions=None, band=(8.0, 13.0), resolution=64,
+                 cache_dir=CACHE_DIR):
+        """
+        :param inlet: DataInlet con un estimador de la PSD (inlet.spectrum)
+        :param plt: el gráfico en el cual mostrar el mapa
+        :param labels: nombres de los electrodos de positions. Por defecto, los canales de la entrada.
+        :param positions: posiciones X, Y, Z de los electrodos (p.ej. leídas con readMontage). Por defecto, las
+            publicadas por el flujo en la metadata "location" de cada canal.
+        :param band: banda de frecuencias (baja, alta) en Hz
+        :param resolution: cantidad de píxeles por lado del mapa
+        :param cache_dir: carpeta de la caché de matrices de interpolación
+        """
+        self.inlet = inlet
+        self.band = band
+        self.resolution = resolution
+        if positions is None:
+            if inlet.locations is None:
+                raise ValueError(f"El flujo {inlet.name} no publica las posiciones de sus canales")
+            labels, positions = inlet.labels, inlet.locations
+        # canales de la entrada que tienen posición en el montaje
+        lower = [label.lower() for label in inlet.labels]
+        pairs = [(lower.index(label.lower()), i) for i, label in enumerate(labels) if label.lower() in lower]
+        if len(pairs) < 4:
+            raise ValueError(f"Solo {len(pairs)} canales de {inlet.name} tienen posición en el montaje")
+        self.channels = np.array([ch for ch, _ in pairs])
+        positions = np.asarray(positions, dtype=np.float64)[[i for _, i in pairs]]
+        labels = [inlet.labels[ch] for ch in self.channels]
+        self.matrix, self.inside, radius = interpolationMatrix(labels, positions, resolution=resolution,
+                                                               cache_dir=cache_dir)
+        self._image = np.full(resolution * resolution, np.nan, dtype=np.float32)
+
+        # imagen del mapa, contorno de la cabeza y electrodos
+        plt.setAspectLocked(True)
+        plt.hideAxis("left")
+        plt.hideAxis("bottom")
+        self.image_item = pg.ImageItem()
+        self.image_item.setLookupTable(pg.colormap.get("viridis").getLookupTable(nPts=256))
+        self.image_item.setRect(pg.QtCore.QRectF(-radius, -radius, 2 * radius, 2 * radius))
+        plt.addItem(self.image_item)
+        angle = np.linspace(0, 2 * np.pi, 100)
+        plt.plot(np.cos(angle), np.sin(angle), pen=pg.mkPen("k", width=2))
+        plt.plot([-0.1, 0, 0.1], [0.99, 1.1, 0.99], pen=pg.mkPen("k", width=2))  # nariz
+        xy = projectPositions(positions)
+        plt.plot(xy[:, 0], xy[:, 1], pen=None, symbol="o", symbolSize=4, symbolBrush="k")
+        plt.setTitle(f"Potencia {band[0]:g}-{band[1]:g} Hz (dB)")
+
+    def update(self):
+        """Actualizar el mapa con la PSD actual. Se llama desde el hilo de la GUI."""
+        inlet = self.inlet
+        with inlet.lock:
+            if inlet.spectrum.count == 0:
+                return
+            power = inlet.spectrum.band_power(self.band[0], self.band[1], self.channels)
+        values = 10 * np.log10(np.maximum(power, np.finfo(np.float64).tiny)).astype(np.float32)
+        self._image[self.inside] = self.matrix @ values
+        self.image_item.setImage(self._image.reshape(self.resolution, self.resolution),
+                                 levels=(values.min(), values.max()))
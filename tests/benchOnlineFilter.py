@@ -0,0 +1,70 @@
+"""Benchmark del filtrado en línea de OnlineFilter.
+
+Mide los microsegundos por chunk que lleva filtrar (detrend, pasabanda y notch) un g.HIamp emulado de 256 canales,
+y el factor de tiempo real (segundos de señal filtrados por segundo de CPU). Con --window se compara con volver a
+filtrar toda la ventana visible (filtfilt) en cada redibujado, como se haría sin estado entre chunks.
+
+Uso:
+    python benchOnlineFilter.py --channels 256 --srate 4800 --seconds 10 --window
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy import signal
+
+from pyhiamp.processing.OnlineFilter import OnlineFilter
+
+
+def run(process, data, chunk_size):
+    n_chunks = data.shape[0] // chunk_size
+    start = time.perf_counter()
+    for k in range(n_chunks):
+        process(data[k*chunk_size:(k+1)*chunk_size])
+    elapsed = time.perf_counter() - start
+    return elapsed/n_chunks*1e6, n_chunks*chunk_size/elapsed
+
+
+def main(channels=256, srate=4800, seconds=10, chunk_sizes=(8, 32, 64, 128), band=(1.0, 40.0), notch=50.0,
+         window=False, plot_duration=15):
+    rng = np.random.default_rng(2025)
+    data = (rng.standard_normal((int(srate*seconds), channels)) + 100).astype(np.float32)
+
+    print(f"{channels} canales a {srate} Hz, pasabanda {band} Hz, notch {notch} Hz")
+    print(f"{'chunk':>6} {'modo':>12} {'us/chunk':>10} {'x tiempo real':>14}")
+    for chunk_size in chunk_sizes:
+        online = OnlineFilter(srate, channels, band=band, notch=notch, detrend=0.1)
+        us, rate = run(online.filter, data, chunk_size)
+        print(f"{chunk_size:>6} {'filter':>12} {us:>10.1f} {rate/srate:>14.2f}")
+
+        # en el lugar sobre un buffer float32, como en DataInlet
+        online.reset()
+        buffer = data.copy()
+        us, rate = run(online, buffer, chunk_size)
+        print(f"{chunk_size:>6} {'en el lugar':>12} {us:>10.1f} {rate/srate:>14.2f}")
+
+    if window:
+        # volver a filtrar toda la ventana visible en cada redibujado (referencia)
+        sos = online.sos
+        n = min(int(srate*plot_duration), data.shape[0])
+        repeats = 5
+        start = time.perf_counter()
+        for _ in range(repeats):
+            signal.sosfiltfilt(sos, data[:n], axis=0)
+        us = (time.perf_counter() - start)/repeats*1e6
+        print(f"ventana completa ({n} muestras, sosfiltfilt): {us:.0f} us por redibujado")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", default=256, type=int, help="Cantidad de canales.")
+    parser.add_argument("--srate", default=4800, type=int, help="Frecuencia de muestreo.")
+    parser.add_argument("--seconds", default=10, type=float, help="Segundos de señal a filtrar por prueba.")
+    parser.add_argument("--chunks", default=[8, 32, 64, 128], type=int, nargs="+", help="Tamaños de chunk.")
+    parser.add_argument("--notch", default=50.0, type=float, help="Frecuencia de línea.")
+    parser.add_argument("--window", action="store_true", help="Comparar con filtrar toda la ventana visible.")
+    arg = parser.parse_args()
+
+    main(channels=arg.channels, srate=arg.srate, seconds=arg.seconds, chunk_sizes=arg.chunks, notch=arg.notch,
+         window=arg.window)
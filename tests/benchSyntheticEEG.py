@@ -0,0 +1,73 @@
+"""Benchmark de la generación de EEG sintético de dummyHiamp.
+
+Mide cuántos segundos de señal se generan por segundo de CPU (factor de tiempo real) para
+un g.HIamp emulado de 256 canales a 4800 Hz. Un factor mayor a 1 indica que el generador
+mantiene el tiempo real en un núcleo. Con --push se incluye además el envío por LSL.
+
+Uso:
+    python benchSyntheticEEG.py --channels 256 --srate 4800 --seconds 10 --push
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pylsl
+
+from pyhiamp.streaming.dummyHiamp import dummyHiamp
+
+
+def legacy_getSyntheticEEG(hiamp, n_samples, peak_freq=14, fwhm=15):
+    """Implementación original (un ifft complejo por canal y conversión a lista), como referencia."""
+    hz = np.linspace(0, hiamp.srate, n_samples)
+    s = fwhm*(2*np.pi-1)/(4*np.pi)
+    gauss = np.exp((-.5)*((hz-peak_freq)/s)**2)
+    data = np.zeros((hiamp.n_channels, n_samples))
+    for ch in range(hiamp.n_channels):
+        fc = np.random.rand(n_samples)*np.exp(2j*np.pi*np.random.rand(n_samples))
+        data[ch] = np.fft.ifft(fc*gauss).real
+    data *= hiamp.scale
+    return data.T.tolist()
+
+
+def run(generate, srate, chunk_size, seconds, outlet=None):
+    n_chunks = int(srate*seconds) // chunk_size
+    start = time.perf_counter()
+    for _ in range(n_chunks):
+        chunk = generate(chunk_size)
+        if outlet is not None:
+            outlet.push_chunk(chunk)
+    elapsed = time.perf_counter() - start
+    return n_chunks*chunk_size/srate/elapsed, elapsed/n_chunks*1e6
+
+
+def main(channels=256, srate=4800, seconds=10, chunk_sizes=(8, 32, 64, 128), push=False, legacy=False):
+    sources = {"continuous": "_getContinuousEEG", "spectral": "_getSyntheticEEG"}
+    channels_names = [f"CH{i+1}" for i in range(channels)]
+    hiamp = dummyHiamp(name="BenchHiamp", srate=srate, channels_names=channels_names,
+                       source_id="BenchHiamp")
+    outlet = pylsl.StreamOutlet(hiamp.info, max(chunk_sizes), 10) if push else None
+
+    print(f"{channels} canales a {srate} Hz, {seconds} s de señal por tamaño de chunk")
+    print(f"{'chunk':>6} {'fuente':>10} {'x tiempo real':>14} {'us/chunk':>10}")
+    for chunk_size in chunk_sizes:
+        for source, method in sources.items():
+            rtf, us = run(getattr(hiamp, method), srate, chunk_size, seconds, outlet)
+            print(f"{chunk_size:>6} {source:>10} {rtf:>14.2f} {us:>10.1f}")
+        if legacy:
+            rtf, us = run(lambda n: legacy_getSyntheticEEG(hiamp, n), srate, chunk_size, seconds, outlet)
+            print(f"{chunk_size:>6} {'original':>10} {rtf:>14.2f} {us:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", default=256, type=int, help="Cantidad de canales.")
+    parser.add_argument("--srate", default=4800, type=int, help="Frecuencia de muestreo.")
+    parser.add_argument("--seconds", default=10, type=float, help="Segundos de señal a generar por prueba.")
+    parser.add_argument("--chunks", default=[8, 32, 64, 128], type=int, nargs="+", help="Tamaños de chunk.")
+    parser.add_argument("--push", action="store_true", help="Enviar cada chunk por un StreamOutlet.")
+    parser.add_argument("--legacy", action="store_true", help="Comparar con la implementación original.")
+    arg = parser.parse_args()
+
+    main(channels=arg.channels, srate=arg.srate, seconds=arg.seconds, chunk_sizes=arg.chunks,
+         push=arg.push, legacy=arg.legacy)
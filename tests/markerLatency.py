@@ -0,0 +1,143 @@
+"""Medición de la latencia de los marcadores de MarkersGenerator, desde el envío hasta la recepción.
+
+Crea un MarkersGenerator (en el mismo proceso o en un proceso aparte) y una StreamInlet local. El generador envía
+marcadores a una tasa fija con su planificador (MarkersGenerator.start). Para cada marcador recibido se calcula la
+latencia (instante de recepción - timestamp de envío, ambos en local_clock, que es común a todos los procesos de la
+máquina) y el jitter entre marcadores (intervalo entre timestamps consecutivos - período nominal).
+
+Los resultados se guardan como JSON y/o CSV con percentiles. Con --max-p99 el script termina con código 1 si el
+percentil 99 de la latencia supera el umbral, para detectar regresiones en CI. Solo usa localhost.
+
+Uso:
+    python markerLatency.py --rates 10 100 500 --markers 1000 --mode process --out latencia.json
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import threading
+import uuid
+
+import numpy as np
+import pylsl
+
+from pyhiamp.markers.MarkersGenerator import MarkersGenerator
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def run_generator(source_id, rate, n_markers, ready, done):
+    """Enviar n_markers marcadores a la tasa indicada, cuando el receptor esté listo."""
+    phases = {"marker": {"next": "marker", "duration": 1 / rate}}
+    generator = MarkersGenerator(phases, stream_name="MarkerLatency", sourceID=source_id)
+    ready.wait()
+    sent = []
+    generator.subscribe(lambda phase, marker, timestamp, lateness: sent.append(lateness))
+    generator.start()
+    while len(sent) < n_markers and not done.is_set():
+        done.wait(0.05)
+    generator.stop()
+    # dar tiempo al receptor para leer los últimos marcadores antes de destruir la salida
+    done.wait(2.0)
+
+
+def receive(source_id, n_markers, period, ready, timeout=5.0):
+    """Recibir n_markers marcadores y devolver los timestamps de envío y los instantes de recepción."""
+    streams = pylsl.resolve_byprop("source_id", source_id, timeout=timeout)
+    if not streams:
+        raise RuntimeError("No se encontró el flujo de marcadores")
+    inlet = pylsl.StreamInlet(streams[0])
+    inlet.open_stream(timeout=timeout)
+    ready.set()
+    sent = np.empty(n_markers)
+    received = np.empty(n_markers)
+    count = 0
+    while count < n_markers:
+        _, timestamp = inlet.pull_sample(timeout=max(timeout, 10 * period))
+        if timestamp is None:
+            break
+        received[count] = pylsl.local_clock()
+        sent[count] = timestamp
+        count += 1
+    inlet.close_stream()
+    return sent[:count], received[:count]
+
+
+def measure(rate, n_markers, mode="thread"):
+    """Medir la latencia de n_markers marcadores enviados a rate marcadores por segundo."""
+    source_id = f"MarkerLatency_{uuid.uuid4().hex[:8]}"
+    if mode == "process":
+        context = multiprocessing.get_context("spawn")
+        ready, done = context.Event(), context.Event()
+        worker = context.Process(target=run_generator, args=(source_id, rate, n_markers, ready, done), daemon=True)
+    else:
+        ready, done = threading.Event(), threading.Event()
+        worker = threading.Thread(target=run_generator, args=(source_id, rate, n_markers, ready, done), daemon=True)
+    worker.start()
+    try:
+        sent, received = receive(source_id, n_markers, 1 / rate, ready)
+    finally:
+        done.set()
+        worker.join(5.0)
+    return summarize(rate, n_markers, mode, sent, received)
+
+
+def summarize(rate, n_markers, mode, sent, received):
+    latency = (received - sent) * 1000
+    jitter = (np.diff(sent) - 1 / rate) * 1000
+    result = {"rate": rate, "mode": mode, "sent": n_markers, "received": int(latency.size),
+              "lost": n_markers - int(latency.size)}
+    for name, values in (("latency", latency), ("jitter", np.abs(jitter))):
+        if values.size == 0:
+            continue
+        result[f"{name}_mean_ms"] = float(np.mean(values))
+        for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            result[f"{name}_p{p:g}_ms"] = float(value)
+        result[f"{name}_max_ms"] = float(np.max(values))
+    return result
+
+
+def save(results, path):
+    if path.endswith(".csv"):
+        keys = list(dict.fromkeys(key for result in results for key in result))
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=keys)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main(rates=(10, 100, 500), n_markers=500, mode="thread", out=None, max_p99=None):
+    results = []
+    print(f"{'tasa':>6} {'modo':>8} {'recibidos':>10} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8} {'jitter p99':>11}")
+    for rate in rates:
+        result = measure(rate, n_markers, mode)
+        results.append(result)
+        print(f"{rate:>6g} {mode:>8} {result['received']:>10} {result.get('latency_p50_ms', np.nan):>8.3f} "
+              f"{result.get('latency_p99_ms', np.nan):>8.3f} {result.get('latency_max_ms', np.nan):>8.3f} "
+              f"{result.get('jitter_p99_ms', np.nan):>11.3f}")
+    for path in out or []:
+        save(results, path)
+    if max_p99 is not None:
+        failed = [r for r in results if r["lost"] or r.get("latency_p99_ms", np.inf) > max_p99]
+        if failed:
+            print(f"La latencia p99 supera {max_p99} ms o se perdieron marcadores en {len(failed)} pruebas")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rates", default=[10, 100, 500], type=float, nargs="+", help="Marcadores por segundo.")
+    parser.add_argument("--markers", default=500, type=int, help="Marcadores a enviar por tasa.")
+    parser.add_argument("--mode", default="thread", choices=["thread", "process"],
+                        help="Generador en un hilo del mismo proceso o en un proceso aparte.")
+    parser.add_argument("--out", nargs="+", help="Archivos de reporte (.json o .csv).")
+    parser.add_argument("--max-p99", type=float, help="Umbral en ms de la latencia p99 para fallar.")
+    arg = parser.parse_args()
+
+    sys.exit(main(rates=arg.rates, n_markers=arg.markers, mode=arg.mode, out=arg.out, max_p99=arg.max_p99))
@@ -2,10 +2,11 @@ from PyQt5.QtWidgets import QWidget, QApplication, QVBoxLayout, QLabel
 from PyQt5.QtCore import QTimer, Qt
 from pyhiamp.markers.MarkersGenerator import MarkersGenerator
 from pyhiamp.gui.SquareWidget import SquareWidget
+from pyhiamp.gui.StimulusPresenter import StimulusPresenter
+from pylsl import local_clock
 from pyhiamp.utils.decorators import TimerLogger, intervalCounter
 import logging
 import sys
-import numpy as np
 
 logging.basicConfig(level=logging.WARNING)  # Configuración básica del logger
 
@@ -31,42 +32,49 @@ phases = {
     "first_jump": {"next": "start", "duration": 0.1},}
 markerGen = MarkersGenerator(phases, stream_name="Test_Markers", stream_type="Markers")
 
-logger = TimerLogger()
+## los cambios de los cuadrados se aplican en el próximo cuadro y el marcador se envía con el instante del flip del
+## presentador. Los cuadrados son ventanas aparte y el compositor puede mostrarlos uno o más cuadros después, así
+## que el retraso real entre marcador y estímulo se debe medir con un fotodiodo: uno sobre el parche de la esquina
+## superior izquierda (blanco en los cuadros con marcador) y otro sobre el cuadrado del estímulo
+presenter = StimulusPresenter(markerGen, x=0, y=0, size=60, photodiode=True)
+
+logger = TimerLogger(percentiles=(50, 99))
 
 @intervalCounter(logger)
 def update_markers():
-    if markerGen.update():
-        logging.debug(f"Marcador enviado: {markerGen.in_phase}")
-        if markerGen.in_phase == "start":
-            marcador_inicio.change_color("#ffffff")
-            marcador_cue.change_color("#000000")
-            marcador_precue.change_color("#000000")
-            ##dejo sin texto
-            marcador_inicio.change_text("")
-            marcador_cue.change_text("")
-            marcador_precue.change_text("")
-        elif markerGen.in_phase == "precue":
-            marcador_inicio.change_color("#000000")
-            marcador_precue.change_color("#ffffff")
-            marcador_cue.change_color("#000000")
-        elif markerGen.in_phase == "cue":
-            marcador_precue.change_color("#000000")
-            marcador_inicio.change_color("#000000")
-            marcador_cue.change_color("#ffffff")
-        elif markerGen.in_phase == "evaluate":
-            marcador_cue.change_color("#000000")
-            marcador_precue.change_color("#000000")
+    if presenter.marker_pending or local_clock() <= markerGen.next_transition:
+        return
+    next_phase = markerGen.phases[markerGen.in_phase]["next"]
+    logging.debug(f"Marcador pedido: {next_phase}")
+    if next_phase == "start":
+        presenter.set(marcador_inicio, color="#ffffff", text="")
+        presenter.set(marcador_cue, color="#000000", text="")
+        presenter.set(marcador_precue, color="#000000", text="")
+    elif next_phase == "precue":
+        presenter.set(marcador_inicio, color="#000000")
+        presenter.set(marcador_precue, color="#ffffff")
+        presenter.set(marcador_cue, color="#000000")
+    elif next_phase == "cue":
+        presenter.set(marcador_precue, color="#000000")
+        presenter.set(marcador_inicio, color="#000000")
+        presenter.set(marcador_cue, color="#ffffff")
+    elif next_phase == "evaluate":
+        presenter.set(marcador_cue, color="#000000")
+        presenter.set(marcador_precue, color="#000000")
+    presenter.next()
 
 def stop_test():
-    if len(logger.timestamps) > 1:
-        intervals = np.diff(logger.timestamps) * 1000  # convert to ms
+    # logger ya guarda los intervalos entre llamadas, en ms
+    if logger.count > 0:
+        stats = logger.summary()
         print(f"\n--- Datos del timer ---")
-        print(f"Muestras: {len(intervals)}")
-        print(f"Media del intervalo: {np.mean(intervals):.3f} ms")
-        print(f"Mediana: {np.median(intervals):.3f} ms")
-        print(f"Std: {np.std(intervals):.3f} ms")
-        print(f"Min: {np.min(intervals):.3f} ms")
-        print(f"Max: {np.max(intervals):.3f} ms")
+        print(f"Muestras: {stats['count']}")
+        print(f"Media del intervalo: {stats['mean']:.3f} ms")
+        print(f"Mediana: {stats['p50']:.3f} ms")
+        print(f"P99: {stats['p99']:.3f} ms")
+        print(f"Std: {stats['std']:.3f} ms")
+        print(f"Min: {stats['min']:.3f} ms")
+        print(f"Max: {stats['max']:.3f} ms")
     app.quit()
 
 class MainWindow(QWidget):
@@ -122,15 +130,17 @@ class MainWindow(QWidget):
         elif event.key() == Qt.Key_Escape:
             print("Deteniendo...")
             self.stop()
-            app.quit()
+            stop_test()
 
     def start_test(self):
+        presenter.start()
         for timer in self.timers:
             timer.start()
 
     def stop(self):
         for timer in self.timers:
             timer.stop()
+        print(presenter.stop())
         ##cierro la ventana
         self.close()
 
@@ -0,0 +1,31 @@
+"""Pruebas de los filtros de ContinuousEEGGenerator cerca de la frecuencia de Nyquist.
+
+Uso:
+    python -m pytest tests/test_generators.py
+"""
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from pyhiamp.streaming.generators import ContinuousEEGGenerator, bandFilter
+
+
+def test_band_reaching_nyquist_uses_highpass():
+    # banda de 37.5 a 52.5 Hz con Nyquist en 50 Hz: se usa un pasa altos desde 37.5 Hz
+    sos, gain = bandFilter(100, 2, 45, 15)
+    freqs, response = signal.sosfreqz(sos, worN=512, fs=100)
+    assert np.abs(response[freqs < 10]).max() < 0.1
+    assert np.abs(response[(freqs > 45) & (freqs < 49)]).min() > 0.5
+    assert np.isfinite(gain)
+
+    generator = ContinuousEEGGenerator(4, 100, seed=0)
+    chunk = generator.generate(64, peak_freq=48, fwhm=10)
+    assert chunk.shape == (64, 4) and np.isfinite(chunk).all()
+
+
+@pytest.mark.parametrize("peak_freq, fwhm", [(60, 15), (80, 4), (10, 0)])
+def test_band_above_nyquist_raises(peak_freq, fwhm):
+    generator = ContinuousEEGGenerator(4, 100, seed=0)
+    with pytest.raises(ValueError, match="fwhm"):
+        generator.generate(64, peak_freq=peak_freq, fwhm=fwhm)
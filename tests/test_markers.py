@@ -0,0 +1,41 @@
+"""Pruebas de los códigos enteros de MarkersGenerator y de MarkerDecoder.
+
+Uso:
+    python -m pytest tests/test_markers.py
+"""
+
+import uuid
+
+import pytest
+
+from pyhiamp.markers.MarkerDecoder import MarkerDecoder
+from pyhiamp.markers.MarkersGenerator import MarkersGenerator, markerCodes
+
+
+def make_generator(phases, messages):
+    phases = {phase: {"next": phase, "duration": 1.0} for phase in phases}
+    return MarkersGenerator(phases, sourceID=f"test_markers_{uuid.uuid4().hex[:8]}", marker_format="int32",
+                            messages=messages)
+
+
+def test_decode_chunk_matches_decode():
+    generator = make_generator(["precue", "cue", "rest"], ["izq", "der"])
+    decoder = MarkerDecoder(generator.outlet_info)
+    # códigos conocidos, desconocidos dentro de la tabla (5, 150), fuera de ella y negativos
+    samples = [[1], [5], [201], [150], [302], [1000], [-1]]
+    labels = decoder.decode_chunk(samples)
+    assert labels == [decoder.decode(sample[0]) for sample in samples]
+    assert labels[:4] == ["precue", "5", "cue_izq", "150"]
+    # sin códigos fuera de la tabla, el chunk se traduce con la tabla densa
+    assert decoder.decode_chunk(samples[:4]) == labels[:4]
+
+
+def test_marker_codes_are_unique():
+    phases = [f"fase{i}" for i in range(99)]
+    messages = [f"mensaje{j}" for j in range(99)]
+    codes = markerCodes(phases, messages)
+    assert len(set(codes.values())) == len(codes)
+    with pytest.raises(ValueError):
+        markerCodes(phases + ["fase99"], ["mensaje"])
+    with pytest.raises(ValueError):
+        markerCodes(["fase"], messages + ["mensaje99"])
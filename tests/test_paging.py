@@ -0,0 +1,52 @@
+"""Prueba de la paginación de canales de DataInlet (ReceiveAndPlot).
+
+Uso:
+    QT_QPA_PLATFORM=offscreen python -m pytest tests/test_paging.py
+"""
+
+import uuid
+
+import pyqtgraph as pg
+import pylsl
+
+from pyhiamp.visualization.ReceiveAndPlot import DataInlet
+
+
+def make_inlet(n_channels=64, channels_per_page=16, widget=None):
+    """DataInlet conectada a una salida local de n_channels canales, y los objetos que deben seguir vivos.
+    Con widget, la entrada se grafica en ese PlotWidget (compartido con otras entradas)."""
+    pg.mkQApp()
+    source_id = f"test_paging_{uuid.uuid4().hex[:8]}"
+    info = pylsl.StreamInfo("test_paging", "EEG", n_channels, 250, "float32", source_id)
+    outlet = pylsl.StreamOutlet(info)
+    streams = pylsl.resolve_byprop("source_id", source_id, timeout=5.0)
+    assert streams, "No se encontró el flujo de prueba"
+    widget = pg.PlotWidget() if widget is None else widget
+    inlet = DataInlet(streams[0], widget.getPlotItem(), channels_per_page=channels_per_page)
+    return inlet, (widget, outlet)
+
+
+def test_scroll_then_next_page():
+    inlet, keep_alive = make_inlet()
+    try:
+        inlet.scroll(1)
+        assert inlet.page == 0
+        # la página siguiente empieza en el canal 16, sin saltear canales
+        inlet.next_page()
+        assert inlet.page == 1
+        assert int(inlet.visible[0]) == 16
+        inlet.prev_page()
+        assert int(inlet.visible[0]) == 0
+    finally:
+        inlet.close()
+
+
+def test_close_keeps_ticks_of_other_inlet():
+    first, keep_first = make_inlet()
+    # las dos entradas comparten el eje izquierdo: la segunda, creada después, puso sus nombres de canales
+    second, keep_second = make_inlet(widget=keep_first[0])
+    axis = first.plt.getAxis("left")
+    first.close()
+    assert axis._tickLevels is not None
+    second.close()
+    assert axis._tickLevels is None
@@ -0,0 +1,43 @@
+"""Prueba de la metadata de canales que republica replayHiamp.
+
+Uso:
+    python -m pytest tests/test_replay.py
+"""
+
+import threading
+import uuid
+
+import numpy as np
+import pylsl
+
+from pyhiamp.streaming.replayHiamp import replayHiamp
+
+
+def test_replay_keeps_channel_metadata(tmp_path):
+    path = str(tmp_path / "session.npy")
+    np.save(path, np.zeros((500, 3), dtype=np.float32))
+    source_id = f"test_replay_{uuid.uuid4().hex[:8]}"
+    channels = [{"label": "Cz", "unit": "microvolts", "type": "EEG", "location": [0.0, 0.0, 0.1]},
+                {"label": "VEOG", "unit": "microvolts", "type": "EOG"},
+                {"label": "TRIG", "unit": "none", "type": "TRIG"}]
+    replay = replayHiamp(path, metadata={"srate": 250.0, "source_id": source_id, "channels": channels})
+    assert replay.generator is None and replay.continuous_generator is None
+
+    thread = threading.Thread(target=replay.startReplay, kwargs={"speed": 1.0})
+    thread.start()
+    try:
+        streams = pylsl.resolve_byprop("source_id", source_id, timeout=5.0)
+        assert streams, "No se encontró el flujo de prueba"
+        inlet = pylsl.StreamInlet(streams[0])
+        channel = inlet.info(timeout=5.0).desc().child("channels").child("channel")
+        received = []
+        while channel.name() == "channel":
+            received.append({key: channel.child_value(key) for key in ("label", "unit", "type")})
+            received[-1]["location"] = channel.child("location").child_value("Z") or None
+            channel = channel.next_sibling("channel")
+    finally:
+        thread.join()
+    assert [ch["type"] for ch in received] == ["EEG", "EOG", "TRIG"]
+    assert [ch["label"] for ch in received] == ["Cz", "VEOG", "TRIG"]
+    assert [ch["unit"] for ch in received] == ["microvolts", "microvolts", "none"]
+    assert [ch["location"] for ch in received] == ["0.1", None, None]
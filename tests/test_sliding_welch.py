@@ -0,0 +1,29 @@
+"""Comparación de SlidingWelch con scipy.signal.welch.
+
+Uso:
+    python -m pytest tests/test_sliding_welch.py
+"""
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from pyhiamp.processing.SlidingWelch import SlidingWelch
+
+
+@pytest.mark.parametrize("detrend", ["constant", False])
+def test_matches_scipy_welch(detrend):
+    srate, nperseg, n_segments = 250, 250, 8
+    hop = nperseg // 2
+    rng = np.random.default_rng(0)
+    # señal con continua, para que se note si no se resta la media de cada segmento
+    data = rng.standard_normal((nperseg + hop * (n_segments - 1), 4)) + 50.0
+    welch = SlidingWelch(srate, 4, nperseg=nperseg, overlap=0.5, n_segments=n_segments, detrend=detrend)
+    # en chunks de distinto tamaño, como llegan de la adquisición
+    for chunk in np.array_split(data, 13):
+        welch.update(chunk)
+    freqs, psd = welch.psd()
+    expected_freqs, expected = signal.welch(data, srate, nperseg=nperseg, noverlap=nperseg - hop,
+                                            detrend=detrend, axis=0)
+    np.testing.assert_allclose(freqs, expected_freqs)
+    np.testing.assert_allclose(psd, expected.T, rtol=1e-9, atol=1e-12)